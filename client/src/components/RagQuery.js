@@ -1,25 +1,61 @@
 import React, { useState } from 'react';
-import axios from 'axios';
 
 function RagQuery() {
   const [query, setQuery] = useState('');
   const [result, setResult] = useState('');
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
+  const [status, setStatus] = useState('');
 
   const handleSubmit = async (e) => {
     e.preventDefault();
     setLoading(true);
     setError(null);
     setResult('');
+    setStatus('');
     try {
-      const response = await axios.post('http://localhost:5004/api/rag', { query });
-      setResult(response.data.result);
+      // The server streams newline-delimited JSON events, so the answer can be
+      // shown while it is still being generated.
+      const response = await fetch('http://localhost:5004/api/rag', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ query, stream: true }),
+      });
+      if (!response.ok || !response.body) {
+        throw new Error(`Request failed with status ${response.status}`);
+      }
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let text = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) {
+          break;
+        }
+        buffer += decoder.decode(value, { stream: true });
+        let newline;
+        while ((newline = buffer.indexOf('\n')) !== -1) {
+          const event = JSON.parse(buffer.slice(0, newline));
+          buffer = buffer.slice(newline + 1);
+          if (event.event === 'tool_call') {
+            setStatus('Querying the student database...');
+          } else if (event.event === 'text') {
+            text += event.text;
+            setResult(text);
+          } else if (event.event === 'result') {
+            setResult(event.result);
+          } else if (event.event === 'error') {
+            throw new Error(event.error);
+          }
+        }
+      }
     } catch (err) {
       setError('Error running the query. Please try again.');
       console.error(err);
     } finally {
       setLoading(false);
+      setStatus('');
     }
   };
 
@@ -93,6 +129,7 @@ function RagQuery() {
           {loading ? 'Processing...' : 'Run Query'}
         </button>
       </form>
+      {status && <p>{status}</p>}
       {error && <p style={{ color: '#ff6b6b' }}>{error}</p>}
       {result && (
         <div style={resultStyle}>
@@ -7,6 +7,7 @@ function UploadDoc() {
   const [result, setResult] = useState("");
   const [message, setMessage] = useState("");
   const [showModal, setShowModal] = useState(false);
+  const [importMarks, setImportMarks] = useState(false);
 
   const handleFileChange = (e) => {
     const selectedFile = e.target.files[0];
@@ -22,6 +23,7 @@ function UploadDoc() {
     
     const formData = new FormData();
     formData.append("docfile", file);
+    formData.append("import_marks", importMarks ? "true" : "false");
     
     try {
       const response = await fetch("http://localhost:5004/api/upload-document", {
@@ -65,6 +67,14 @@ function UploadDoc() {
           className="file-input"
         />
       </div>
+      <label className="upload-option">
+        <input
+          type="checkbox"
+          checked={importMarks}
+          onChange={(e) => setImportMarks(e.target.checked)}
+        />
+        Use this paper's marks and BT levels for the whole course
+      </label>
       <button onClick={handleUpload} className="upload-button">Upload and Process</button>
       {message && <p className="upload-message">{message}</p>}
       
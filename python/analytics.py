@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# /python/analytics.py
+#
+# Bloom's-taxonomy and topic analytics over the scores database.
+#
+# Question metadata (marks, BT level, topic) lives in a `questions` table next
+# to `mytable`, one row per score column. It is seeded from course.py and
+# updated from parsed question papers (ocr.py --db), where paper question n
+# covers score columns Tn, Tna, Tnb, ... Scores are unpivoted into
+# `question_scores` (primary key column_name, USN) so they join to `questions`
+# on an index, and the per-student and class aggregates per BT level and per
+# topic are materialized in tables of their own. refresh() rebuilds them only
+# when the scores or the question metadata change, so the RAG tool can query
+# them directly.
+#
+#   python analytics.py import paper.docx     # store marks / BT levels from a paper
+#   python analytics.py report                # print the per-BT / per-topic tables
+
+import os
+import re
+import sys
+import hashlib
+import sqlite3
+import argparse
+
+import pandas as pd
+
+from course import TEST_COLUMNS, TOPIC_MAPPING, MAX_MARKS
+
+DB_PATH = os.environ.get("RAG_DB_PATH", 'mydatabase.db')
+SCORES_TABLE = "mytable"
+KEY_COLUMN = "USN"
+WEAK_FRACTION = 0.5  # below half of the available marks counts as weak
+
+COLUMN_RE = re.compile(r"^T(\d+)([a-z]?)$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    column_name TEXT PRIMARY KEY, question_no INTEGER NOT NULL, marks REAL NOT NULL,
+    bt_level TEXT, topic TEXT, question_text TEXT, source TEXT);
+CREATE INDEX IF NOT EXISTS ix_questions_bt_level ON questions (bt_level);
+CREATE INDEX IF NOT EXISTS ix_questions_topic ON questions (topic);
+
+CREATE TABLE IF NOT EXISTS question_scores (
+    column_name TEXT NOT NULL, USN TEXT NOT NULL, score REAL NOT NULL,
+    PRIMARY KEY (column_name, USN)) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS student_bt_performance (
+    USN TEXT NOT NULL, bt_level TEXT NOT NULL, score REAL, max_marks REAL, percent REAL,
+    PRIMARY KEY (USN, bt_level)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_student_bt_performance_bt_level ON student_bt_performance (bt_level, percent);
+
+CREATE TABLE IF NOT EXISTS student_topic_performance (
+    USN TEXT NOT NULL, topic TEXT NOT NULL, score REAL, max_marks REAL, percent REAL,
+    PRIMARY KEY (USN, topic)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_student_topic_performance_topic ON student_topic_performance (topic, percent);
+
+CREATE TABLE IF NOT EXISTS bt_performance (
+    bt_level TEXT PRIMARY KEY, questions INTEGER, max_marks REAL, students INTEGER,
+    avg_score REAL, avg_percent REAL, weak_students INTEGER);
+
+CREATE TABLE IF NOT EXISTS topic_performance (
+    topic TEXT PRIMARY KEY, bt_levels TEXT, questions INTEGER, max_marks REAL, students INTEGER,
+    avg_score REAL, avg_percent REAL, weak_students INTEGER);
+
+CREATE TABLE IF NOT EXISTS analytics_meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# (per-student table, class table, grouping column) pairs rebuilt by refresh().
+_GROUPINGS = [
+    ("student_bt_performance", "bt_performance", "bt_level"),
+    ("student_topic_performance", "topic_performance", "topic"),
+]
+
+
+def question_number(column):
+    """Paper question number a score column belongs to ('T3b' -> 3), or None."""
+    m = COLUMN_RE.match(column)
+    return int(m.group(1)) if m else None
+
+
+def ensure_schema(conn):
+    """Create the analytics tables and seed `questions` from course.py if empty."""
+    conn.executescript(SCHEMA)
+    if conn.execute("SELECT 1 FROM questions LIMIT 1").fetchone() is None:
+        with conn:
+            conn.executemany(
+                "INSERT INTO questions (column_name, question_no, marks, topic, source) "
+                "VALUES (?, ?, ?, ?, 'course.py')",
+                [(c, question_number(c), MAX_MARKS[c], TOPIC_MAPPING.get(c)) for c in TEST_COLUMNS],
+            )
+
+
+def import_paper(conn, questions, source=None):
+    """
+    Store BT level and text for parsed paper questions (dicts with number,
+    marks, bt_level, text). A question with a single score column also sets
+    that column's marks. Returns the number of score columns updated.
+    """
+    ensure_schema(conn)
+    updated = 0
+    with conn:
+        for q in questions:
+            columns = [row[0] for row in conn.execute(
+                "SELECT column_name FROM questions WHERE question_no = ?", (q["number"],))]
+            if not columns:
+                continue
+            conn.execute(
+                "UPDATE questions SET bt_level = COALESCE(?, bt_level), question_text = ?, source = ? "
+                "WHERE question_no = ?",
+                (q.get("bt_level"), q.get("text"), source, q["number"]),
+            )
+            if len(columns) == 1 and q.get("marks"):
+                conn.execute("UPDATE questions SET marks = ? WHERE column_name = ?", (q["marks"], columns[0]))
+            updated += len(columns)
+    return updated
+
+
+def load_questions(conn):
+    """Question metadata as a DataFrame indexed by score column, in paper order."""
+    ensure_schema(conn)
+    return pd.read_sql_query(
+        "SELECT column_name, question_no, marks, bt_level, topic FROM questions "
+        "ORDER BY question_no, column_name", conn, index_col="column_name")
+
+
+def course_layout(db_path=None):
+    """
+    (columns, topics, max_marks) from the database's `questions` table, or the
+    course.py defaults when the database has none.
+    """
+    path = db_path or DB_PATH
+    if os.path.exists(path):
+        conn = sqlite3.connect(path)
+        try:
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'questions'").fetchone():
+                q = load_questions(conn)
+                if len(q):
+                    return list(q.index), q["topic"].to_dict(), q["marks"].to_dict()
+        finally:
+            conn.close()
+    return list(TEST_COLUMNS), dict(TOPIC_MAPPING), dict(MAX_MARKS)
+
+
+def _questions_digest(conn):
+    digest = hashlib.sha256()
+    for row in conn.execute("SELECT column_name, marks, bt_level, topic FROM questions ORDER BY column_name"):
+        digest.update(repr(row).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _score_columns(conn):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info("{SCORES_TABLE}")')}
+
+
+def _rebuild(conn):
+    present = _score_columns(conn)
+    columns = [c for (c,) in conn.execute("SELECT column_name FROM questions") if c in present]
+    conn.execute("DELETE FROM question_scores")
+    if columns:
+        conn.execute(
+            "INSERT INTO question_scores (column_name, USN, score) "
+            + " UNION ALL ".join(
+                f'SELECT ?, "{KEY_COLUMN}", COALESCE("{c}", 0) FROM "{SCORES_TABLE}"' for c in columns),
+            columns,
+        )
+
+    for student_table, class_table, group in _GROUPINGS:
+        conn.execute(f"DELETE FROM {student_table}")
+        conn.execute(
+            f"INSERT INTO {student_table} (USN, {group}, score, max_marks, percent) "
+            f"SELECT s.USN, q.{group}, SUM(s.score), SUM(q.marks), "
+            f"100.0 * SUM(s.score) / NULLIF(SUM(q.marks), 0) "
+            f"FROM question_scores s JOIN questions q ON q.column_name = s.column_name "
+            f"WHERE q.{group} IS NOT NULL GROUP BY q.{group}, s.USN"
+        )
+        extra_col, extra_sql = ("bt_levels, ", "(SELECT group_concat(DISTINCT bt_level) FROM questions "
+                                               "WHERE topic = p.topic), ") if group == "topic" else ("", "")
+        conn.execute(f"DELETE FROM {class_table}")
+        conn.execute(
+            f"INSERT INTO {class_table} ({group}, {extra_col}questions, max_marks, students, "
+            f"avg_score, avg_percent, weak_students) "
+            f"SELECT p.{group}, {extra_sql}"
+            f"(SELECT COUNT(*) FROM questions WHERE {group} = p.{group}), "
+            f"MAX(p.max_marks), COUNT(*), AVG(p.score), AVG(p.percent), "
+            f"SUM(p.score < p.max_marks * ?) "
+            f"FROM {student_table} p GROUP BY p.{group}",
+            (WEAK_FRACTION,),
+        )
+
+
+def refresh(conn, data_version):
+    """
+    Rebuild the score join and the aggregate tables if the scores (identified
+    by `data_version`) or the question metadata changed since the last call.
+    Returns a version string covering both.
+    """
+    ensure_schema(conn)
+    version = f"{data_version}:{_questions_digest(conn)}"
+    row = conn.execute("SELECT value FROM analytics_meta WHERE key = 'version'").fetchone()
+    if row and row[0] == version:
+        return version
+    with conn:
+        conn.execute("BEGIN")
+        _rebuild(conn)
+        conn.execute("INSERT INTO analytics_meta (key, value) VALUES ('version', ?) "
+                     "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (version,))
+    return version
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Question metadata and BT-level / topic analytics.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database holding mytable")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="store marks and BT levels from question papers")
+    imp.add_argument("papers", nargs="+")
+    sub.add_parser("report", help="print per-BT-level and per-topic performance")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    if args.command == "import":
+        from ocr import load_document
+
+        for paper in args.papers:
+            _, parsed = load_document(paper)
+            if "error" in parsed:
+                print(f"{paper}: {parsed['error']}", file=sys.stderr)
+                continue
+            print(f"{paper}: {import_paper(conn, parsed['questions'], os.path.basename(paper))} score columns updated")
+    else:
+        from ingest import sync_workbook
+
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        refresh(conn, sync_workbook(os.path.join(base_dir, "scores.xlsx"), conn))
+        with pd.option_context("display.width", 160, "display.max_columns", 20):
+            print(pd.read_sql_query("SELECT * FROM bt_performance ORDER BY bt_level", conn))
+            print()
+            print(pd.read_sql_query("SELECT * FROM topic_performance ORDER BY avg_percent", conn))
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# /python/answer_cache.py
+#
+# Question-level answer cache that sits in front of the LLM in rag.py.
+#
+# A question is first looked up by its normalized text. If that misses, an
+# optional TF-IDF index finds the most similar earlier question and reuses its
+# answer when the cosine similarity clears a threshold. Questions that mention
+# different USNs, numbers or T-columns never match each other. All entries
+# belong to one data version and are dropped when the workbook changes.
+
+import re
+import math
+import time
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "is", "are", "was", "were",
+    "me", "please", "can", "could", "you", "tell", "show", "give", "list", "what",
+    "whats", "s", "which", "who", "whose", "do", "does", "did", "and", "with", "by",
+    "from", "all", "i", "want", "know", "find", "get", "class", "student", "students",
+}
+
+# Comparison operators are kept as words of their own: "total > 30" and
+# "total < 30" are different questions.
+_OPERATOR_RE = re.compile(r"<=|>=|!=|<>|==|[<>=%]")
+COMPARISON_WORDS = {"above", "over", "below", "under", "more", "less", "greater", "fewer",
+                    "least", "most", "higher", "lower"}
+
+
+def _words(token):
+    # Punctuation and symbols split words; letters in any script (with their
+    # combining marks) and digits are kept.
+    return "".join(" " if unicodedata.category(ch)[0] in "PS" else ch for ch in token).split()
+
+
+def normalize_question(question):
+    """Casefold, drop punctuation except comparison operators and collapse whitespace."""
+    text = _OPERATOR_RE.sub(lambda m: f" {m.group()} ", question.casefold())
+    words = []
+    for token in text.split():
+        if _OPERATOR_RE.fullmatch(token):
+            words.append(token)
+        else:
+            words += _words(token)
+    return " ".join(words)
+
+
+def _terms(normalized):
+    return [w for w in normalized.split() if w not in STOPWORDS]
+
+
+def _entities(terms):
+    # USNs, question columns (t1a), numbers and comparisons must match exactly.
+    return frozenset(t for t in terms if any(ch.isdigit() for ch in t)
+                     or t in COMPARISON_WORDS or _OPERATOR_RE.fullmatch(t))
+
+
+class AnswerCache:
+    """Thread-safe exact + near-duplicate answer cache for one data version."""
+
+    def __init__(self, max_entries=1024, ttl=3600.0, similarity=0.9):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # 0 disables the similarity index and leaves exact matching only.
+        self.similarity = similarity
+        self.version = None
+        self._entries = OrderedDict()   # normalized -> (stored_at, terms, answer)
+        self._postings = {}             # term -> set of normalized questions
+        self._doc_freq = Counter()
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def set_version(self, version):
+        with self._lock:
+            if version != self.version:
+                self._clear()
+                self.version = version
+
+    def _clear(self):
+        self._entries.clear()
+        self._postings.clear()
+        self._doc_freq.clear()
+
+    def _remove(self, key):
+        _, terms, _ = self._entries.pop(key)
+        for term in set(terms):
+            self._doc_freq[term] -= 1
+            if not self._doc_freq[term]:
+                del self._doc_freq[term]
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self._postings[term]
+
+    def _vector(self, terms):
+        n = len(self._entries) + 1
+        tf = Counter(terms)
+        vec = {t: (1 + math.log(c)) * math.log((n + 1) / (self._doc_freq.get(t, 0) + 1)) + 1e-9
+               for t, c in tf.items()}
+        norm = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+        return {t: w / norm for t, w in vec.items()}
+
+    def _most_similar(self, terms):
+        entities = _entities(terms)
+        candidates = set()
+        for term in set(terms):
+            candidates |= self._postings.get(term, set())
+        query_vec = self._vector(terms)
+        best_key, best_score = None, 0.0
+        for key in candidates:
+            other_terms = self._entries[key][1]
+            if _entities(other_terms) != entities:
+                continue
+            other_vec = self._vector(other_terms)
+            score = sum(w * other_vec.get(t, 0.0) for t, w in query_vec.items())
+            if score > best_score:
+                best_key, best_score = key, score
+        return best_key, best_score
+
+    def lookup(self, question):
+        """Return a cached answer for `question`, or None."""
+        key = normalize_question(question)
+        if not key:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry[2]
+
+            terms = _terms(key)
+            if self.similarity and terms:
+                match, score = self._most_similar(terms)
+                if match is not None and score >= self.similarity \
+                        and now - self._entries[match][0] <= self.ttl:
+                    self._entries.move_to_end(match)
+                    self.similar_hits += 1
+                    return self._entries[match][2]
+            self.misses += 1
+            return None
+
+    def store(self, question, answer, version):
+        key = normalize_question(question)
+        if not key:
+            return
+        with self._lock:
+            # Answer computed against data that has since been replaced.
+            if version != self.version:
+                return
+            if key in self._entries:
+                self._remove(key)
+            terms = _terms(key)
+            self._entries[key] = (time.monotonic(), terms, answer)
+            for term in set(terms):
+                self._doc_freq[term] += 1
+                self._postings.setdefault(term, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.exact_hits + self.similar_hits + self.misses
+            hits = self.exact_hits + self.similar_hits
+            return {
+                "entries": len(self._entries),
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "version": self.version,
+            }
@@ -0,0 +1,434 @@
+#!/usr/bin/env python
+# /python/benchmark.py
+#
+# Micro-benchmarks for the Python data paths.
+#
+#   python benchmark.py bucketing --rows 100 10000 100000
+#   python benchmark.py loader --rows 100 10000
+#   python benchmark.py pipeline --rows 100 10000 100000 --output bench.json
+#   python benchmark.py pipeline --compare bench.json
+#
+# bucketing and loader time the current implementation against the code it
+# replaced on synthetic rosters and check that both produce the same result.
+#
+# pipeline times every stage of the four entry points on a synthetic workbook
+# (with blank/NaN noise) and a generated .docx question paper: load, clean,
+# bucket and dashboard prep, SQLite ingest, RAG queries (stub LLM), email
+# rendering, sending to a local SMTP sink, and paper parsing. Results are
+# written as JSON; --compare prints the ratio to an earlier run.
+
+import os
+import sys
+import json
+import time
+import zipfile
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import sqlite3
+import socketserver
+import shutil
+from contextlib import contextmanager
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+from bucketing import PERFORMANCE_LABELS, assign_materials
+from course import TEST_COLUMNS, MAX_MARKS, MATERIALS
+from dashboard_data import prepare_dashboard_data
+from email_render import iter_email_bodies, build_message
+from ingest import sync_workbook
+from mailer import BulkMailer
+from paper_parser import iter_questions
+import scores_loader
+
+
+def synthetic_columns(count=len(TEST_COLUMNS)):
+    """The course's question columns, or `count` made-up ones in the same T<n><a|b> style."""
+    if count == len(TEST_COLUMNS):
+        return list(TEST_COLUMNS)
+    return [f"T{i // 2 + 1}{'ab'[i % 2]}" for i in range(count)]
+
+
+def synthetic_layout(columns):
+    """(max marks, materials) for `columns`, using the course's where they exist."""
+    max_marks = {c: MAX_MARKS.get(c, 5) for c in columns}
+    materials = {c: MATERIALS.get(c) or {label: f"https://example.edu/{c}/{label}"
+                                         for label in PERFORMANCE_LABELS} for c in columns}
+    return max_marks, materials
+
+
+def synthetic_usn(i):
+    """Unique USN in the real format (1RV22 + two letters + three digits) for up to 676k students."""
+    return f"1RV22{chr(65 + i // 26000 % 26)}{chr(65 + i // 1000 % 26)}{i % 1000:03d}"
+
+
+def synthetic_scores(rows, seed=0, columns=None, noise=0.2, clean=True):
+    """
+    Roster with random scores. A `noise` fraction of cells is blank: NaN, or
+    with clean=False also whitespace strings like a hand-edited sheet. With
+    clean=True blanks are filled with 0 like the scripts do.
+    """
+    rng = np.random.default_rng(seed)
+    columns = columns or TEST_COLUMNS
+    max_marks, _ = synthetic_layout(columns)
+    df = pd.DataFrame({
+        'Name': [f"STUDENT {i:06d}" for i in range(rows)],
+        'USN': [synthetic_usn(i) for i in range(rows)],
+        'Email': [f"student{i}@example.edu" for i in range(rows)],
+    })
+    for col in columns:
+        scores = rng.integers(0, max_marks[col] + 1, size=rows).astype(float)
+        scores[rng.random(rows) < noise] = np.nan
+        df[col] = scores
+    df['Total-Test'] = df[columns].sum(axis=1)
+    if clean:
+        df[columns] = df[columns].fillna(0)
+    else:
+        for col in columns:
+            blanks = df[col].isna().to_numpy() & (rng.random(rows) < 0.5)
+            df[col] = df[col].astype(object)
+            df.loc[blanks, col] = " "
+    return df
+
+
+_DOCX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>'),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+        'relationships/officeDocument" Target="word/document.xml"/></Relationships>'),
+}
+
+
+def synthetic_paper(path, questions, seed=0):
+    """Write a .docx question paper: Q.n / Marks / BT Level paragraphs, every third question in a table."""
+    rng = np.random.default_rng(seed)
+
+    def para(text):
+        return f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(text)}</w:t></w:r></w:p>"
+
+    def row(*cells):
+        return "<w:tr>" + "".join(f"<w:tc>{para(c)}</w:tc>" for c in cells) + "</w:tr>"
+
+    body = []
+    for n in range(1, questions + 1):
+        text = f"Define concept {n} and explain it with an example."
+        marks, level = str(rng.choice([4, 6, 10])), f"L{rng.integers(1, 7)}"
+        if n % 3 == 0:
+            body.append("<w:tbl>" + row("Q.No", "Question", "Marks", "BT Level")
+                        + row(str(n), text, marks, level) + "</w:tbl>")
+        else:
+            body += [para(f"Q.{n} {text}"), para(f"Marks: {marks}"), para(f"BT Level: {level}")]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, content in _DOCX_PARTS.items():
+            z.writestr(name, content)
+        z.writestr("word/document.xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body>{"".join(body)}</w:body></w:document>'))
+
+
+def legacy_materials(df):
+    """The melt -> apply -> apply -> pivot_table path send_emails.py used before bucketing.py."""
+    df_melted = df.melt(id_vars=['Name', 'USN', 'Email'], value_vars=TEST_COLUMNS,
+                        var_name='Question', value_name='Score')
+    df_melted['MaxMarks'] = df_melted['Question'].map(MAX_MARKS)
+
+    def categorize_performance(row):
+        score = row['Score']
+        max_score = row['MaxMarks']
+        if max_score == 0:
+            return '0-25%'
+        fraction = score / max_score
+        if fraction < 0.25:
+            return '0-25%'
+        elif fraction < 0.50:
+            return '25-50%'
+        elif fraction < 0.75:
+            return '50-75%'
+        else:
+            return '75-100%'
+
+    df_melted['Performance'] = df_melted.apply(categorize_performance, axis=1)
+    df_melted['Material'] = df_melted.apply(lambda r: MATERIALS[r['Question']][r['Performance']], axis=1)
+    result = df_melted.pivot_table(index=['Name', 'USN'], columns='Question',
+                                   values='Material', aggfunc='first')
+    result.columns.name = None
+    return result.fillna('')
+
+
+def timed(fn, *args, repeat=3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_bucketing(args):
+    rows_list, legacy_limit = args.rows, args.legacy_limit
+    print(f"{'rows':>8} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>8}")
+    for rows in rows_list:
+        df = synthetic_scores(rows)
+        fast_time, fast = timed(assign_materials, df, TEST_COLUMNS, MAX_MARKS, MATERIALS)
+        if rows > legacy_limit:
+            print(f"{rows:>8} {'skipped':>12} {fast_time:>15.4f} {'-':>8}")
+            continue
+        slow_time, slow = timed(legacy_materials, df, repeat=1)
+        pd.testing.assert_frame_equal(fast, slow, check_dtype=False)
+        print(f"{rows:>8} {slow_time:>12.4f} {fast_time:>15.4f} {slow_time / fast_time:>7.1f}x")
+
+
+def bench_loader(args):
+    if scores_loader.feather is None:
+        print("pyarrow is not installed; load_scores() falls back to read_excel.")
+    print(f"{'rows':>8} {'read_excel (s)':>15} {'first load (s)':>15} {'cached (s)':>11} {'speedup':>8}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            scores_loader.CACHE_DIR = os.path.join(tmp, "cache")
+            path = os.path.join(tmp, "scores.xlsx")
+            synthetic_scores(rows).to_excel(path, index=False)
+
+            excel_time, expected = timed(pd.read_excel, path, repeat=1)
+            first_time, _ = timed(scores_loader.load_scores, path, repeat=1)
+            cached_time, cached = timed(scores_loader.load_scores, path)
+            pd.testing.assert_frame_equal(cached, expected)
+            print(f"{rows:>8} {excel_time:>15.4f} {first_time:>15.4f} {cached_time:>11.4f} "
+                  f"{excel_time / cached_time:>7.1f}x")
+
+
+class _SMTPSink(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept and discard mail, counting messages."""
+
+    def handle(self):
+        self.wfile.write(b"220 sink ESMTP\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            verb = line[:4].upper()
+            if verb in (b"EHLO", b"HELO"):
+                self.wfile.write(b"250 sink\r\n")
+            elif verb == b"DATA":
+                self.wfile.write(b"354 go ahead\r\n")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                with self.server.lock:
+                    self.server.messages += 1
+                self.wfile.write(b"250 OK\r\n")
+            elif verb == b"QUIT":
+                self.wfile.write(b"221 bye\r\n")
+                return
+            else:
+                self.wfile.write(b"250 OK\r\n")
+
+
+@contextmanager
+def smtp_sink():
+    """Local SMTP server on a free port; yields the server (server.messages counts deliveries)."""
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPSink)
+    server.daemon_threads = True
+    server.lock, server.messages = threading.Lock(), 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextmanager
+def stage(timings, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round(time.perf_counter() - start, 6)
+
+
+def clean_like_send_emails(df, columns):
+    """STEP 1-2 cleaning from send_emails.py."""
+    for col in ['Name', 'USN', 'Email']:
+        df[col] = df[col].astype(str).str.strip()
+    df = df.replace(r'^\s*$', 0, regex=True).replace(np.nan, 0)
+    for col in columns + ['Total-Test']:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    return df
+
+
+RAG_QUESTIONS = [
+    "what is the average total",
+    "top 5 students",
+    "how many students scored above 50% in T3b",
+    "score of 1RV22AA042",
+    'SELECT "Name", "total" FROM mytable ORDER BY "total" DESC LIMIT 10',
+    "SELECT topic, avg_percent FROM topic_performance ORDER BY avg_percent",
+]
+
+
+def run_pipeline(rows, tmp, args):
+    """Time every stage for one roster size; returns {stage: seconds}."""
+    import rag
+
+    timings = {}
+    columns = synthetic_columns(args.columns)
+    max_marks, materials = synthetic_layout(columns)
+    path = os.path.join(tmp, "scores.xlsx")
+    synthetic_scores(rows, columns=columns, noise=args.noise, clean=False).to_excel(path, index=False)
+    scores_loader.CACHE_DIR = os.path.join(tmp, "cache")
+
+    with stage(timings, "load.read_excel"):
+        raw = pd.read_excel(path)
+    # A warm load only means something if the cold one managed to write the
+    # cache, so each load stage records what the loader actually did.
+    cache = {}
+    for name in ("load.cache_cold", "load.cache_warm"):
+        with stage(timings, name):
+            _, cache[name] = scores_loader._load(path, use_cache=True)
+
+    with stage(timings, "clean"):
+        df = clean_like_send_emails(raw.copy(), columns)
+    with stage(timings, "bucket"):
+        student_materials = assign_materials(df, columns, max_marks, materials).fillna('')
+    with stage(timings, "dashboard.prepare"):
+        prepare_dashboard_data(raw.copy(), (columns, {}, max_marks))
+
+    db_path = os.path.join(tmp, "bench.db")
+    conn = sqlite3.connect(db_path)
+    # sync_workbook reads through scores_loader: start it without the feather
+    # cache the load stages left behind.
+    shutil.rmtree(scores_loader.CACHE_DIR, ignore_errors=True)
+    with stage(timings, "ingest.cold"):
+        sync_workbook(path, conn)
+    with stage(timings, "ingest.warm"):
+        sync_workbook(path, conn)
+    conn.close()
+
+    # rag.py in-process against the same database, with the stub LLM.
+    rag.EXCEL_PATH, rag.DB_PATH = path, db_path
+    with stage(timings, "rag.init"):
+        rag.init("stub")
+    for label in ("cold", "warm"):
+        with stage(timings, f"rag.queries_{label}"):
+            for question in RAG_QUESTIONS:
+                rag.run_query(question)
+    rag.connection.close()
+
+    emails = student_materials.reset_index().merge(df[['USN', 'Email']], on='USN', how='left')
+    with stage(timings, "email.render"):
+        bodies = [(email, body) for _, email, body in iter_email_bodies(emails, list(columns))]
+    to_send = bodies[:args.send_limit]
+    with smtp_sink() as sink:
+        mailer = BulkMailer("127.0.0.1", sink.server_address[1], "bench@example.edu",
+                            starttls=False, workers=args.smtp_workers)
+        with stage(timings, "email.send"):
+            results = mailer.send_all((email, build_message(email, body, "bench@example.edu"))
+                                      for email, body in to_send)
+    failed = sum(r.status != "sent" for r in results)
+    if failed or sink.messages != len(to_send):
+        raise RuntimeError(f"SMTP sink received {sink.messages} of {len(to_send)} messages ({failed} failed)")
+
+    paper = os.path.join(tmp, "paper.docx")
+    questions = min(rows, args.paper_limit)
+    synthetic_paper(paper, questions)
+    with stage(timings, "ocr.parse_docx"):
+        parsed = sum(1 for _ in iter_questions(paper))
+    if parsed != questions:
+        raise RuntimeError(f"parsed {parsed} of {questions} questions")
+    return timings, cache, {"emails_sent": len(to_send), "paper_questions": questions}
+
+
+def _environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+            "platform": platform.platform(), "cpus": os.cpu_count(), "commit": commit}
+
+
+def bench_pipeline(args):
+    report = {
+        "benchmark": "pipeline",
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": _environment(),
+        "parameters": {"columns": args.columns, "noise": args.noise, "send_limit": args.send_limit,
+                       "paper_limit": args.paper_limit, "smtp_workers": args.smtp_workers},
+        "results": [],
+    }
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            timings, cache, counts = run_pipeline(rows, tmp, args)
+        report["results"].append({"rows": rows, **counts, "stages": timings, "cache": cache})
+        print(f"--- {rows} rows", file=sys.stderr)
+        for name, seconds in timings.items():
+            outcome = f"  (cache {cache[name]})" if name in cache else ""
+            print(f"  {name:<20} {seconds:>10.4f}s{outcome}", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare_reports(args.compare, report)
+    return report
+
+
+def compare_reports(baseline_path, report):
+    """Print each stage's time relative to an earlier pipeline JSON (>1.00x is slower)."""
+    with open(baseline_path) as f:
+        baseline = {r["rows"]: r for r in json.load(f)["results"]}
+    print(f"{'rows':>8} {'stage':<20} {'baseline (s)':>13} {'now (s)':>10} {'ratio':>7}")
+    for result in report["results"]:
+        old_result = baseline.get(result["rows"], {})
+        old, old_cache = old_result.get("stages", {}), old_result.get("cache", {})
+        cache = result.get("cache", {})
+        for name, seconds in result["stages"].items():
+            if name in old:
+                ratio = seconds / old[name] if old[name] else float("inf")
+                flag = "  <-- slower" if ratio > 1.25 else ""
+                if name in cache and old_cache.get(name, cache[name]) != cache[name]:
+                    # Not comparable: e.g. a cache hit then, a skipped cache now.
+                    flag += f"  (cache {old_cache[name]} -> {cache[name]})"
+                print(f"{result['rows']:>8} {name:<20} {old[name]:>13.4f} {seconds:>10.4f} {ratio:>6.2f}x{flag}")
+
+
+BENCHMARKS = {
+    "bucketing": bench_bucketing,
+    "loader": bench_loader,
+    "pipeline": bench_pipeline,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Python data paths.")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--legacy-limit", type=int, default=100_000,
+                        help="skip the old implementation above this many rows")
+    parser.add_argument("--columns", type=int, default=len(TEST_COLUMNS),
+                        help="pipeline: number of T-columns in the synthetic workbook")
+    parser.add_argument("--noise", type=float, default=0.2,
+                        help="pipeline: fraction of blank (NaN or whitespace) score cells")
+    parser.add_argument("--send-limit", type=int, default=10_000,
+                        help="pipeline: send at most this many emails to the SMTP sink")
+    parser.add_argument("--smtp-workers", type=int, default=4)
+    parser.add_argument("--paper-limit", type=int, default=10_000,
+                        help="pipeline: questions in the generated paper (capped at the row count)")
+    parser.add_argument("--output", help="pipeline: write results to this JSON file")
+    parser.add_argument("--compare", help="pipeline: earlier JSON results to compare against")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
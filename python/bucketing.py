@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# /python/bucketing.py
+#
+# Vectorized performance bucketing and study-material lookup.
+#
+# Replaces the row-wise melt -> apply(categorize_performance) ->
+# apply(get_material) -> pivot_table path in send_emails.py: score/max ratios are
+# bucketed with np.digitize over the whole (students x questions) matrix, and
+# materials are picked from a precomputed (question x bucket) array by fancy
+# indexing, giving the student-wise material table directly.
+
+import numpy as np
+import pandas as pd
+
+from metrics import span
+
+PERFORMANCE_LABELS = ['0-25%', '25-50%', '50-75%', '75-100%']
+
+# Lower edges of every bucket but the first: <0.25, <0.50, <0.75, else.
+BUCKET_EDGES = np.array([0.25, 0.50, 0.75])
+
+
+def performance_codes(scores, max_marks):
+    """
+    Bucket index (0..3 into PERFORMANCE_LABELS) for each score.
+    `scores` is (students x questions), `max_marks` has one entry per question;
+    a max of 0 puts the score in the lowest bucket.
+    """
+    scores = np.asarray(scores, dtype=float)
+    max_marks = np.asarray(max_marks, dtype=float)
+    ratios = np.divide(scores, max_marks, out=np.zeros_like(scores), where=max_marks != 0)
+    return np.digitize(ratios, BUCKET_EDGES)
+
+
+def material_table(materials, questions):
+    """(question x bucket) object array of material links."""
+    return np.array([[materials[q][label] for label in PERFORMANCE_LABELS] for q in questions],
+                    dtype=object)
+
+
+def assign_materials(df, questions, max_marks, materials, index_cols=('Name', 'USN')):
+    """
+    Return one row per student (indexed by `index_cols`) with the study material
+    for each question, the same table the old pivot_table produced.
+    """
+    with span("bucketing", rows=len(df), questions=len(questions)):
+        scores = df[questions].to_numpy(dtype=float)
+        codes = performance_codes(scores, [max_marks[q] for q in questions])
+        picked = material_table(materials, questions)[np.arange(len(questions)), codes]
+
+        index = pd.MultiIndex.from_frame(df[list(index_cols)])
+        result = pd.DataFrame(picked, index=index, columns=questions)
+        # pivot_table(aggfunc='first') kept the first row per student, sorted by key.
+        result = result[~result.index.duplicated(keep='first')].sort_index()
+        return result.reindex(columns=sorted(questions))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# /python/campaign.py
+#
+# Durable per-recipient journal for email campaigns.
+#
+# Every delivery attempt is recorded in SQLite under (USN, content hash), where
+# the hash covers the recipient address and the exact body. A campaign that is
+# interrupted can simply be run again: messages already delivered are skipped,
+# failed ones are retried, and a student whose materials changed gets the new
+# email because its hash differs.
+
+import time
+import hashlib
+import sqlite3
+import threading
+
+
+def content_hash(recipient, body):
+    return hashlib.sha256(f"{recipient}\n{body}".encode("utf-8")).hexdigest()
+
+
+class CampaignJournal:
+    """SQLite journal of delivery outcomes, safe to write from mailer worker threads."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS deliveries ("
+                "usn TEXT NOT NULL, content_hash TEXT NOT NULL, recipient TEXT NOT NULL, "
+                "status TEXT NOT NULL, attempts INTEGER NOT NULL, error TEXT, updated_at REAL NOT NULL, "
+                "PRIMARY KEY (usn, content_hash))"
+            )
+
+    def delivered(self):
+        """Set of (usn, content_hash) pairs that were sent successfully."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT usn, content_hash FROM deliveries WHERE status = 'sent'").fetchall()
+        return set(rows)
+
+    def record(self, usn, digest, result):
+        """Store a mailer DeliveryResult; committed immediately so a crash loses nothing."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO deliveries (usn, content_hash, recipient, status, attempts, error, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(usn, content_hash) DO UPDATE SET recipient = excluded.recipient, "
+                "status = excluded.status, attempts = deliveries.attempts + excluded.attempts, "
+                "error = excluded.error, updated_at = excluded.updated_at",
+                (usn, digest, result.recipient, result.status, result.attempts,
+                 result.error, time.time()),
+            )
+
+    def summary(self):
+        with self._lock:
+            return dict(self.conn.execute(
+                "SELECT status, COUNT(*) FROM deliveries GROUP BY status").fetchall())
+
+    def close(self):
+        self.conn.close()
+
+
+def send_campaign(journal, emails, mailer, build_message, on_result=None):
+    """
+    Send (usn, recipient, body) triples through `mailer` (a BulkMailer),
+    skipping those already delivered with the same content and journaling
+    every outcome. build_message(recipient, body) makes the message.
+    Returns (results, number skipped).
+    """
+    delivered = journal.delivered()
+    skipped = 0
+
+    def pending_messages():
+        # Rendering, the journal check and sending are pipelined: each message
+        # is built only when a mailer worker is ready for it.
+        nonlocal skipped
+        for usn, recipient, body in emails:
+            digest = content_hash(recipient, body)
+            if (usn, digest) in delivered:
+                skipped += 1
+                continue
+            yield recipient, build_message(recipient, body), (usn, digest)
+
+    def record(result):
+        usn, digest = result.tag
+        journal.record(usn, digest, result)
+        if on_result is not None:
+            on_result(result)
+
+    results = mailer.send_all(pending_messages(), on_result=record)
+    return results, skipped
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# /python/chart_cache.py
+#
+# Pre-rendered chart images for dashboard.py.
+#
+# Figures that only depend on the workbook are rendered once per data version
+# into PNG or SVG bytes and written to an on-disk cache, so a Streamlit rerun,
+# or a restarted server, serves the stored image instead of redrawing it with
+# matplotlib. Figures are built with matplotlib.figure.Figure rather than
+# pyplot, so rendering does not touch pyplot's global state and is safe from
+# Streamlit's script threads.
+
+import io
+import os
+import hashlib
+
+from matplotlib.figure import Figure
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get("DASHBOARD_CHART_CACHE_DIR", os.path.join(base_dir, '.chart_cache'))
+FORMATS = ("png", "svg")
+
+# Bump when a renderer changes so stale images on disk are not served.
+RENDER_VERSION = 1
+
+# Same output st.pyplot() produces.
+SAVEFIG_OPTIONS = {"bbox_inches": "tight", "dpi": 200}
+
+
+def new_figure(figsize):
+    fig = Figure(figsize=figsize)
+    return fig, fig.subplots()
+
+
+def figure_bytes(fig, fmt="png"):
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, **SAVEFIG_OPTIONS)
+    return buf.getvalue()
+
+
+def chart_path(name, version, fmt):
+    key = hashlib.sha1(f"{name}:{version}:{RENDER_VERSION}".encode("utf-8")).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{name}.{key}.{fmt}")
+
+
+def cached_chart(name, version, render, fmt="png"):
+    """
+    Return the image bytes for chart `name` at data `version`, calling
+    render() -> Figure only when no image is stored yet.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported chart format: {fmt}")
+    path = chart_path(name, version, fmt)
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        pass
+
+    image = figure_bytes(render(), fmt)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "wb") as f:
+            f.write(image)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # A read-only cache only costs a redraw next time.
+    return image
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# /python/chat_sessions.py
+#
+# Bounded pool of per-user chat sessions for rag.py.
+#
+# Each session id maps to its own chat object, so concurrent users never share
+# history. Sessions idle for longer than `idle_ttl` are evicted, the pool never
+# holds more than `max_sessions` (least recently used goes first), and before
+# every message the oldest turns are dropped until the history fits in
+# `history_token_budget` (estimated at ~4 characters per token).
+
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+CHARS_PER_TOKEN = 4
+
+
+def _part_chars(part):
+    text = getattr(part, "text", "") or ""
+    size = len(text)
+    for attr in ("function_call", "function_response"):
+        value = getattr(part, attr, None)
+        if value:
+            size += len(str(value))
+    return size
+
+
+def estimate_tokens(content):
+    """Rough token count of one history entry (a Content with role and parts)."""
+    return sum(_part_chars(p) for p in content.parts) // CHARS_PER_TOKEN + 1
+
+
+def is_turn_start(content):
+    # A turn starts with a user message carrying text, not a function response.
+    return content.role == "user" and any(getattr(p, "text", "") for p in content.parts)
+
+
+def trim_history(history, budget):
+    """Drop whole turns from the front of `history` until it fits in `budget` tokens."""
+    sizes = [estimate_tokens(c) for c in history]
+    remaining = sum(sizes)
+    if remaining <= budget:
+        return history
+    dropped_to = 0
+    for start, content in enumerate(history):
+        if start and is_turn_start(content):
+            remaining -= sum(sizes[dropped_to:start])
+            dropped_to = start
+            if remaining <= budget:
+                return history[start:]
+    return []
+
+
+class _Session:
+    def __init__(self, chat):
+        self.chat = chat
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+
+class ChatSessionManager:
+    """Hands out one chat per session id from a bounded, self-expiring pool."""
+
+    def __init__(self, start_chat, max_sessions=64, idle_ttl=900.0, history_token_budget=4000):
+        self.start_chat = start_chat
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.history_token_budget = history_token_budget
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+        self.trimmed = 0
+
+    def _evict_idle(self, now):
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.idle_ttl:
+                break
+            del self._sessions[session_id]
+            self.evicted += 1
+
+    def _get(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = _Session(self.start_chat())
+                self._sessions[session_id] = session
+                self.created += 1
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evicted += 1
+            self._sessions.move_to_end(session_id)
+            session.last_used = now
+            return session
+
+    def stream(self, session_id, message, turn):
+        """
+        Yield whatever the generator `turn(chat, message)` yields, holding the
+        session for the whole turn. With session_id None the call is stateless:
+        a throwaway chat with no history is used.
+        """
+        with self._chat(session_id) as chat:
+            yield from turn(chat, message)
+
+    @contextmanager
+    def _chat(self, session_id):
+        if session_id is None:
+            yield self.start_chat()
+            return
+
+        session = self._get(session_id)
+        # One message at a time per session; different sessions run in parallel.
+        with session.lock:
+            history = list(session.chat.history)
+            trimmed = trim_history(history, self.history_token_budget)
+            if len(trimmed) != len(history):
+                session.chat.history = trimmed
+                with self._lock:
+                    self.trimmed += 1
+            try:
+                yield session.chat
+            finally:
+                session.last_used = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "active": len(self._sessions),
+                "created": self.created,
+                "evicted": self.evicted,
+                "trimmed": self.trimmed,
+            }
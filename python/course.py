@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# /python/course.py
+#
+# Course layout shared by the Python scripts: the per-question score columns of
+# scores.xlsx, the topic each one tests and its maximum marks.
+
+# Question columns, in sheet order. 'Total-Test' (renamed 'total' in SQLite)
+# holds the sum.
+TEST_COLUMNS = ['T1a', 'T1b', 'T2', 'T3a', 'T3b', 'T4a', 'T4b', 'T5a', 'T5b']
+
+# Define a mapping for topics for each assessment column.
+TOPIC_MAPPING = {
+    'T1a': 'Regular Expression',
+    'T1b': 'Epsilon NFA',
+    'T2': 'Epsilon NFA and DFA equivalence',
+    'T3a': 'Regular Expressions',
+    'T3b': 'DFA Minimization',
+    'T4a': 'Combining DFAs',
+    'T4b': 'Decision Algorithms',
+    'T5a': 'Pumping Lemma',
+    'T5b': 'Epsilon DFA construction'
+}
+
+# Define maximum marks per question.
+MAX_MARKS = {
+    'T1a': 6,
+    'T1b': 4,
+    'T2': 10,
+    'T3a': 4,
+    'T3b': 6,
+    'T4a': 6,
+    'T4b': 4,
+    'T5a': 6,
+    'T5b': 4
+}
+
+# Study material links per question, by performance bucket (score / max marks).
+MATERIALS = {
+    'T1a': {
+        '0-25%':   "https://drive.google.com/file/d/1JmykSea-aeI1acrtXN4Zuw86BNccachg/view?usp=drive_link",
+        '25-50%':  "https://drive.google.com/file/d/1Hpqz52LTxUIS5_oQi0j4OOYeeVM7w9Tt/view?usp=drive_link",
+        '50-75%':  "https://drive.google.com/file/d/1vJNn4RYOcoA0G2YwnouIxVV89NSXdG9Y/view?usp=drive_link",
+        '75-100%': "https://drive.google.com/file/d/1tu4jljojm4nH2BKYDg_ePST8rJ7Qjn8P/view?usp=drive_link"
+    },
+    'T1b': {
+        '0-25%':   "https://drive.google.com/file/d/1PB6AfcStIP1EVCfOoZcpiUCJugrmZHQD/view?usp=drive_link",
+        '25-50%':  "https://drive.google.com/file/d/19ZxklXB-MltUtA-Y6F52vTRD1rfp1_eB/view?usp=drive_link",
+        '50-75%':  "https://drive.google.com/file/d/1WYq-stjp5dU3Z1rNigI-BBj0yKrZ2gXj/view?usp=drive_link",
+        '75-100%': "https://drive.google.com/file/d/1tu4jljojm4nH2BKYDg_ePST8rJ7Qjn8P/view?usp=drive_link"
+    },
+    'T2': {
+        '0-25%':   "https://drive.google.com/file/d/1tu4jljojm4nH2BKYDg_ePST8rJ7Qjn8P/view?usp=drive_link",
+        '25-50%':  "https://drive.google.com/file/d/19ZxklXB-MltUtA-Y6F52vTRD1rfp1_eB/view?usp=drive_link",
+        '50-75%':  "https://drive.google.com/file/d/1Hpqz52LTxUIS5_oQi0j4OOYeeVM7w9Tt/view?usp=drive_link",
+        '75-100%': "https://drive.google.com/file/d/1Hpqz52LTxUIS5_oQi0j4OOYeeVM7w9Tt/view?usp=drive_link"
+    },
+    'T3a': {
+        '0-25%':   "https://drive.google.com/file/d/1PB6AfcStIP1EVCfOoZcpiUCJugrmZHQD/view?usp=drive_link",
+        '25-50%':  "https://drive.google.com/file/d/1Hpqz52LTxUIS5_oQi0j4OOYeeVM7w9Tt/view?usp=drive_link",
+        '50-75%':  "https://drive.google.com/file/d/1PB6AfcStIP1EVCfOoZcpiUCJugrmZHQD/view?usp=drive_link",
+        '75-100%': "https://drive.google.com/file/d/1Hpqz52LTxUIS5_oQi0j4OOYeeVM7w9Tt/view?usp=drive_link"
+    },
+    'T3b': {
+        '0-25%':   "https://drive.google.com/file/d/19ZxklXB-MltUtA-Y6F52vTRD1rfp1_eB/view?usp=drive_link",
+        '25-50%':  "https://drive.google.com/file/d/19ZxklXB-MltUtA-Y6F52vTRD1rfp1_eB/view?usp=drive_link",
+        '50-75%':  "https://drive.google.com/file/d/1tu4jljojm4nH2BKYDg_ePST8rJ7Qjn8P/view?usp=drive_link",
+        '75-100%': "https://drive.google.com/file/d/1tu4jljojm4nH2BKYDg_ePST8rJ7Qjn8P/view?usp=drive_link"
+    },
+    'T4a': {
+        '0-25%':   "https://drive.google.com/file/d/1PB6AfcStIP1EVCfOoZcpiUCJugrmZHQD/view?usp=drive_link",
+        '25-50%':  "https://drive.google.com/file/d/19ZxklXB-MltUtA-Y6F52vTRD1rfp1_eB/view?usp=drive_link",
+        '50-75%':  "https://drive.google.com/file/d/1WYq-stjp5dU3Z1rNigI-BBj0yKrZ2gXj/view?usp=drive_link",
+        '75-100%': "https://drive.google.com/file/d/1tu4jljojm4nH2BKYDg_ePST8rJ7Qjn8P/view?usp=drive_link"
+    },
+    'T4b': {
+        '0-25%':   "https://drive.google.com/file/d/1tu4jljojm4nH2BKYDg_ePST8rJ7Qjn8P/view?usp=drive_link",
+        '25-50%':  "https://drive.google.com/file/d/19ZxklXB-MltUtA-Y6F52vTRD1rfp1_eB/view?usp=drive_link",
+        '50-75%':  "https://drive.google.com/file/d/1Hpqz52LTxUIS5_oQi0j4OOYeeVM7w9Tt/view?usp=drive_link",
+        '75-100%': "https://drive.google.com/file/d/1Hpqz52LTxUIS5_oQi0j4OOYeeVM7w9Tt/view?usp=drive_link"
+    },
+    'T5a': {
+        '0-25%':   "https://drive.google.com/file/d/1PB6AfcStIP1EVCfOoZcpiUCJugrmZHQD/view?usp=drive_link",
+        '25-50%':  "https://drive.google.com/file/d/19ZxklXB-MltUtA-Y6F52vTRD1rfp1_eB/view?usp=drive_link",
+        '50-75%':  "https://drive.google.com/file/d/1WYq-stjp5dU3Z1rNigI-BBj0yKrZ2gXj/view?usp=drive_link",
+        '75-100%': "https://drive.google.com/file/d/1tu4jljojm4nH2BKYDg_ePST8rJ7Qjn8P/view?usp=drive_link"
+    },
+    'T5b': {
+        '0-25%':   "https://drive.google.com/file/d/1tu4jljojm4nH2BKYDg_ePST8rJ7Qjn8P/view?usp=drive_link",
+        '25-50%':  "https://drive.google.com/file/d/19ZxklXB-MltUtA-Y6F52vTRD1rfp1_eB/view?usp=drive_link",
+        '50-75%':  "https://drive.google.com/file/d/1Hpqz52LTxUIS5_oQi0j4OOYeeVM7w9Tt/view?usp=drive_link",
+        '75-100%': "https://drive.google.com/file/d/1Hpqz52LTxUIS5_oQi0j4OOYeeVM7w9Tt/view?usp=drive_link"
+    }
+}
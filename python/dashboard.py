@@ -1,32 +1,160 @@
-import pandas as pd
+import os
 import matplotlib.pyplot as plt
 import seaborn as sns
 import streamlit as st
 import plotly.express as px
-import re
+
+from chart_cache import cached_chart, new_figure
+from dashboard_data import prepare_dashboard_data
+from fingerprint import file_fingerprint
+from intents import match_intent
+from roster_index import find_usns
+from scores_loader import load_scores
+from table_view import PAGE_SIZES, page_of, sort_order
 
 # Load data
 file_path = "scores.xlsx"  # Update this if running locally
+chart_format = os.environ.get("DASHBOARD_CHART_FORMAT", "png")  # png or svg
+max_select_options = int(os.environ.get("DASHBOARD_MAX_SELECT_OPTIONS", "500"))
+
+
+def file_stat_key(path):
+    """Cheap change detector for the workbook: (mtime in ns, size)."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Streamlit reruns this whole script on every widget interaction. Everything
+# that does not depend on the sidebar is computed here once per version of the
+# workbook and served from the cache until the file changes. cache_resource
+# hands every rerun the same objects instead of unpickling a copy of the frame,
+# roster index and aggregates, so nothing below may modify them in place.
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_dashboard_data(path, stat_key):
+    # Read the first sheet (served from the columnar cache when unchanged)
+    df = load_scores(path)
+    data = prepare_dashboard_data(df)
+    # Content hash: keys the chart images on disk, which outlive this process.
+    data["version"] = file_fingerprint(path)
+    return data
+
+
+data = load_dashboard_data(file_path, file_stat_key(file_path))
+df = data["df"]
+roster = data["roster"]
+test_cols = data["test_cols"]
+
+
+# Static charts: drawn with matplotlib only when no image exists for this
+# version of the data, then served as PNG/SVG bytes.
+def render_score_histogram(data):
+    fig, ax = new_figure((10, 6))
+    sns.histplot(data["df"]['Total-Test'], bins=15, kde=True, color='skyblue', ax=ax)
+    ax.set_title('Distribution of Total Test Scores')
+    ax.set_xlabel('Total Test Score')
+    ax.set_ylabel('Number of Students')
+    return fig
+
+
+def render_section_boxplot(data):
+    fig, ax = new_figure((12, 6))
+    sns.boxplot(x='Test Section', y='Score', data=data["df_melted"], palette='Set2', ax=ax)
+    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+    ax.set_title('Score Distribution Across Test Sections')
+    ax.set_xlabel('Test Section')
+    ax.set_ylabel('Score')
+    return fig
+
+
+def render_correlation_heatmap(data):
+    fig, ax = new_figure((10, 8))
+    sns.heatmap(
+        data["corr_matrix"],
+        annot=True,
+        cmap='coolwarm',
+        vmin=-1,
+        vmax=1,
+        fmt=".2f",
+        linewidths=0.5,
+        ax=ax
+    )
+    ax.set_title('Correlation Between Test Sections')
+    return fig
+
+
+def render_top_students_heatmap(data):
+    fig, ax = new_figure((15, 10))
+    sns.heatmap(
+        data["top_students"].set_index('Name')[data["test_cols"]],
+        annot=True,
+        cmap='YlGnBu',
+        fmt=".1f",
+        linewidths=0.5,
+        ax=ax
+    )
+    ax.set_title('Test Section Scores for Top 20 Students')
+    ax.set_xlabel('Test Section')
+    ax.set_ylabel('Student Name')
+    return fig
+
+
+STATIC_CHARTS = {
+    "score_histogram": render_score_histogram,
+    "section_boxplot": render_section_boxplot,
+    "correlation_heatmap": render_correlation_heatmap,
+    "top_students_heatmap": render_top_students_heatmap,
+}
+
 
-# Read Excel file
-df = pd.read_excel(file_path, sheet_name=None, engine="openpyxl")
-sheet_name = list(df.keys())[0]  # Automatically pick the first sheet
-df = df[sheet_name]
+# In-memory layer over the disk cache; `_data` is not hashed, `version` stands for it.
+@st.cache_data(show_spinner=False, max_entries=32)
+def static_chart(name, version, fmt, _data):
+    return cached_chart(name, version, lambda: STATIC_CHARTS[name](_data), fmt)
 
-# Ensure correct column names (trim spaces and check case sensitivity)
-df.columns = df.columns.str.strip()
 
-# Check if expected columns exist
-expected_columns = ["Name", "USN", "Total-Test"]
-test_cols = [col for col in df.columns if col.startswith("T")]  # Extract all test columns
+def show_static_chart(name):
+    image = static_chart(name, data["version"], chart_format, data)
+    st.image(image.decode("utf-8") if chart_format == "svg" else image, use_container_width=True)
 
-for col in expected_columns:
-    if col not in df.columns:
-        raise KeyError(f"Missing expected column: {col}")
 
-# Clean data: Replace empty strings/NaN with 0 in test columns
-df[test_cols] = df[test_cols].replace(r'^\s*$', 0, regex=True).fillna(0).astype(float)
-df['Total-Test'] = df['Total-Test'].replace(r'^\s*$', 0, regex=True).fillna(0).astype(float)
+# Table order for each sort column/direction, computed once per data version.
+@st.cache_data(show_spinner=False, max_entries=32)
+def table_order(version, column, ascending, _df):
+    return sort_order(_df, column, ascending)
+
+
+# Plotly figures: the question chart depends only on the data, the score
+# chart only on the rows left after filtering.
+def style_bar_chart(chart, **layout):
+    chart.update_layout(
+        title_font_size=24,
+        title_font_family="Roboto, sans-serif",
+        title_font_color="#4C72B0",
+        xaxis_title_font_size=16,
+        yaxis_title_font_size=16,
+        plot_bgcolor="#121212",  # Dark background for the plot
+        paper_bgcolor="#121212",  # Dark background for the plot
+        font=dict(color="#FFFFFF"),  # White text for contrast
+        **layout
+    )
+    return chart
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def question_score_chart(version, _question_scores):
+    chart = px.bar(_question_scores, x="Question", y="Average Score", title="Average Score per Question", labels={"Average Score": "Score", "Question": "Test Question"})
+    return style_bar_chart(chart)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def total_score_chart(version, score_range, selected_student, _filtered_df):
+    chart = px.bar(_filtered_df, x="Name", y="Total-Test", title="Student Test Scores", labels={"Total-Test": "Score", "Name": "Student"})
+    return style_bar_chart(
+        chart,
+        xaxis_tickangle=-45,
+        showlegend=False  # Hide the legend if it's not required
+    )
+
 
 # Streamlit Styling
 st.set_page_config(page_title="Student Score Dashboard", layout="wide", initial_sidebar_state="expanded")
@@ -122,49 +250,54 @@ score_range = st.sidebar.slider("Total Score Range", int(df["Total-Test"].min())
 # Filter the dataframe based on score range
 filtered_df = df[(df["Total-Test"] >= score_range[0]) & (df["Total-Test"] <= score_range[1])]
 
-# Dynamically update the student list in the dropdown based on the filtered data
-selected_student = st.sidebar.selectbox("Select Student", ["All"] + filtered_df["Name"].tolist(), index=0)
+
+def in_score_range(names):
+    """Names with at least one row inside the selected score range."""
+    totals = df["Total-Test"].to_numpy()
+    return [n for n in names
+            if any(score_range[0] <= totals[pos] <= score_range[1] for pos in roster.name_positions([n]))]
+
+
+# Dynamically update the student list in the dropdown based on the filtered data;
+# a search narrows it through the name index instead of listing the whole roster.
+name_query = st.sidebar.text_input("Find Student", "")
+if name_query:
+    student_options = in_score_range(roster.search_names(name_query, limit=50))
+else:
+    # Past a few hundred names the dropdown is unusable anyway; ask for a search.
+    student_options = filtered_df["Name"].head(max_select_options).tolist()
+    if len(filtered_df) > max_select_options:
+        st.sidebar.caption(f"Showing the first {max_select_options} of {len(filtered_df)} students; use Find Student to narrow the list.")
+selected_student = st.sidebar.selectbox("Select Student", ["All"] + student_options, index=0)
 
 # Apply additional filter based on selected student (if not "All")
 if selected_student != "All":
-    filtered_df = filtered_df[filtered_df["Name"] == selected_student]
+    filtered_df = filtered_df.loc[filtered_df.index.intersection(df.index[roster.name_positions([selected_student])])]
 
 # Chatbot functionality
 st.sidebar.header("Ask the Chatbot")
 user_query = st.sidebar.text_input("Ask me something:", "")
 
 def get_student_info(query):
-    # Normalize both the query and the dataframe for case and whitespace issues
-    query = query.strip().lower()
-
-    # Pattern to match "student score of <USN>"
-    score_match = re.search(r"student score of (\S+)", query)
-    # Pattern to match "student name of <USN>"
-    name_match = re.search(r"student name of (\S+)", query)
-
-    # If the query is asking for the score
-    if score_match:
-        usn = score_match.group(1).strip().lower()  # Convert USN to lowercase
-        student_data = df[df["USN"].str.strip().str.lower() == usn]
-        
-        if not student_data.empty:
-            score = student_data["Total-Test"].values[0]
-            return f"The score of student {usn.upper()} is {score}."
-        else:
-            return f"Student with USN {usn.upper()} not found."
-    
-    # If the query is asking for the name
-    elif name_match:
-        usn = name_match.group(1).strip().lower()  # Convert USN to lowercase
-        student_data = df[df["USN"].str.strip().str.lower() == usn]
-        
-        if not student_data.empty:
-            name = student_data["Name"].values[0]
-            return f"The name of student with USN {usn.upper()} is {name}."
+    # Same question patterns the RAG fast path recognizes.
+    matched = match_intent(query)
+    if matched is None or matched[0] not in ("student_score", "student_name"):
+        return "I didn't understand the question. Please ask again."
+
+    intent, params = matched
+    # "scores of 1RV22CS001, 1RV22CS002 and ..." is answered in one batch lookup.
+    usns = find_usns(query) or [params["usn"]]
+    replies = []
+    for usn, pos in roster.lookup_many(usns).items():
+        if pos is None:
+            replies.append(f"Student with USN {usn} not found.")
+        elif intent == "student_score":
+            # If the query is asking for the score
+            replies.append(f"The score of student {usn} is {df['Total-Test'].iat[pos]}.")
         else:
-            return f"Student with USN {usn.upper()} not found."
-    
-    return "I didn't understand the question. Please ask again."
+            # If the query is asking for the name
+            replies.append(f"The name of student with USN {usn} is {df['Name'].iat[pos]}.")
+    return "\n\n".join(replies)
 
 # Display chatbot response based on query
 if user_query:
@@ -175,91 +308,39 @@ if user_query:
 with st.container():
     st.markdown('<h2 style="color: white; font-size: 36px; font-weight: 700;">Student Scores</h2>', unsafe_allow_html=True)
     st.markdown('<div class="card">', unsafe_allow_html=True)
-    st.dataframe(filtered_df.style.set_properties(**{'text-align': 'center'}))
+    table_mode = st.radio("View", ["Pages", "Summary"], horizontal=True, label_visibility="collapsed")
+    if table_mode == "Summary":
+        st.dataframe(data["summary"], use_container_width=True)
+    else:
+        # Only the current page is styled and sent to the browser.
+        sort_col, sort_dir, size_col, page_col = st.columns(4)
+        sort_by = sort_col.selectbox("Sort by", list(df.columns), index=list(df.columns).index("Total-Test"))
+        descending = sort_dir.selectbox("Order", ["Descending", "Ascending"]) == "Descending"
+        page_size = size_col.selectbox("Rows per page", PAGE_SIZES)
+        order = table_order(data["version"], sort_by, not descending, df)
+        mask = df.index.isin(filtered_df.index)
+        pages = max(1, -(-int(mask.sum()) // page_size))
+        page = page_col.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+        page_df, matching, pages = page_of(df, order, mask, int(page), page_size)
+        st.dataframe(page_df.style.set_properties(**{'text-align': 'center'}))
+        st.caption(f"Page {int(page)} of {pages} · {matching} students")
     st.markdown('</div>', unsafe_allow_html=True)
 
 # Matplotlib Plot: Distribution of Total Test Scores
-plt.figure(figsize=(10, 6))
-sns.histplot(df['Total-Test'], bins=15, kde=True, color='skyblue')
-plt.title('Distribution of Total Test Scores')
-plt.xlabel('Total Test Score')
-plt.ylabel('Number of Students')
-st.pyplot(plt)
+show_static_chart("score_histogram")
 
 # Matplotlib Plot: Score Distribution per Test Section (Boxplot)
-df_melted = df.melt(
-    id_vars=['Name', 'USN'], 
-    value_vars=test_cols, 
-    var_name='Test Section', 
-    value_name='Score'
-)
-plt.figure(figsize=(12, 6))
-sns.boxplot(x='Test Section', y='Score', data=df_melted, palette='Set2')
-plt.xticks(rotation=45, ha='right')
-plt.title('Score Distribution Across Test Sections')
-plt.xlabel('Test Section')
-plt.ylabel('Score')
-st.pyplot(plt)
+show_static_chart("section_boxplot")
 
 # Plotly Chart: Total Test Scores Bar Chart (Interactive)
-total_score_chart = px.bar(filtered_df, x="Name", y="Total-Test", title="Student Test Scores", labels={"Total-Test": "Score", "Name": "Student"})
-total_score_chart.update_layout(
-    title_font_size=24,
-    title_font_family="Roboto, sans-serif",
-    title_font_color="#4C72B0",
-    xaxis_title_font_size=16,
-    yaxis_title_font_size=16,
-    xaxis_tickangle=-45,
-    plot_bgcolor="#121212",  # Dark background for the plot
-    paper_bgcolor="#121212",  # Dark background for the plot
-    font=dict(color="#FFFFFF"),  # White text for contrast
-    showlegend=False  # Hide the legend if it's not required
-)
-st.plotly_chart(total_score_chart, use_container_width=True)
+st.plotly_chart(total_score_chart(data["version"], score_range, selected_student, filtered_df), use_container_width=True)
 
 # Plotly Chart: Average Score per Question (Interactive)
-question_scores = df[test_cols].mean().reset_index()
-question_scores.columns = ["Question", "Average Score"]
-question_chart = px.bar(question_scores, x="Question", y="Average Score", title="Average Score per Question", labels={"Average Score": "Score", "Question": "Test Question"})
-question_chart.update_layout(
-    title_font_size=24,
-    title_font_family="Roboto, sans-serif",
-    title_font_color="#4C72B0",
-    xaxis_title_font_size=16,
-    yaxis_title_font_size=16,
-    plot_bgcolor="#121212",  # Dark background for the plot
-    paper_bgcolor="#121212",  # Dark background for the plot
-    font=dict(color="#FFFFFF")  # White text for contrast
-)
-st.plotly_chart(question_chart, use_container_width=True)
+st.plotly_chart(question_score_chart(data["version"], data["question_scores"]), use_container_width=True)
 
 # Additional Visualizations (Matplotlib Heatmaps)
 # Correlation Heatmap Between Test Sections
-plt.figure(figsize=(10, 8))
-corr_matrix = df[test_cols].corr()
-sns.heatmap(
-    corr_matrix, 
-    annot=True, 
-    cmap='coolwarm', 
-    vmin=-1, 
-    vmax=1, 
-    fmt=".2f", 
-    linewidths=0.5
-)
-plt.title('Correlation Between Test Sections')
-st.pyplot(plt)
+show_static_chart("correlation_heatmap")
 
 # Top 20 Students Performance Heatmap
-top_students = df.sort_values('Total-Test', ascending=False).head(20)
-plt.figure(figsize=(15, 10))
-sns.heatmap(
-    top_students.set_index('Name')[test_cols], 
-    annot=True, 
-    cmap='YlGnBu', 
-    fmt=".1f", 
-    linewidths=0.5
-)
-plt.title('Test Section Scores for Top 20 Students')
-plt.xlabel('Test Section')
-plt.ylabel('Student Name')
-st.pyplot(plt)
+show_static_chart("top_students_heatmap")
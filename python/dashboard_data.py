@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# /python/dashboard_data.py
+#
+# Data preparation behind dashboard.py: cleaning the scores sheet and the
+# aggregates its charts and tables use. Kept free of Streamlit so the
+# benchmarks can time it on synthetic rosters.
+
+from analytics import course_layout
+from roster_index import StudentIndex
+from table_view import summary_table
+
+
+def prepare_dashboard_data(df, layout=None):
+    """
+    Clean `df` in place and return it with every precomputed aggregate.
+    `layout` is analytics.course_layout()'s (columns, topics, max marks).
+    """
+    max_marks = (layout or course_layout())[2]
+    # Ensure correct column names (trim spaces and check case sensitivity)
+    df.columns = df.columns.str.strip()
+
+    # Check if expected columns exist
+    expected_columns = ["Name", "USN", "Total-Test"]
+    test_cols = [col for col in df.columns if col.startswith("T")]  # Extract all test columns
+
+    for col in expected_columns:
+        if col not in df.columns:
+            raise KeyError(f"Missing expected column: {col}")
+
+    # Clean data: Replace empty strings/NaN with 0 in test columns
+    df[test_cols] = df[test_cols].replace(r'^\s*$', 0, regex=True).fillna(0).astype(float)
+    df['Total-Test'] = df['Total-Test'].replace(r'^\s*$', 0, regex=True).fillna(0).astype(float)
+
+    # Precomputed aggregates used by the unfiltered charts.
+    df_melted = df.melt(
+        id_vars=['Name', 'USN'],
+        value_vars=test_cols,
+        var_name='Test Section',
+        value_name='Score'
+    )
+    question_scores = df[test_cols].mean().reset_index()
+    question_scores.columns = ["Question", "Average Score"]
+
+    return {
+        "df": df,
+        "roster": StudentIndex(df),
+        "test_cols": test_cols,
+        "df_melted": df_melted,
+        "question_scores": question_scores,
+        "corr_matrix": df[test_cols].corr(),
+        "top_students": df.sort_values('Total-Test', ascending=False).head(20),
+        "summary": summary_table(df, test_cols, {**max_marks, "Total-Test": sum(max_marks.values())}),
+    }
+
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# /python/email_render.py
+#
+# Lazy email rendering for send_emails.py.
+#
+# Rows are read with itertuples() as plain (name, usn, email, materials...)
+# tuples and bodies are filled into a template prepared once at import, so no
+# per-student Series is built and nothing is held beyond the message being
+# produced. Everything here is a generator: the mailer can start delivering
+# the first emails while later ones are still being rendered.
+
+from email.mime.text import MIMEText
+
+SUBJECT = "Study Materials for Your Test Performance 📚"
+
+_HEADER = (
+    f"Subject: {SUBJECT}\n\n"
+    "Dear {name},\n\n"
+    "Based on your test performance, here are study materials to help you improve:\n\n"
+)
+_LINE = "- {}: {}\n"
+_FOOTER = (
+    "\nPlease review these materials to strengthen your understanding.\n\n"
+    "Best regards,\n[Teacher Name]\n[Institution Name]\n"
+)
+
+KEY_COLUMNS = ['Name', 'USN', 'Email']
+
+
+def material_columns(df):
+    """Study material columns, in sheet order."""
+    return [c for c in df.columns if c not in KEY_COLUMNS]
+
+
+def render_body(name, topics, materials):
+    parts = [_HEADER.format(name=name)]
+    parts.extend(_LINE.format(topic, material)
+                 for topic, material in zip(topics, materials)
+                 if isinstance(material, str) and material)  # Skip empty entries.
+    parts.append(_FOOTER)
+    return "".join(parts)
+
+
+def _valid_email(email):
+    return isinstance(email, str) and email not in ("", "0", "nan")
+
+
+def iter_email_bodies(df, topics=None):
+    """Yield (usn, email, body) for each student with a usable email address."""
+    topics = topics or material_columns(df)
+    rows = df[KEY_COLUMNS + topics].itertuples(index=False, name=None)
+    for name, usn, email, *materials in rows:
+        if not _valid_email(email):
+            print(f"Skipping student {name} due to missing email.")
+            continue
+        yield usn, email, render_body(name, topics, materials)
+
+
+def build_message(to_email, email_body, sender):
+    msg = MIMEText(email_body)
+    msg["Subject"] = SUBJECT
+    msg["From"] = sender
+    msg["To"] = to_email
+    return msg
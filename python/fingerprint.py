@@ -0,0 +1,17 @@
+#!/usr/bin/env python
+# /python/fingerprint.py
+#
+# Content fingerprint shared by every cache keyed on a file's bytes: the
+# workbook's data version (ingest.py, scores_loader.py, dashboard charts) and
+# parsed question-paper uploads (ocr.py).
+
+import hashlib
+
+
+def file_fingerprint(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
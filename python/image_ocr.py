@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# /python/image_ocr.py
+#
+# OCR for scanned or photographed question papers (JPEG/PNG/TIFF).
+#
+# Each page goes through: downscale -> grayscale -> deskew -> binarize, and is
+# then cut into horizontal bands at blank rows so no text line is split; the
+# bands are recognized by Tesseract in parallel threads (each call is its own
+# tesseract process) and joined back in order. The time spent in every stage
+# is returned with the text so slow steps are easy to spot.
+#
+# Needs Pillow and pytesseract, plus the tesseract binary on PATH:
+#   pip install pillow pytesseract
+#   apt install tesseract-ocr        # or: brew install tesseract
+#
+#   python image_ocr.py "WhatsApp Image 2025-02-05 at 18.42.15.jpeg"
+
+import os
+import sys
+import time
+import json
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+try:
+    from PIL import Image, ImageOps, ImageSequence
+except ImportError:  # optional dependency
+    Image = None
+
+try:
+    import pytesseract
+except ImportError:  # optional dependency
+    pytesseract = None
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp", ".webp")
+
+# Longest side after downscaling; phone photos are far larger than Tesseract needs.
+MAX_SIDE = int(os.environ.get("OCR_MAX_SIDE", "2400"))
+TILES = int(os.environ.get("OCR_TILES", "4"))
+TESSERACT_CONFIG = os.environ.get("OCR_TESSERACT_CONFIG", "--psm 6")
+MAX_SKEW = 5.0      # degrees searched either way
+SKEW_STEP = 0.25
+SKEW_SAMPLE_SIDE = 1000
+
+
+@contextmanager
+def stage(timings, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def otsu_threshold(gray):
+    """Otsu's threshold for a uint8 grayscale array."""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(float)
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    mean_bg = np.cumsum(hist * np.arange(256))
+    total_mean = mean_bg[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (total_mean * weight_bg - mean_bg * weight_bg[-1]) ** 2 / (weight_bg * weight_fg)
+    between = np.nan_to_num(between[:-1])
+    return int(between.argmax()) if between.any() else 127  # Single-tone image.
+
+
+def skew_angle(ink, max_angle=MAX_SKEW, step=SKEW_STEP):
+    """
+    Angle (degrees) that makes text lines horizontal, found by shearing the
+    ink pixels and keeping the angle whose row histogram is sharpest.
+    Positive means the lines run down to the right.
+    """
+    ys, xs = np.nonzero(ink)
+    if len(ys) < 100:
+        return 0.0
+    height = ink.shape[0]
+    best, best_score = 0.0, -1.0
+    for angle in np.arange(-max_angle, max_angle + step / 2, step):
+        rows = np.round(ys - xs * np.tan(np.radians(angle))).astype(int)
+        hist = np.bincount(rows - rows.min(), minlength=height)
+        score = float(np.square(np.diff(hist.astype(float))).sum())
+        if score > best_score:
+            best, best_score = float(angle), score
+    return best
+
+
+def band_bounds(ink, parts):
+    """
+    Split rows into up to `parts` (top, bottom) bands, cutting at the blank
+    row nearest each even split so no text line is divided.
+    """
+    height = ink.shape[0]
+    if parts <= 1 or height < parts * 50:
+        return [(0, height)]
+    blank = np.flatnonzero(~ink.any(axis=1))
+    cuts = [0]
+    for i in range(1, parts):
+        target = height * i // parts
+        if len(blank):
+            nearest = int(blank[np.abs(blank - target).argmin()])
+            if abs(nearest - target) < height // (2 * parts) and nearest > cuts[-1]:
+                cuts.append(nearest)
+    cuts.append(height)
+    return list(zip(cuts, cuts[1:]))
+
+
+def _require_engine():
+    if Image is None or pytesseract is None:
+        raise RuntimeError("Image OCR needs Pillow and pytesseract (pip install pillow pytesseract) "
+                           "and the tesseract binary.")
+
+
+def preprocess(page, timings):
+    """Return a binarized, deskewed, downscaled PIL image for one page."""
+    with stage(timings, "downscale"):
+        page = ImageOps.exif_transpose(page)
+        scale = MAX_SIDE / max(page.size)
+        if scale < 1:
+            page = page.resize((round(page.width * scale), round(page.height * scale)), Image.LANCZOS)
+        gray = ImageOps.autocontrast(ImageOps.grayscale(page))
+
+    with stage(timings, "deskew"):
+        sample = gray.copy()
+        sample.thumbnail((SKEW_SAMPLE_SIDE, SKEW_SAMPLE_SIDE))
+        sample = np.asarray(sample)
+        angle = skew_angle(sample <= otsu_threshold(sample))
+        if angle:
+            gray = gray.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+    with stage(timings, "binarize"):
+        pixels = np.asarray(gray)
+        ink = pixels <= otsu_threshold(pixels)
+        binary = Image.fromarray(np.where(ink, 0, 255).astype(np.uint8))
+    return binary, ink
+
+
+def recognize(binary, ink, timings, workers=None):
+    """Tesseract over horizontal bands of the page, in parallel; text in page order."""
+    with stage(timings, "ocr"):
+        bands = [binary.crop((0, top, binary.width, bottom)) for top, bottom in band_bounds(ink, TILES)]
+        with ThreadPoolExecutor(max_workers=workers or len(bands)) as pool:
+            texts = list(pool.map(lambda band: pytesseract.image_to_string(band, config=TESSERACT_CONFIG), bands))
+    return "\n".join(t.strip("\n") for t in texts)
+
+
+def ocr_image(path, workers=None):
+    """Text of every page/frame of an image file and the seconds spent per stage."""
+    _require_engine()
+    timings = {}
+    pages = []
+    with stage(timings, "load"):
+        image = Image.open(path)
+        frames = [frame.copy() for frame in ImageSequence.Iterator(image)]
+    for frame in frames:
+        binary, ink = preprocess(frame, timings)
+        pages.append(recognize(binary, ink, timings, workers))
+    return "\n\n".join(pages), {name: round(t, 4) for name, t in timings.items()}
+
+
+if __name__ == "__main__":
+    from paper_parser import parse_text
+
+    for path in sys.argv[1:]:
+        text, timings = ocr_image(path)
+        start = time.perf_counter()
+        questions = parse_text(text)
+        timings["parse"] = round(time.perf_counter() - start, 4)
+        print(json.dumps({"path": path, "questions": questions, "timings": timings}, ensure_ascii=False))
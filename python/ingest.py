@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# /python/ingest.py
+#
+# Incremental Excel -> SQLite ingestion for scores.xlsx.
+#
+# The workbook's size, mtime and SHA-256 are recorded in `ingest_meta`. When the
+# file is untouched a sync is a single os.stat() plus one indexed lookup; when it
+# changes, only new or modified rows (keyed on USN) are written, inside one
+# transaction, and rows that disappeared from the sheet are deleted.
+
+import os
+import sys
+import sqlite3
+import pandas as pd
+
+from fingerprint import file_fingerprint
+from metrics import span
+from scores_loader import load_scores
+
+TABLE = "mytable"
+KEY_COLUMN = "USN"
+TEXT_COLUMNS = ["Name", "USN", "Email"]
+
+
+def read_scores(excel_path):
+    """Read and clean the workbook the same way rag.py always has."""
+    df = load_scores(excel_path)
+    df.rename(columns={"Total-Test": "total"}, inplace=True)
+    # Blanks become 0, as text in text columns (string dtypes refuse an int).
+    for column in df.columns:
+        df[column] = df[column].fillna(0 if pd.api.types.is_numeric_dtype(df[column]) else "0")
+
+    # USN is the upsert key: drop rows without one and keep the last duplicate.
+    df[KEY_COLUMN] = df[KEY_COLUMN].astype(str).str.strip()
+    df = df[~df[KEY_COLUMN].isin(["", "0", "nan"])]
+    return df.drop_duplicates(subset=KEY_COLUMN, keep="last")
+
+
+def column_type(name, dtype):
+    if name in TEXT_COLUMNS or not pd.api.types.is_numeric_dtype(dtype):
+        return "TEXT"
+    if pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    return "REAL"
+
+
+def _ensure_meta(conn):
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS ingest_meta ("
+        "source TEXT PRIMARY KEY, size INTEGER, mtime REAL, sha256 TEXT)"
+    )
+
+
+def _table_columns(conn):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info("{TABLE}")')]
+
+
+def _has_key_index(conn):
+    # Tables written by the old to_sql(if_exists='replace') path have no unique USN.
+    for row in conn.execute(f'PRAGMA index_list("{TABLE}")'):
+        if row[2]:  # unique
+            cols = [c[2] for c in conn.execute(f'PRAGMA index_info("{row[1]}")')]
+            if cols == [KEY_COLUMN]:
+                return True
+    return False
+
+
+def _create_table(conn, df):
+    columns = ", ".join(
+        f'"{c}" {column_type(c, df[c].dtype)}' + (" PRIMARY KEY" if c == KEY_COLUMN else "")
+        for c in df.columns
+    )
+    conn.execute(f'DROP TABLE IF EXISTS "{TABLE}"')
+    conn.execute(f'CREATE TABLE "{TABLE}" ({columns})')
+    if "total" in df.columns:
+        conn.execute(f'CREATE INDEX "ix_{TABLE}_total" ON "{TABLE}" ("total")')
+
+
+def _stored(value, sql_type):
+    # A TEXT column keeps numbers as text (a blank Name filled with 0 reads
+    # back as '0'); compare and write what SQLite will hand back.
+    if sql_type == "TEXT" and value is not None and not isinstance(value, str):
+        return str(value)
+    return value
+
+
+def _upsert(conn, df):
+    """Write only new or changed rows and delete rows missing from df. Returns (written, deleted)."""
+    cols = list(df.columns)
+    key_pos = cols.index(KEY_COLUMN)
+    quoted = ", ".join(f'"{c}"' for c in cols)
+    types = {row[1]: row[2] for row in conn.execute(f'PRAGMA table_info("{TABLE}")')}
+
+    existing = {row[key_pos]: row for row in conn.execute(f'SELECT {quoted} FROM "{TABLE}"')}
+    incoming = list(zip(*([_stored(v, types[c]) for v in df[c].tolist()] for c in cols)))
+    changed = [row for row in incoming if existing.get(row[key_pos]) != row]
+
+    updates = ", ".join(f'"{c}" = excluded."{c}"' for c in cols if c != KEY_COLUMN)
+    placeholders = ", ".join("?" for _ in cols)
+    conn.executemany(
+        f'INSERT INTO "{TABLE}" ({quoted}) VALUES ({placeholders}) '
+        f'ON CONFLICT("{KEY_COLUMN}") DO UPDATE SET {updates}',
+        changed,
+    )
+
+    removed = existing.keys() - {row[key_pos] for row in incoming}
+    conn.executemany(f'DELETE FROM "{TABLE}" WHERE "{KEY_COLUMN}" = ?', [(k,) for k in removed])
+    return len(changed), len(removed)
+
+
+def sync_workbook(excel_path, conn):
+    """
+    Bring `mytable` in line with the workbook and return its data version
+    (the workbook's SHA-256). Does no Excel parsing when nothing changed.
+    """
+    source = os.path.abspath(excel_path)
+    _ensure_meta(conn)
+    st = os.stat(source)
+    row = conn.execute(
+        "SELECT size, mtime, sha256 FROM ingest_meta WHERE source = ?", (source,)
+    ).fetchone()
+    table_ok = bool(_table_columns(conn))
+
+    # Fast path: same size and mtime as the last sync.
+    if row and table_ok and row[0] == st.st_size and row[1] == st.st_mtime:
+        return row[2]
+
+    digest = file_fingerprint(source)
+    if row and table_ok and row[2] == digest:
+        # Touched but not modified: just remember the new mtime.
+        with conn:
+            conn.execute("UPDATE ingest_meta SET size = ?, mtime = ? WHERE source = ?",
+                         (st.st_size, st.st_mtime, source))
+        return digest
+
+    df = read_scores(source)
+    with span("sqlite_ingest") as labels, conn:
+        conn.execute("BEGIN")
+        if _table_columns(conn) != list(df.columns) or not _has_key_index(conn):
+            _create_table(conn, df)
+        written, deleted = _upsert(conn, df)
+        conn.execute(
+            "INSERT INTO ingest_meta (source, size, mtime, sha256) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(source) DO UPDATE SET size = excluded.size, "
+            "mtime = excluded.mtime, sha256 = excluded.sha256",
+            (source, st.st_size, st.st_mtime, digest),
+        )
+        labels.update(written=written, deleted=deleted)
+    print(f"Ingested {os.path.basename(source)}: {written} rows written, {deleted} deleted",
+          file=sys.stderr)
+    return digest
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    excel_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(base_dir, "scores.xlsx")
+    db_path = sys.argv[2] if len(sys.argv) > 2 else "mydatabase.db"
+    print(sync_workbook(excel_path, sqlite3.connect(db_path)))
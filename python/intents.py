@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+# /python/intents.py
+#
+# Deterministic router for common questions about the scores table. Recognized
+# questions are compiled straight to parameterized SQL against `mytable`, so
+# rag.py only needs the LLM for everything else. dashboard.py uses the same
+# matcher for its chatbot.
+#
+# Supported intents:
+#   student_score    "student score of 1RV22CS001", "marks of 1rv22cs001 in T1a"
+#   student_name     "student name of 1RV22CS001", "who is 1RV22CS001"
+#   average          "average score in T3b", "average for each question"
+#   top / bottom     "top 5 students", "who scored lowest in Pumping Lemma"
+#   count            "how many students scored above 30", "... below 50% in T2"
+#   weak_in_topic    "students weak in DFA Minimization", "who struggles with T1"
+#
+# Anything ambiguous is left to the LLM: averages mixed with a comparison or a
+# list, counts or rankings over more than one column or per question, top or
+# bottom percentages, exclusions ("except 1RV22CS001"), and rankings combined
+# with another condition ("top 5 who failed T2").
+#
+# Columns, topics and max marks come from analytics.course_layout() (the
+# `questions` table, or course.py when the database has none). Callers that
+# answer many questions pass the layout in instead of reading it each time.
+
+import re
+
+from analytics import course_layout
+
+TOTAL_COLUMN = "total"
+
+# Students below this fraction of a question's max marks count as weak in it.
+WEAK_FRACTION = 0.5
+
+USN = r"(\d[a-z]{2}\d{2}[a-z]{2,3}\d{3})"
+
+# The dashboard's original phrasings.
+LEGACY_SCORE_RE = re.compile(rf"\bstudent score of {USN}\b")
+LEGACY_NAME_RE = re.compile(rf"\bstudent name of {USN}\b")
+NAME_RE = re.compile(rf"\b(?:name of|who is) {USN}\b")
+SCORE_RE = re.compile(
+    rf"\b(?:score|scores|marks|total) (?:of|for) {USN}\b"
+    rf"|\b(?:what|how much|how many marks) did {USN} (?:score|get)\b"
+)
+AVERAGE_RE = re.compile(r"\b(?:average|avg|mean)\b")
+ALL_QUESTIONS_RE = re.compile(r"\b(?:each|every|all|per) (?:question|section|column)s?\b")
+COUNT_RE = re.compile(
+    r"\bhow many\b.*?\b(above|over|more than|greater than|at least|below|under|less than|fewer than|at most)"
+    r" (\d+(?:\.\d+)?)\s*(%|percent)?"
+)
+# Words that make an "average" question about something else ("above average",
+# "students with an average over 20", "average of the top 5").
+AVERAGE_MIXED_RE = re.compile(
+    r"\b(?:how many|above|over|more than|greater than|higher than|at least|below|under|less than"
+    r"|lower than|fewer than|at most|list|which|who|top|bottom|best|worst|highest|lowest)\b"
+)
+WEAK_RE = re.compile(r"\b(?:weak|struggl\w*|need\w* help|poor\w*|fail\w*)\b")
+TOP_N_RE = re.compile(r"\b(top|best|highest|bottom|worst|lowest)\s+(\d+)\b(?!\.\d|\s*(?:%|percent))")
+TOP_PERCENT_RE = re.compile(r"\b(?:top|best|highest|bottom|worst|lowest)\s+\d+(?:\.\d+)?\s*(?:%|percent)")
+EXCLUDING_RE = re.compile(r"\b(?:except|excluding|exclude|other than|apart from|besides|without|not)\b")
+COMPARISON_RE = re.compile(
+    r"\b(?:above|over|more than|greater than|higher than|at least|below|under|less than"
+    r"|lower than|fewer than|at most)\b|[<>]"
+)
+TOP_ONE_RE = re.compile(
+    r"\b(?:who )?(topped|(?:scored|got) the (?:highest|lowest|best|worst)|(?:scored|got) (?:highest|lowest)"
+    r"|highest scorer|lowest scorer|top scorer|best student|worst student)\b"
+)
+COLUMN_RE = re.compile(r"\bt(\d+)([a-z])?\b")
+
+COMPARATORS = {
+    "above": ">", "over": ">", "more than": ">", "greater than": ">", "at least": ">=",
+    "below": "<", "under": "<", "less than": "<", "fewer than": "<", "at most": "<=",
+}
+
+
+def _singular(text):
+    return " ".join(w[:-1] if w.endswith("s") and len(w) > 3 else w for w in text.split())
+
+
+def _max_marks(column, max_marks):
+    # The total is out of the sum of every question's marks.
+    return max_marks.get(column) or sum(max_marks.values())
+
+
+def mentioned_columns(text, layout=None):
+    """Question columns named in `text`, by column id ("T3b", "t1") or topic name."""
+    test_columns, topic_mapping, _ = layout or course_layout()
+    columns = []
+    for number, part in COLUMN_RE.findall(text):
+        prefix = f"t{number}{part}"
+        columns += [c for c in test_columns
+                    if c.lower() == prefix or (not part and c.lower().startswith(prefix))]
+    if columns:
+        return list(dict.fromkeys(columns))
+
+    # Longest topic name wins, so "epsilon nfa and dfa equivalence" beats "epsilon nfa".
+    words = f" {_singular(re.sub(r'[^a-z0-9 ]', ' ', text))} "
+    topics = {col: _singular(re.sub(r"[^a-z0-9 ]", " ", (topic or "").lower()))
+              for col, topic in topic_mapping.items()}
+    found = [(len(topic), col) for col, topic in topics.items() if topic and f" {topic} " in words]
+    if not found:
+        return []
+    longest = max(length for length, _ in found)
+    return [col for length, col in found if length == longest]
+
+
+def match_intent(question, layout=None):
+    """Return (intent, params) for a recognized question, or None."""
+    layout = layout or course_layout()
+    test_columns, _, max_marks = layout
+    q = " ".join(question.strip().lower().split())
+
+    m = LEGACY_NAME_RE.search(q) or NAME_RE.search(q)
+    if m:
+        return "student_name", {"usn": m.group(1).upper()}
+
+    m = LEGACY_SCORE_RE.search(q) or SCORE_RE.search(q)
+    if m:
+        usn = next(g for g in m.groups() if g)
+        rest = q[:m.start()] + q[m.end():]
+        return "student_score", {"usn": usn.upper(), "columns": mentioned_columns(rest, layout)}
+
+    columns = mentioned_columns(q, layout)
+    ranked = TOP_N_RE.search(q) or TOP_ONE_RE.search(q)
+
+    if EXCLUDING_RE.search(q) or TOP_PERCENT_RE.search(q):
+        return None
+
+    if AVERAGE_RE.search(q):
+        if AVERAGE_MIXED_RE.search(q):
+            return None
+        if not columns and ALL_QUESTIONS_RE.search(q):
+            columns = list(test_columns)
+        return "average", {"columns": columns or [TOTAL_COLUMN]}
+
+    m = COUNT_RE.search(q)
+    if m:
+        comparator, value, percent = m.groups()
+        if len(columns) > 1 or ranked or WEAK_RE.search(q) or ALL_QUESTIONS_RE.search(q):
+            return None
+        column = columns[0] if columns else TOTAL_COLUMN
+        threshold = float(value)
+        if percent:
+            threshold = threshold / 100 * _max_marks(column, max_marks)
+        return "count", {"column": column, "op": COMPARATORS[comparator],
+                         "comparator": comparator, "value": value + (percent and "%" or ""),
+                         "threshold": threshold}
+
+    if WEAK_RE.search(q) and columns:
+        if ranked or COMPARISON_RE.search(q):
+            return None
+        return "weak_in_topic", {"columns": columns}
+
+    if ranked and (len(columns) > 1 or COMPARISON_RE.search(q) or ALL_QUESTIONS_RE.search(q)
+                   or WEAK_RE.search(q)):
+        return None
+    column = columns[0] if columns else TOTAL_COLUMN
+    m = TOP_N_RE.search(q)
+    if m:
+        word, n = m.groups()
+        intent = "top" if word in ("top", "best", "highest") else "bottom"
+        return intent, {"column": column, "n": max(int(n), 1)}
+    m = TOP_ONE_RE.search(q)
+    if m:
+        phrase = m.group(1)
+        intent = "bottom" if ("lowest" in phrase or "worst" in phrase) else "top"
+        return intent, {"column": column, "n": 1}
+
+    return None
+
+
+def compile_intent(intent, params, layout=None):
+    """Build (sql, args) for an intent. Column names come from the course layout only."""
+    if intent == "student_name":
+        return 'SELECT "Name", "USN" FROM mytable WHERE "USN" = ? COLLATE NOCASE', (params["usn"],)
+
+    if intent == "student_score":
+        extra = "".join(f', "{c}"' for c in params["columns"])
+        return (f'SELECT "Name", "USN", "total"{extra} FROM mytable WHERE "USN" = ? COLLATE NOCASE',
+                (params["usn"],))
+
+    if intent == "average":
+        select = ", ".join(f'AVG("{c}") AS "{c}"' for c in params["columns"])
+        return f"SELECT {select} FROM mytable", ()
+
+    if intent in ("top", "bottom"):
+        order = "DESC" if intent == "top" else "ASC"
+        column = params["column"]
+        return (f'SELECT "Name", "USN", "{column}" AS score FROM mytable '
+                f'ORDER BY "{column}" {order} LIMIT ?', (params["n"],))
+
+    if intent == "count":
+        return (f'SELECT COUNT(*) AS n FROM mytable WHERE "{params["column"]}" {params["op"]} ?',
+                (params["threshold"],))
+
+    if intent == "weak_in_topic":
+        columns = params["columns"]
+        select = "".join(f', "{c}"' for c in columns)
+        where = " OR ".join(f'"{c}" < ?' for c in columns)
+        max_marks = (layout or course_layout())[2]
+        args = tuple(_max_marks(c, max_marks) * WEAK_FRACTION for c in columns)
+        return f'SELECT "Name", "USN"{select} FROM mytable WHERE {where} ORDER BY "Name"', args
+
+    raise ValueError(f"Unknown intent: {intent}")
+
+
+def _num(value):
+    return f"{value:g}" if isinstance(value, (int, float)) else str(value)
+
+
+def _label(column, topic_mapping):
+    if column == TOTAL_COLUMN:
+        return "total"
+    topic = topic_mapping.get(column)
+    return f"{column} ({topic})" if topic else column
+
+
+def format_answer(intent, params, rows, layout=None):
+    """Render query rows as the chatbot's reply text."""
+    _, topic_mapping, max_marks = layout or course_layout()
+
+    def label(column):
+        return _label(column, topic_mapping)
+
+    def out_of(column):
+        return _num(_max_marks(column, max_marks))
+
+    if intent in ("student_name", "student_score") and not rows:
+        return f"Student with USN {params['usn']} not found."
+
+    if intent == "student_name":
+        return f"The name of student with USN {params['usn']} is {rows[0]['Name']}."
+
+    if intent == "student_score":
+        row = rows[0]
+        if not params["columns"]:
+            return f"The score of student {params['usn']} is {_num(row['total'])}."
+        parts = [f"{label(c)}: {_num(row[c])}/{out_of(c)}" for c in params["columns"]]
+        return f"Scores of {row['Name']} ({params['usn']}): " + ", ".join(parts) + "."
+
+    if intent == "average":
+        row = rows[0]
+        lines = [f"Average score in {label(c)}: {_num(round(row[c] or 0, 2))}/{out_of(c)}"
+                 for c in params["columns"]]
+        return "\n".join(lines)
+
+    if intent in ("top", "bottom"):
+        if not rows:
+            return "No students found."
+        which = "Top" if intent == "top" else "Bottom"
+        lines = [f"{i}. {r['Name']} ({r['USN']}) - {_num(r['score'])}" for i, r in enumerate(rows, start=1)]
+        return f"{which} {params['n']} by {label(params['column'])}:\n" + "\n".join(lines)
+
+    if intent == "count":
+        n = rows[0]["n"]
+        return (f"{n} student{'s' if n != 1 else ''} scored {params['comparator']} "
+                f"{params['value']} in {label(params['column'])}.")
+
+    if intent == "weak_in_topic":
+        columns = params["columns"]
+        topics = ", ".join(label(c) for c in columns)
+        if not rows:
+            return f"No students scored below {WEAK_FRACTION:.0%} in {topics}."
+        lines = ["- {} ({}): {}".format(r["Name"], r["USN"], ", ".join(
+            f"{c} {_num(r[c])}/{out_of(c)}" for c in columns)) for r in rows]
+        return (f"{len(rows)} students scored below {WEAK_FRACTION:.0%} in {topics}:\n"
+                + "\n".join(lines))
+
+    raise ValueError(f"Unknown intent: {intent}")
+
+
+def answer_question(question, run_sql, layout=None):
+    """
+    Answer `question` without the LLM if it matches a known intent.
+    run_sql(sql, args) must return a list of row dicts. Returns None on no match.
+    """
+    layout = layout or course_layout()
+    matched = match_intent(question, layout)
+    if matched is None:
+        return None
+    intent, params = matched
+    sql, args = compile_intent(intent, params, layout)
+    return format_answer(intent, params, run_sql(sql, args), layout)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# /python/mailer.py
+#
+# Bulk SMTP delivery with pooled connections.
+#
+# A fixed number of worker threads each hold one authenticated SMTP connection
+# and reuse it for up to `messages_per_connection` messages, so the TCP + TLS +
+# AUTH handshake is paid once per connection instead of once per email. Sends
+# are throttled by a shared rate limit, transient failures (4xx replies,
+# dropped connections, timeouts) are retried with exponential backoff on a
+# fresh connection, and every recipient gets a DeliveryResult.
+#
+# Works against any SMTP server; for local testing run
+#   python -m aiosmtpd -n -l localhost:8025
+# and create the mailer with port=8025, starttls=False.
+
+import ssl
+import time
+import queue
+import smtplib
+import threading
+from dataclasses import dataclass
+
+from metrics import span, count
+
+_DONE = object()
+
+
+@dataclass
+class DeliveryResult:
+    recipient: str
+    status: str          # "sent" or "failed"
+    attempts: int
+    error: str = ""
+    elapsed: float = 0.0
+    tag: object = None   # caller's key for the message, passed through unchanged
+
+
+class RateLimiter:
+    """Thread-safe limiter allowing at most `rate` acquisitions per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def is_transient(error):
+    """True for failures worth retrying on a new connection."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError,
+                              TimeoutError, ConnectionError, OSError))
+
+
+class BulkMailer:
+    """Sends many messages over a small pool of reused SMTP connections."""
+
+    def __init__(self, host, port, sender, password="", starttls=True, workers=4,
+                 messages_per_connection=100, rate_per_second=None, max_retries=3,
+                 backoff=1.0, timeout=30):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.password = password
+        self.starttls = starttls
+        self.workers = workers
+        self.messages_per_connection = messages_per_connection
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(rate_per_second)
+
+    def connect(self):
+        with span("smtp_connect"):
+            server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            server.ehlo()
+            if self.starttls:
+                server.starttls(context=ssl.create_default_context())
+                server.ehlo()
+            if self.password:
+                server.login(self.sender, self.password)
+            return server
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def _worker(self, jobs, on_result):
+        server, sent_on_connection = None, 0
+        while True:
+            job = jobs.get()
+            if job is _DONE:
+                break
+            recipient, msg, tag = job
+            start = time.monotonic()
+            attempts, error = 0, None
+            while True:
+                attempts += 1
+                try:
+                    if server is None or sent_on_connection >= self.messages_per_connection:
+                        if server is not None:
+                            self._close(server)
+                        server, sent_on_connection = self.connect(), 0
+                    self.rate_limiter.acquire()
+                    with span("smtp_send"):
+                        server.sendmail(self.sender, [recipient], msg.as_string())
+                    sent_on_connection += 1
+                    error = None
+                    break
+                except Exception as e:
+                    error = e
+                    # The connection may be in an unknown state; start over.
+                    if server is not None:
+                        self._close(server)
+                    server = None
+                    if attempts > self.max_retries or not is_transient(e):
+                        break
+                    count("smtp_retries")
+                    time.sleep(self.backoff * 2 ** (attempts - 1))
+            count("smtp_messages", status="failed" if error else "sent")
+            on_result(DeliveryResult(
+                recipient=recipient,
+                status="failed" if error else "sent",
+                attempts=attempts,
+                error=str(error) if error else "",
+                elapsed=time.monotonic() - start,
+                tag=tag,
+            ))
+        if server is not None:
+            self._close(server)
+
+    def send_all(self, messages, on_result=None):
+        """
+        Deliver (recipient, message) or (recipient, message, tag) tuples and
+        return a DeliveryResult for each, in completion order. `messages` may
+        be a generator: it is consumed as workers free up, so sending starts
+        before all messages are built.
+        on_result(result) is called from worker threads as each one finishes.
+        If it raises, no further messages are queued; the messages already
+        handed to workers are finished and the first such error is re-raised.
+        """
+        results = []
+        callback_errors = []
+        lock = threading.Lock()
+
+        def record(result):
+            with lock:
+                results.append(result)
+            if on_result is not None:
+                try:
+                    on_result(result)
+                except Exception as e:
+                    # Keep the worker alive; send_all stops feeding and re-raises.
+                    count("smtp_callback_errors")
+                    with lock:
+                        callback_errors.append(e)
+
+        jobs = queue.Queue(maxsize=self.workers * 4)
+        threads = [threading.Thread(target=self._worker, args=(jobs, record), daemon=True)
+                   for _ in range(self.workers)]
+
+        def put(item):
+            # Never block forever on a full queue nobody is draining.
+            while any(t.is_alive() for t in threads):
+                try:
+                    jobs.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        for t in threads:
+            t.start()
+        try:
+            for recipient, msg, *tag in messages:
+                if callback_errors or not put((recipient, msg, tag[0] if tag else None)):
+                    break
+        finally:
+            for _ in threads:
+                put(_DONE)
+            for t in threads:
+                t.join()
+        if callback_errors:
+            raise callback_errors[0]
+        return results
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# /python/metrics.py
+#
+# Lightweight timing instrumentation for the Python pipelines.
+#
+# Code wraps interesting steps in named spans:
+#
+#   with span("sqlite_ingest") as labels:
+#       ...
+#       labels["rows"] = written        # optional labels, added inside the span
+#
+# String labels (cache="hit", backend="gemini") split the aggregated metrics;
+# numeric ones are detail for the JSON lines only.
+#
+# PIPELINE_METRICS selects what happens to them (comma-separated):
+#   json  one JSON line per span on stderr, e.g.
+#         {"metric": "span", "name": "smtp_send", "seconds": 0.0123, "ok": true, ...}
+#   prom  aggregate into Prometheus-style counters and histograms, available
+#         from render_prometheus() (rag.py --serve answers {"op": "metrics"})
+#         and written to PIPELINE_METRICS_FILE at exit when that is set.
+# Unset (the default) makes span() return a shared no-op object, so the cost
+# of instrumented code is one attribute check per span.
+
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+
+_MODES = {m.strip() for m in os.environ.get("PIPELINE_METRICS", "").lower().split(",") if m.strip()}
+EMIT_JSON = "json" in _MODES
+AGGREGATE = "prom" in _MODES
+ENABLED = EMIT_JSON or AGGREGATE
+METRICS_FILE = os.environ.get("PIPELINE_METRICS_FILE")
+
+# Histogram buckets in seconds.
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return {}
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self.labels
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.name, time.perf_counter() - self.start, ok=exc_type is None, **self.labels)
+        return False
+
+
+def span(name, **labels):
+    """Time the enclosed block as `name`; yields a dict for extra labels."""
+    if not ENABLED:
+        return _NOOP
+    return _Span(name, labels)
+
+
+def _key(name, labels):
+    # Numeric labels (row counts and the like) stay in the JSON lines only;
+    # as Prometheus labels each distinct value would be a new series.
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()
+                              if isinstance(v, (str, bool)) or v is None))
+
+
+def record(name, seconds, ok=True, **labels):
+    """Record an already-measured duration, as if it had been a span."""
+    if not ENABLED:
+        return
+    if EMIT_JSON:
+        line = {"metric": "span", "name": name, "seconds": round(seconds, 6), "ok": ok,
+                "ts": round(time.time(), 3), "pid": os.getpid(), **labels}
+        print(json.dumps(line, default=str), file=sys.stderr, flush=True)
+    if AGGREGATE:
+        key = _key(name, labels)
+        with _lock:
+            hist = _histograms.get(key)
+            if hist is None:
+                hist = _histograms[key] = [0] * len(BUCKETS) + [0.0, 0]
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    hist[i] += 1
+            hist[-2] += seconds
+            hist[-1] += 1
+            if not ok:
+                errors = _key(name + "_errors", labels)
+                _counters[errors] = _counters.get(errors, 0) + 1
+
+
+def count(name, value=1, **labels):
+    """Add `value` to counter `name`."""
+    if not ENABLED:
+        return
+    if EMIT_JSON:
+        print(json.dumps({"metric": "count", "name": name, "value": value, "ts": round(time.time(), 3),
+                          "pid": os.getpid(), **labels}, default=str), file=sys.stderr, flush=True)
+    if AGGREGATE:
+        key = _key(name, labels)
+        with _lock:
+            _counters[key] = _counters.get(key, 0) + value
+
+
+def _labels(pairs, extra=()):
+    pairs = list(pairs) + list(extra)
+    if not pairs:
+        return ""
+    escaped = ((k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _metric_name(name):
+    return "pipeline_" + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def render_prometheus():
+    """Aggregated metrics in the Prometheus text exposition format."""
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((k, list(v)) for k, v in _histograms.items())
+    lines, typed = [], set()
+
+    def family(metric, kind):
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f"# TYPE {metric} {kind}")
+
+    for (name, labels), value in counters:
+        metric = _metric_name(name) + "_total"
+        family(metric, "counter")
+        lines.append(f"{metric}{_labels(labels)} {value}")
+    for (name, labels), hist in histograms:
+        metric = _metric_name(name) + "_seconds"
+        family(metric, "histogram")
+        for bound, n in zip(BUCKETS, hist):
+            lines.append(f"{metric}_bucket{_labels(labels, [('le', bound)])} {n}")
+        lines.append(f"{metric}_bucket{_labels(labels, [('le', '+Inf')])} {hist[-1]}")
+        lines.append(f"{metric}_sum{_labels(labels)} {hist[-2]:.6f}")
+        lines.append(f"{metric}_count{_labels(labels)} {hist[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def _write_metrics_file():
+    tmp = f"{METRICS_FILE}.tmp{os.getpid()}"
+    with open(tmp, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp, METRICS_FILE)
+
+
+if AGGREGATE and METRICS_FILE:
+    atexit.register(_write_metrics_file)
@@ -1,34 +1,198 @@
 #!/usr/bin/env python
 # /python/ocr.py
+#
+# Extract questions (text, marks, BT level) from question papers.
+#
+#   python ocr.py paper.docx                  # human-readable report (used by uploadRoutes.js)
+#   python ocr.py --batch papers/ old.docx    # one JSON line per document
+#   python ocr.py --batch papers/ --workers 8
+#
+# Parsing is done by paper_parser, which streams the document body
+# (paragraphs and tables) in one pass.
+#
+# Batch mode expands directories to the documents inside them and parses the
+# documents in a process pool, so a semester of papers is handled in one run
+# with throughput scaling with the number of cores. Results are printed in
+# input order as soon as each one is ready.
+#
+# Photos and scans (.jpg/.png/.tif...) are read with Tesseract through
+# image_ocr.py and go through the same question parser; their results include
+# the seconds spent in each stage (load, downscale, deskew, binarize, ocr,
+# parse).
+#
+# Results are cached in parse_cache.db (OCR_CACHE_DB) under the SHA-256 of the
+# file's contents, so re-uploading a paper, under any name, is answered
+# without parsing it again. --no-cache skips the cache.
+#
+# With --db, the parsed marks and BT levels are also stored in the scores
+# database for analytics.py (BT-level and topic performance).
 
+import os
 import sys
-import re
-from docx import Document
+import json
+import time
+import sqlite3
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from image_ocr import IMAGE_EXTENSIONS, ocr_image
+from paper_parser import PARSER_VERSION, iter_text, parse_docx, parse_text
+from fingerprint import file_fingerprint
+from parse_cache import ParseCache
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DOCX = os.path.join(base_dir, "Structured_TOC.docx")
+DOCUMENT_EXTENSIONS = (".docx",) + IMAGE_EXTENSIONS
+CACHE_PATH = os.environ.get("OCR_CACHE_DB", os.path.join(base_dir, "parse_cache.db"))
+
 
 def extract_text_from_docx(docx_path):
-    doc = Document(docx_path)
-    full_text = []
-    for para in doc.paragraphs:
-        full_text.append(para.text.strip())
-    return "\n".join(full_text)
-
-# Use the file path passed from Node, or default if not provided
-if len(sys.argv) > 1:
-    docx_path = sys.argv[1]
-else:
-    docx_path = r"/Users/gayatrikrishnakumar/Documents/Interdepartmental EL/python/Structured_TOC.docx"
-
-extracted_text = extract_text_from_docx(docx_path)
-print("=== Extracted Text ===")
-print(extracted_text)
-
-# Regex to extract Marks and BT Level
-pattern = re.compile(r"Marks:\s*(\d+)\s*\nBT Level:\s*L(\d)")
-matches = pattern.findall(extracted_text)
-
-print("\n=== Extracted BT Levels ===")
-if not matches:
-    print("⚠️ No BT levels found. Check text formatting or tweak regex.")
-else:
-    for idx, (marks, bt_level) in enumerate(matches, start=1):
-        print(f"Question {idx}: Marks = {marks}, BT Level = L{bt_level}")
+    return "\n".join(iter_text(docx_path))
+
+
+def parse_image(path):
+    """OCR an image, then parse its text; timings cover every stage."""
+    text, timings = ocr_image(path)
+    start = time.perf_counter()
+    questions = parse_text(text)
+    timings["parse"] = round(time.perf_counter() - start, 4)
+    return {"text": text, "questions": questions, "timings": timings}
+
+
+def parse_document(path):
+    """Text and questions of one document, in the form stored in the cache."""
+    try:
+        if path.lower().endswith(IMAGE_EXTENSIONS):
+            return parse_image(path)
+        text, questions = parse_docx(path)
+        return {"text": text, "questions": questions}
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+
+def _store(cache, digest, path, parsed):
+    # Timings describe one run, not the document.
+    if cache and "error" not in parsed:
+        cache.put(digest, os.path.basename(path), {k: v for k, v in parsed.items() if k != "timings"})
+
+
+def open_cache(enabled=True):
+    return ParseCache(CACHE_PATH, PARSER_VERSION) if enabled else None
+
+
+def load_document(path, cache=None):
+    """parse_document(path), served from the cache for content seen before."""
+    digest = file_fingerprint(path)
+    parsed = cache.get(digest) if cache else None
+    if parsed is None:
+        parsed = parse_document(path)
+        _store(cache, digest, path, parsed)
+    return digest, parsed
+
+
+def _batch_result(path, digest, parsed, cached):
+    result = {"path": path, "sha256": digest, "cached": cached, "questions": parsed.get("questions", [])}
+    for key in ("error", "timings"):
+        if key in parsed:
+            result[key] = parsed[key]
+    return result
+
+
+def expand_paths(paths):
+    """Files as given, plus the documents inside any directories, sorted."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(DOCUMENT_EXTENSIONS) and not name.startswith("~$")
+            ))
+        else:
+            files.append(path)
+    return files
+
+
+def run_batch(paths, workers=None, cache=None):
+    """
+    Yield one result dict per document, in order. Documents whose content is
+    already in the cache are answered from it; the rest are parsed in a
+    process pool and stored.
+    """
+    files = expand_paths(paths)
+    digests, hits, misses = {}, {}, []
+    for path in files:
+        try:
+            digests[path] = file_fingerprint(path)
+        except OSError as e:
+            hits[path] = {"error": f"{type(e).__name__}: {e}"}
+            continue
+        parsed = cache.get(digests[path]) if cache else None
+        if parsed is None:
+            misses.append(path)
+        else:
+            hits[path] = parsed
+
+    if len(misses) > 1:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        parsed_misses = pool.map(parse_document, misses)
+    else:
+        pool, parsed_misses = None, map(parse_document, misses)
+    try:
+        for path in files:
+            if path in hits:
+                yield _batch_result(path, digests.get(path), hits[path], cached="error" not in hits[path])
+                continue
+            parsed = next(parsed_misses)
+            _store(cache, digests[path], path, parsed)
+            yield _batch_result(path, digests[path], parsed, cached=False)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def print_report(docx_path, cache=None):
+    _, parsed = load_document(docx_path, cache)
+    if "error" in parsed:
+        raise RuntimeError(f"Could not parse {docx_path}: {parsed['error']}")
+    if "timings" in parsed:
+        print("Stage timings (s): " + json.dumps(parsed["timings"]), file=sys.stderr)
+    print("=== Extracted Text ===")
+    print(parsed["text"])
+
+    matches = [q for q in parsed["questions"] if q["marks"] is not None and q["bt_level"]]
+
+    print("\n=== Extracted BT Levels ===")
+    if not matches:
+        print("⚠️ No BT levels found. Check text formatting or tweak regex.")
+    else:
+        for idx, q in enumerate(matches, start=1):
+            print(f"Question {idx}: Marks = {q['marks']}, BT Level = {q['bt_level']}")
+    return parsed["questions"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract marks and BT levels from question papers.")
+    parser.add_argument("paths", nargs="*", help="documents or directories of documents")
+    parser.add_argument("--batch", action="store_true", help="print one JSON object per document")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="parse every document even if seen before")
+    parser.add_argument("--db", help="also store the questions' marks and BT levels in this scores database")
+    args = parser.parse_args()
+
+    cache = open_cache(not args.no_cache)
+    db = None
+    if args.db:
+        from analytics import import_paper  # pulls in pandas; only needed here
+
+        db = sqlite3.connect(args.db)
+    if args.batch:
+        for result in run_batch(args.paths or [DEFAULT_DOCX], args.workers, cache):
+            if db is not None and "error" not in result:
+                import_paper(db, result["questions"], os.path.basename(result["path"]))
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+    else:
+        # Use the file path passed from Node, or default if not provided
+        docx_path = args.paths[0] if args.paths else DEFAULT_DOCX
+        questions = print_report(docx_path, cache)
+        if db is not None:
+            import_paper(db, questions, os.path.basename(docx_path))
@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+# /python/paper_parser.py
+#
+# Single-pass streaming parser for question papers in .docx format.
+#
+# word/document.xml is read with ElementTree.iterparse straight out of the
+# zip, and the body is walked in document order: paragraphs and table rows
+# are turned into text as soon as their closing tag is seen, then dropped,
+# so memory stays bounded by the largest single paragraph or row rather than
+# the whole paper. Question records are yielded as soon as they are complete.
+#
+# Recognized layouts:
+#   Q.1 <text>            1. <text>            Q1) <text> (10 Marks) [L2]
+#   Marks: 10             BT Level: L3          Marks: 10  BT: L3
+#   tables with a header row naming question / marks / BT level columns,
+#   or rows whose cells hold the number, text, marks and level.
+
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+# Bump when parsing changes so cached results (see parse_cache.py) are redone.
+PARSER_VERSION = 1
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+BODY, P, TBL, TR, TC = W + "body", W + "p", W + "tbl", W + "tr", W + "tc"
+TEXT, TAB, BR = W + "t", W + "tab", W + "br"
+
+QUESTION_PATTERNS = [
+    re.compile(r"^Q\s*\.?\s*(?:No\.?\s*)?(\d+)\s*[.):\-]?\s*(.*)$", re.IGNORECASE),
+    re.compile(r"^(\d+)\s*[.)]\s+(.+)$"),  # bare numbering, only accepted in sequence
+]
+MARKS_PATTERNS = [
+    re.compile(r"\bMarks?\s*[:\-=]\s*(\d+)", re.IGNORECASE),
+    re.compile(r"[(\[]\s*(\d+)\s*(?:M|Marks?)\s*[)\]]", re.IGNORECASE),
+]
+BT_PATTERNS = [
+    re.compile(r"\b(?:R?BT|Bloom'?s?)\s*(?:Level)?\s*[:\-=]?\s*L?\s*(\d)\b", re.IGNORECASE),
+    re.compile(r"[(\[]\s*L(\d)\s*[)\]]"),
+]
+# Whole cells in a table row.
+MARKS_CELL = re.compile(r"^(\d{1,3})(?:\s*(?:M|Marks?))?$", re.IGNORECASE)
+BT_CELL = re.compile(r"^(?:BT\s*[:\-]?\s*)?L\s*(\d)$", re.IGNORECASE)
+NUMBER_CELL = re.compile(r"^(?:Q\s*\.?\s*)?(\d+)\s*[.)]?$", re.IGNORECASE)
+
+HEADER_COLUMNS = {
+    "number": re.compile(r"^(?:q\.?\s*no\.?|sl\.?\s*no\.?|no\.?|q|#)$", re.IGNORECASE),
+    "text": re.compile(r"question", re.IGNORECASE),
+    "marks": re.compile(r"^marks?$|^m$", re.IGNORECASE),
+    "bt_level": re.compile(r"\b(?:r?bt|bloom|level)\b", re.IGNORECASE),
+}
+
+
+def _first(patterns, text):
+    for p in patterns:
+        m = p.search(text)
+        if m:
+            return m
+    return None
+
+
+def _paragraph_text(p):
+    parts = []
+    for el in p.iter():
+        if el.tag == TEXT:
+            parts.append(el.text or "")
+        elif el.tag == TAB:
+            parts.append("\t")
+        elif el.tag == BR:
+            parts.append("\n")
+    return "".join(parts).strip()
+
+
+def iter_blocks(docx_path):
+    """
+    Yield ("paragraph", text) and ("row", [cell text, ...]) in document order.
+    Nested tables are flattened into their enclosing cell's text.
+    """
+    with zipfile.ZipFile(docx_path) as z, z.open("word/document.xml") as xml:
+        body, table_depth = None, 0
+        for event, el in ET.iterparse(xml, events=("start", "end")):
+            if event == "start":
+                if el.tag == BODY:
+                    body = el
+                elif el.tag == TBL:
+                    table_depth += 1
+                continue
+
+            if el.tag == P and table_depth == 0:
+                yield "paragraph", _paragraph_text(el)
+            elif el.tag == TR and table_depth == 1:
+                cells = ["\n".join(t for t in map(_paragraph_text, tc.iter(P)) if t)
+                         for tc in el if tc.tag == TC]
+                yield "row", cells
+                el.clear()
+            elif el.tag == TBL:
+                table_depth -= 1
+            if body is not None and table_depth == 0 and el.tag in (P, TBL):
+                body.clear()  # Everything before this point has been yielded.
+
+
+def iter_text(docx_path):
+    """Lines of text in document order; table rows become tab-separated lines."""
+    for kind, content in iter_blocks(docx_path):
+        yield _block_text(kind, content)
+
+
+def _block_text(kind, content):
+    return content if kind == "paragraph" else "\t".join(content)
+
+
+def _new_question(number, text):
+    return {"number": number, "text": text, "marks": None, "bt_level": None}
+
+
+def _complete(q):
+    return q["marks"] is not None and q["bt_level"] is not None
+
+
+class _QuestionBuilder:
+    """Turns lines and table rows into question records, yielding finished ones."""
+
+    def __init__(self):
+        self.current = None
+        self.last_number = 0
+        self.emitted = False
+        self.header = None  # column name -> index for the current table
+
+    def _start(self, number, text):
+        finished = self.finish()
+        self.current = _new_question(number, text)
+        self.last_number = number
+        self.emitted = False
+        return finished
+
+    def finish(self):
+        """The current question if it was not yielded yet."""
+        if self.current is not None and not self.emitted:
+            self.emitted = True
+            return self.current
+        return None
+
+    def _annotate(self, text):
+        """Pick marks/BT level out of `text`; returns the text without them."""
+        q = self.current
+        m = q["marks"] is None and _first(MARKS_PATTERNS, text)
+        if m:
+            q["marks"] = int(m.group(1))
+            text = text[:m.start()] + text[m.end():]
+        m = q["bt_level"] is None and _first(BT_PATTERNS, text)
+        if m:
+            q["bt_level"] = f"L{m.group(1)}"
+            text = text[:m.start()] + text[m.end():]
+        return text.strip().rstrip(" -|,")
+
+    def line(self, text):
+        out = []
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            m = QUESTION_PATTERNS[0].match(line) or QUESTION_PATTERNS[1].match(line)
+            if m and (m.re is QUESTION_PATTERNS[0] or self._next_in_sequence(int(m.group(1)))):
+                out.append(self._start(int(m.group(1)), ""))
+                line = m.group(2)
+            if self.current is None:
+                continue
+            in_text = self.current["marks"] is None and self.current["bt_level"] is None
+            rest = self._annotate(line)
+            if rest and in_text:
+                self.current["text"] = f"{self.current['text']}\n{rest}" if self.current["text"] else rest
+            if _complete(self.current) and not self.emitted:
+                out.append(self.finish())
+        return [q for q in out if q]
+
+    def _next_in_sequence(self, number):
+        # "1. ..." inside a question is a sub-item; only treat it as a new
+        # question when it continues the numbering after a finished one.
+        if self.current is None:
+            return number == 1
+        return number == self.last_number + 1 and (self.emitted or self.current["marks"] is not None)
+
+    def row(self, cells):
+        if not any(cells):
+            return []
+        if self._is_header(cells):
+            return [q for q in [self.finish()] if q]
+        if self.header:
+            return self._header_row(cells)
+        return self._bare_row(cells)
+
+    def _is_header(self, cells):
+        found = {}
+        for i, cell in enumerate(cells):
+            for name, pattern in HEADER_COLUMNS.items():
+                if name not in found and pattern.search(cell.strip()):
+                    found[name] = i
+                    break
+        if "text" in found and ("marks" in found or "bt_level" in found):
+            self.header = found
+            return True
+        return False
+
+    def _header_row(self, cells):
+        def cell(name):
+            i = self.header.get(name)
+            return cells[i].strip() if i is not None and i < len(cells) else ""
+
+        number = NUMBER_CELL.match(cell("number"))
+        text = cell("text")
+        if not number and not text:
+            return []
+        if not number and self.current is not None and not cell("marks") and not cell("bt_level"):
+            # Continuation row for the previous question.
+            self.current["text"] = f"{self.current['text']}\n{text}".strip()
+            return []
+        out = [self._start(int(number.group(1)) if number else self.last_number + 1, text)]
+        marks = MARKS_CELL.match(cell("marks"))
+        if marks:
+            self.current["marks"] = int(marks.group(1))
+        bt = BT_CELL.match(cell("bt_level")) or _first(BT_PATTERNS, cell("bt_level"))
+        if bt:
+            self.current["bt_level"] = f"L{bt.group(1)}"
+        if _complete(self.current):
+            out.append(self.finish())
+        return [q for q in out if q]
+
+    def _bare_row(self, cells):
+        # Rows like | Q.1 | text | 10 | L2 |: classify cells by shape.
+        cells = [c.strip() for c in cells if c.strip()]
+        number = NUMBER_CELL.match(cells[0]) if len(cells) > 1 else None
+        marks = next((m for m in map(MARKS_CELL.match, cells[1:]) if m), None)
+        bt = next((m for m in map(BT_CELL.match, cells) if m), None)
+        if number and (marks or bt):
+            text = "\n".join(c for c in cells[1:] if not MARKS_CELL.match(c) and not BT_CELL.match(c))
+            out = [self._start(int(number.group(1)), text)]
+            self.current["marks"] = int(marks.group(1)) if marks else None
+            self.current["bt_level"] = f"L{bt.group(1)}" if bt else None
+            if _complete(self.current):
+                out.append(self.finish())
+            return [q for q in out if q]
+        # Anything else is read like lines of text.
+        return self.line("\n".join(cells))
+
+
+def parse_text(text):
+    """Question dicts from plain text (e.g. OCR output), using the line layouts."""
+    builder = _QuestionBuilder()
+    questions = builder.line(text)
+    last = builder.finish()
+    return questions + [last] if last else questions
+
+
+def iter_questions(docx_path):
+    """
+    Yield question dicts (number, text, marks, bt_level) from a .docx paper in
+    document order, each as soon as its marks and BT level have been seen.
+    Questions missing either are yielded at the next question with None.
+    """
+    return _iter_block_questions(iter_blocks(docx_path))
+
+
+def parse_docx(docx_path):
+    """(text, questions) of a .docx paper, as iter_text and iter_questions give them, in one pass."""
+    lines = []
+
+    def blocks():
+        for kind, content in iter_blocks(docx_path):
+            lines.append(_block_text(kind, content))
+            yield kind, content
+
+    questions = list(_iter_block_questions(blocks()))
+    return "\n".join(lines), questions
+
+
+def _iter_block_questions(blocks):
+    builder = _QuestionBuilder()
+    for kind, content in blocks:
+        if kind == "paragraph":
+            yield from builder.line(content)
+        else:
+            yield from builder.row(content)
+            continue
+        builder.header = None  # A paragraph ends the table.
+    last = builder.finish()
+    if last:
+        yield last
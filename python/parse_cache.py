@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# /python/parse_cache.py
+#
+# Content-addressed store of parsed question papers.
+#
+# Results are keyed on the SHA-256 of the uploaded file's bytes, so the same
+# paper uploaded again (under any name) is answered from SQLite without being
+# parsed. Entries also record the parser version and are ignored once the
+# parser changes.
+
+import json
+import time
+import sqlite3
+import threading
+
+
+class ParseCache:
+    """SQLite map of file hash -> parse result (any JSON-serializable dict)."""
+
+    def __init__(self, path, parser_version):
+        self.parser_version = parser_version
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS parsed_documents ("
+                "sha256 TEXT PRIMARY KEY, parser_version INTEGER NOT NULL, "
+                "filename TEXT, result TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def get(self, digest):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT result FROM parsed_documents WHERE sha256 = ? AND parser_version = ?",
+                (digest, self.parser_version),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, digest, filename, result):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO parsed_documents (sha256, parser_version, filename, result, created_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(sha256) DO UPDATE SET parser_version = excluded.parser_version, "
+                "filename = excluded.filename, result = excluded.result, created_at = excluded.created_at",
+                (digest, self.parser_version, filename, json.dumps(result, ensure_ascii=False), time.time()),
+            )
+
+    def close(self):
+        self.conn.close()
@@ -2,35 +2,113 @@
 
 import os
 import sys
+import json
+import asyncio
 import sqlite3
+import argparse
+import threading
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
-import absl.logging
-import google.generativeai as genai
+
+import analytics
+from answer_cache import AnswerCache, normalize_question
+from chat_sessions import ChatSessionManager
+from ingest import sync_workbook
+from intents import answer_question
+from metrics import span, render_prometheus
+from single_flight import SingleFlight
+from sql_cache import SQLResultCache
+from sql_guard import SQLGuard, QueryRejected
 
 # Suppress logs
-absl.logging.set_verbosity(absl.logging.ERROR)
 os.environ["GRPC_VERBOSITY"] = "NONE"
 os.environ["GRPC_TRACE"] = ""
 
-# Load Excel file and process dataframe
-dataframe = pd.read_excel('/Users/gayatrikrishnakumar/Documents/Interdepartmental EL/python/scores.xlsx', index_col=0)
-dataframe.rename(columns={"Total-Test": "total"}, inplace=True)
+base_dir = os.path.dirname(os.path.abspath(__file__))
+EXCEL_PATH = os.environ.get("RAG_SCORES_PATH", os.path.join(base_dir, 'scores.xlsx'))
+DB_PATH = os.environ.get("RAG_DB_PATH", 'mydatabase.db')
+
+# Resident state, filled in by init(). In server mode these live for the
+# whole process so each query skips the Excel load and model setup.
+connection = None
+backend = None
+data_version = None
+# (columns, topics, max marks) for the intent router, re-read with the data.
+layout = None
+# Read-only, budgeted execution for the SQL the model writes (see sql_guard.py).
+sql_guard = None
+
+# One SQLite connection is shared by all worker threads.
+db_lock = threading.Lock()
+
+# Results of sql_query, keyed on canonical SQL + data version.
+sql_cache = SQLResultCache(
+    max_entries=int(os.environ.get("RAG_SQL_CACHE_SIZE", 256)),
+    ttl=float(os.environ.get("RAG_SQL_CACHE_TTL", 300)),
+)
+
+# Answers to earlier questions, exact or near-duplicate, for the same data version.
+answer_cache = AnswerCache(
+    max_entries=int(os.environ.get("RAG_ANSWER_CACHE_SIZE", 1024)),
+    ttl=float(os.environ.get("RAG_ANSWER_CACHE_TTL", 3600)),
+    similarity=float(os.environ.get("RAG_ANSWER_CACHE_SIMILARITY", 0.9)),
+)
+
+# Identical stateless questions being answered right now, shared by all
+# connections of the worker.
+inflight = SingleFlight()
+
+
+def refresh_data():
+    """Re-ingest scores.xlsx into 'mytable' if it changed; returns the data version."""
+    global data_version, layout
+    with db_lock:
+        # The version covers the scores and the question metadata behind the
+        # BT-level / topic tables, which are rebuilt only when either changes.
+        version = analytics.refresh(connection, sync_workbook(EXCEL_PATH, connection))
+        if version != data_version or layout is None:
+            layout = analytics.course_layout(DB_PATH)
+        data_version = version
+    sql_cache.set_version(data_version)
+    answer_cache.set_version(data_version)
+    if sql_guard is not None:
+        sql_guard.set_version(data_version)
+    return data_version
 
-# (Optional) Clean the data by replacing NaN values with 0
-dataframe.fillna(0, inplace=True)
 
-# Create SQLite database (or connect if it already exists)
-connection = sqlite3.connect('mydatabase.db')
-dataframe.to_sql('mytable', connection, if_exists='replace')
+def _execute_sql(query, params=()):
+    with db_lock:
+        return pd.read_sql_query(query, connection, params=params).to_dict(orient='records')
 
-# Configure Google Generative AI (Gemini)
-# Replace "YOUR_API_KEY" with your actual API key.
-genai.configure(api_key="")
 
 # Define an SQL query tool
 def sql_query(query: str):
-    """Run a SQL SELECT query on the SQLite database and return the results."""
-    return pd.read_sql_query(query, connection).to_dict(orient='records')
+    """
+    Run a SQL SELECT query on the SQLite database and return the results.
+    Only a single read-only SELECT is allowed, within a time budget. If more
+    than the row limit match, returns {"rows": [...], "truncated": true,
+    "row_limit": n} instead of the list of rows; aggregate or add a LIMIT.
+    """
+    with span("sql_query") as labels:
+        rows = sql_cache.get_or_run(query, sql_guard.run)
+        labels["rows"] = len(rows)
+        if len(rows) > sql_guard.max_rows:
+            return {"rows": rows[:sql_guard.max_rows], "truncated": True, "row_limit": sql_guard.max_rows}
+        return rows
+
+
+def stats():
+    """Counters reported by the worker's "stats" op."""
+    return {
+        "data_version": data_version,
+        "sql_cache": sql_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "single_flight": inflight.stats(),
+        "sessions": backend.sessions.stats(),
+    }
+
 
 # Define system prompt with database schema
 system_prompt = """
@@ -55,25 +133,395 @@ database_schema: [
             { name: 'T5b', type: 'int' },
             { name: 'total', type: 'int' }
         ]
+    },
+    {
+        table: 'questions',
+        description: 'one row per score column of mytable',
+        columns: [
+            { name: 'column_name', type: 'string', description: 'score column in mytable, e.g. T3b' },
+            { name: 'question_no', type: 'int' },
+            { name: 'marks', type: 'float', description: 'maximum marks' },
+            { name: 'bt_level', type: 'string', description: "Bloom's taxonomy level, L1 to L6" },
+            { name: 'topic', type: 'string' },
+            { name: 'question_text', type: 'string' }
+        ]
+    },
+    {
+        table: 'question_scores',
+        description: 'mytable unpivoted: one row per student and score column',
+        columns: [
+            { name: 'column_name', type: 'string' },
+            { name: 'USN', type: 'string' },
+            { name: 'score', type: 'float' }
+        ]
+    },
+    {
+        table: 'student_bt_performance',
+        description: 'each student\'s marks per BT level (also student_topic_performance, keyed by topic)',
+        columns: [
+            { name: 'USN', type: 'string' },
+            { name: 'bt_level', type: 'string' },
+            { name: 'score', type: 'float' },
+            { name: 'max_marks', type: 'float' },
+            { name: 'percent', type: 'float' }
+        ]
+    },
+    {
+        table: 'bt_performance',
+        description: 'class performance per BT level (also topic_performance, keyed by topic, with a bt_levels column)',
+        columns: [
+            { name: 'bt_level', type: 'string' },
+            { name: 'questions', type: 'int' },
+            { name: 'max_marks', type: 'float' },
+            { name: 'students', type: 'int' },
+            { name: 'avg_score', type: 'float' },
+            { name: 'avg_percent', type: 'float' },
+            { name: 'weak_students', type: 'int', description: 'students below 50% at this level' }
+        ]
     }
 ]
 """.strip()
 
-# Create Gemini model with the SQL tool
-sql_gemini = genai.GenerativeModel(
-    model_name="gemini-1.5-flash",
-    tools=[sql_query],
-    system_instruction=system_prompt
-)
 
-# Start chat with function calling enabled
-chat = sql_gemini.start_chat(enable_automatic_function_calling=True)
+def _session_manager(start_chat):
+    return ChatSessionManager(
+        start_chat,
+        max_sessions=int(os.environ.get("RAG_MAX_SESSIONS", 64)),
+        idle_ttl=float(os.environ.get("RAG_SESSION_IDLE_TTL", 900)),
+        history_token_budget=int(os.environ.get("RAG_HISTORY_TOKEN_BUDGET", 4000)),
+    )
+
+
+# Functions the model may call, by name.
+TOOLS = {"sql_query": sql_query}
+MAX_TOOL_ROUNDS = int(os.environ.get("RAG_MAX_TOOL_ROUNDS", 8))
+STUB_CHUNK_CHARS = 16
+
+
+class _Backend:
+    """
+    A backend's _turn(chat, message) yields the events of one answer:
+    {"event": "tool_call", "name": ..., "args": {...}} before each tool call
+    and {"event": "text", "text": ...} for each piece of the reply.
+    """
+
+    def stream(self, user_query, session_id=None):
+        # Without a session id every question gets a fresh, history-free chat.
+        return self.sessions.stream(session_id, user_query, self._turn)
+
+
+class GeminiBackend(_Backend):
+    """Answers questions with Gemini, using sql_query as a function tool."""
+
+    def __init__(self):
+        import absl.logging
+        import google.generativeai as genai
+
+        absl.logging.set_verbosity(absl.logging.ERROR)
+        genai.configure(api_key=os.environ.get("GEMINI_API_KEY", ""))
+        self.protos = genai.protos
+
+        # Create Gemini model with the SQL tool
+        self.model = genai.GenerativeModel(
+            model_name="gemini-1.5-flash",
+            tools=list(TOOLS.values()),
+            system_instruction=system_prompt
+        )
+        # The SDK cannot stream with automatic function calling, so _turn()
+        # runs the tool calls itself.
+        self.sessions = _session_manager(self.model.start_chat)
+
+    def _tool_response(self, call):
+        try:
+            response = {"result": TOOLS[call.name](**dict(call.args))}
+        except QueryRejected as e:
+            # Tell the model why, so it can rewrite the query.
+            response = {"error": str(e)}
+        return self.protos.Part(function_response=self.protos.FunctionResponse(
+            name=call.name, response=json.loads(json.dumps(response, default=str))))
+
+    def _turn(self, chat, message):
+        content = message
+        for _ in range(MAX_TOOL_ROUNDS):
+            calls = []
+            with span("llm_round_trip", backend="gemini"):
+                for chunk in chat.send_message(content, stream=True):
+                    parts = chunk.candidates[0].content.parts if chunk.candidates else []
+                    for part in parts:
+                        if part.function_call:
+                            calls.append(part.function_call)
+                        elif part.text:
+                            yield {"event": "text", "text": part.text}
+            if not calls:
+                return
+            for call in calls:
+                yield {"event": "tool_call", "name": call.name, "args": dict(call.args)}
+            content = [self._tool_response(call) for call in calls]
+        raise RuntimeError(f"No answer after {MAX_TOOL_ROUNDS} rounds of tool calls")
+
+
+class StubChat:
+    """Offline stand-in for a Gemini ChatSession: runs SELECT/WITH input through sql_query, echoes anything else."""
+
+    def __init__(self):
+        self.history = []
+
+    @staticmethod
+    def is_sql(message):
+        return message.lstrip().lower().startswith(("select", "with"))
+
+    def send_message(self, message):
+        if self.is_sql(message):
+            text = json.dumps(sql_query(message), default=str)
+        else:
+            text = f"[stub] {message}"
+        self.history += [
+            SimpleNamespace(role="user", parts=[SimpleNamespace(text=message)]),
+            SimpleNamespace(role="model", parts=[SimpleNamespace(text=text)]),
+        ]
+        return SimpleNamespace(text=text)
+
+
+class StubBackend(_Backend):
+    """Offline backend for testing, with the same session handling as GeminiBackend."""
+
+    def __init__(self):
+        self.sessions = _session_manager(StubChat)
+
+    def _turn(self, chat, message):
+        if chat.is_sql(message):
+            yield {"event": "tool_call", "name": "sql_query", "args": {"query": message}}
+        with span("llm_round_trip", backend="stub"):
+            text = chat.send_message(message).text
+        for i in range(0, len(text), STUB_CHUNK_CHARS):
+            yield {"event": "text", "text": text[i:i + STUB_CHUNK_CHARS]}
+
+
+BACKENDS = {
+    "gemini": GeminiBackend,
+    "stub": StubBackend,
+}
+
+
+def init(backend_name="gemini"):
+    """Load the database and build the LLM backend once per process."""
+    global connection, backend, sql_guard
+    # Create SQLite database (or connect if it already exists)
+    connection = sqlite3.connect(DB_PATH, check_same_thread=False)
+    refresh_data()
+    sql_guard = SQLGuard(
+        DB_PATH,
+        time_budget=float(os.environ.get("RAG_SQL_TIME_BUDGET", 5)),
+        step_budget=int(os.environ.get("RAG_SQL_STEP_BUDGET", 50_000_000)),
+        max_rows=int(os.environ.get("RAG_SQL_MAX_ROWS", 500)),
+        max_scan_rows=int(os.environ.get("RAG_SQL_MAX_SCAN_ROWS", 5_000_000)),
+    )
+    sql_guard.set_version(data_version)
+    backend = BACKENDS[backend_name]()
+
+
+def stream_query(user_query: str, session_id=None):
+    """
+    Answer `user_query`, yielding the backend's tool_call / text events as
+    they happen and finally {"event": "result", "result": <full answer>}.
+    Intent and answer-cache hits produce only the result event.
+    """
+    # Cheap when the workbook is unchanged: one stat() and one indexed lookup.
+    with span("rag_query") as labels:
+        refresh_data()
+
+        # Common structured questions are answered straight from SQL, no model call.
+        answer = answer_question(user_query, _execute_sql, layout)
+        if answer is not None:
+            labels["path"] = "intent"
+            yield {"event": "result", "result": answer}
+            return
+
+        # Follow-ups depend on the session's history, so only stateless
+        # questions go through the answer cache.
+        if session_id is None:
+            answer = answer_cache.lookup(user_query)
+            if answer is not None:
+                labels["path"] = "cache"
+                yield {"event": "result", "result": answer}
+                return
+
+        labels["path"] = "model"
+        version = answer_cache.version
+        chunks = []
+        for event in backend.stream(user_query, session_id):
+            if event["event"] == "text":
+                chunks.append(event["text"])
+            yield event
+        answer = "".join(chunks)
+        if session_id is None:
+            answer_cache.store(user_query, answer, version)
+        yield {"event": "result", "result": answer}
+
+
+def run_query(user_query: str, session_id=None):
+    """The final answer to `user_query`, without the intermediate events."""
+    for event in stream_query(user_query, session_id):
+        pass
+    return event["result"]
+
+
+#########################################
+# Server mode: newline-delimited JSON
+#########################################
+# Each request is one line, e.g. {"id": 1, "query": "..."}; each reply is one
+# line {"id": 1, "result": "..."} or {"id": 1, "error": "..."}. Requests on
+# the same connection are answered as they finish, not in order.
+# An optional "session" field keeps a conversation's history across requests;
+# without it every question is answered statelessly. Identical (normalized)
+# stateless questions that arrive while one is being answered wait for that
+# answer instead of starting another model call.
+# With "stream": true the request is answered with several lines instead:
+# {"id": 1, "event": "tool_call", "name": ..., "args": ...} and
+# {"id": 1, "event": "text", "text": ...} as the answer is produced, ending
+# with {"id": 1, "event": "result", "result": ...} or
+# {"id": 1, "event": "error", "error": ...}. Identical stateless streamed
+# requests are coalesced too: each one gets every event of the shared run.
+# {"id": 2, "op": "stats"} returns the cache counters instead of a query, and
+# {"id": 3, "op": "metrics"} the timing metrics in Prometheus text format
+# (collected when PIPELINE_METRICS includes "prom", see metrics.py).
+
+async def handle_client(reader, writer, executor):
+    loop = asyncio.get_running_loop()
+    write_lock = asyncio.Lock()
+    pending = set()
+
+    async def reply(message):
+        async with write_lock:
+            writer.write((json.dumps(message, default=str) + "\n").encode())
+            await writer.drain()
+
+    async def answer(request):
+        request_id = request.get("id")
+        query, session_id = request["query"], request.get("session")
+        try:
+            normalized = normalize_question(query)
+            if session_id is None and normalized:
+                # Concurrent copies of a stateless question share one run. Keyed
+                # on the version after refreshing, so a request made after the
+                # data changed never joins a run that answered from the old data.
+                version = await loop.run_in_executor(executor, refresh_data)
+                result = await inflight.run(
+                    (version, normalized), lambda: loop.run_in_executor(executor, run_query, query, None))
+            else:
+                result = await loop.run_in_executor(executor, run_query, query, session_id)
+            await reply({"id": request_id, "result": result})
+        except Exception as e:
+            await reply({"id": request_id, "error": str(e)})
+
+    def produce_events(request):
+        # Runs on an executor thread; waits for each line to be written, so a
+        # slow reader holds back the model instead of filling memory.
+        for event in stream_query(request["query"], request.get("session")):
+            asyncio.run_coroutine_threadsafe(reply({"id": request.get("id"), **event}), loop).result()
+
+    def publish_events(query, publish):
+        # A shared run can't wait on one reader; its events are kept in memory
+        # (one answer's worth) until every waiter has been sent them.
+        for event in stream_query(query, None):
+            publish(event)
+
+    async def stream_answer(request):
+        request_id = request.get("id")
+        query, session_id = request["query"], request.get("session")
+        try:
+            normalized = normalize_question(query)
+            if session_id is None and normalized:
+                version = await loop.run_in_executor(executor, refresh_data)
+                events = inflight.stream(
+                    (version, normalized),
+                    lambda publish: loop.run_in_executor(executor, publish_events, query, publish))
+                async for event in events:
+                    await reply({"id": request_id, **event})
+            else:
+                await loop.run_in_executor(executor, produce_events, request)
+        except Exception as e:
+            await reply({"id": request_id, "event": "error", "error": str(e)})
+
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError:
+            await reply({"id": None, "error": "Invalid JSON request"})
+            continue
+        if isinstance(request, dict) and request.get("op") == "stats":
+            await reply({"id": request.get("id"), "result": stats()})
+            continue
+        if isinstance(request, dict) and request.get("op") == "metrics":
+            await reply({"id": request.get("id"), "result": render_prometheus()})
+            continue
+        if not isinstance(request, dict):
+            await reply({"id": None, "error": "Query not provided"})
+            continue
+        query = request.get("query")
+        if not isinstance(query, str) or not query.strip():
+            await reply({"id": request.get("id"), "error": "Query not provided"})
+            continue
+        task = asyncio.create_task(stream_answer(request) if request.get("stream") else answer(request))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.gather(*pending)
+    writer.close()
+
+
+async def serve(host, port, socket_path, workers):
+    executor = ThreadPoolExecutor(max_workers=workers)
+
+    async def on_connect(reader, writer):
+        await handle_client(reader, writer, executor)
+
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = await asyncio.start_unix_server(on_connect, path=socket_path)
+        print(f"RAG worker listening on {socket_path}", file=sys.stderr)
+    else:
+        server = await asyncio.start_server(on_connect, host=host, port=port)
+        print(f"RAG worker listening on {host}:{port}", file=sys.stderr)
+
+    async with server:
+        await server.serve_forever()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Answer questions about the student scores database.")
+    parser.add_argument("--serve", action="store_true",
+                        help="run as a long-lived worker instead of answering one query from stdin")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("RAG_WORKER_PORT", 5005)))
+    parser.add_argument("--socket", default=os.environ.get("RAG_WORKER_SOCKET"),
+                        help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="number of queries answered concurrently in server mode")
+    parser.add_argument("--stream", action="store_true",
+                        help="print the answer as newline-delimited JSON events while it is produced")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=os.environ.get("RAG_BACKEND", "gemini"))
+    return parser.parse_args()
 
-def run_query(user_query: str):
-    response = chat.send_message(user_query)
-    return response.text
 
 if __name__ == "__main__":
+    args = parse_args()
+    init(args.backend)
+
+    if args.serve:
+        try:
+            asyncio.run(serve(args.host, args.port, args.socket, args.workers))
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+
     # Always read the query from standard input.
     if sys.stdin.isatty():
         # If no piped input is available, prompt interactively.
@@ -81,5 +529,14 @@ if __name__ == "__main__":
     else:
         query = sys.stdin.read().strip()
 
+    if args.stream:
+        try:
+            for event in stream_query(query):
+                print(json.dumps(event, default=str), flush=True)
+        except Exception as e:
+            print(json.dumps({"event": "error", "error": str(e)}), flush=True)
+            sys.exit(1)
+        sys.exit(0)
+
     result = run_query(query)
     print(result)
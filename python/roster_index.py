@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# /python/roster_index.py
+#
+# In-memory lookup structures over the scores frame for dashboard.py.
+#
+# Built once per data load, so questions about a student are a dict lookup
+# rather than a scan that re-normalizes the whole USN column. Names are kept
+# in a sorted list for prefix search (bisect), with difflib as a fuzzy
+# fallback for misspellings.
+
+import re
+import bisect
+import difflib
+
+USN_RE = re.compile(r"\b\d[a-z]{2}\d{2}[a-z]{2,3}\d{3}\b", re.IGNORECASE)
+
+
+def normalize_usn(usn):
+    return str(usn).strip().lower()
+
+
+def normalize_name(name):
+    return " ".join(str(name).lower().split())
+
+
+class StudentIndex:
+    """USN -> row position and name -> row positions for one DataFrame."""
+
+    def __init__(self, df, usn_column="USN", name_column="Name"):
+        self.by_usn = {}
+        for pos, usn in enumerate(df[usn_column].tolist()):
+            self.by_usn.setdefault(normalize_usn(usn), pos)  # First row wins, like the old scan.
+
+        self.by_name = {}
+        self.display_names = {}
+        for pos, name in enumerate(df[name_column].tolist()):
+            key = normalize_name(name)
+            self.by_name.setdefault(key, []).append(pos)
+            self.display_names.setdefault(key, name)
+        self._sorted_names = sorted(self.by_name)
+
+    def __len__(self):
+        return len(self.by_usn)
+
+    def lookup(self, usn):
+        """Row position for `usn`, or None."""
+        return self.by_usn.get(normalize_usn(usn))
+
+    def lookup_many(self, usns):
+        """{usn: row position or None} for every USN asked for, in one pass."""
+        return {usn: self.by_usn.get(normalize_usn(usn)) for usn in usns}
+
+    def _prefix(self, prefix, limit=None):
+        start = bisect.bisect_left(self._sorted_names, prefix)
+        matches = []
+        for name in self._sorted_names[start:]:
+            if not name.startswith(prefix) or (limit and len(matches) >= limit):
+                break
+            matches.append(name)
+        return matches
+
+    def prefix_names(self, prefix, limit=None):
+        """Names starting with `prefix` (case-insensitive), in alphabetical order."""
+        return [self.display_names[n] for n in self._prefix(normalize_name(prefix), limit)]
+
+    def search_names(self, query, limit=10, cutoff=0.6):
+        """
+        Names matching `query`: prefix matches first, then names containing a
+        word with that prefix, then close spellings.
+        """
+        query = normalize_name(query)
+        if not query:
+            return []
+        matches = self._prefix(query, limit)
+        if len(matches) < limit:
+            seen = set(matches)
+            matches += [n for n in self._sorted_names
+                        if n not in seen and any(w.startswith(query) for w in n.split())][:limit - len(matches)]
+        if len(matches) < limit:
+            seen = set(matches)
+            close = difflib.get_close_matches(query, self._sorted_names, n=limit, cutoff=cutoff)
+            matches += [n for n in close if n not in seen][:limit - len(matches)]
+        return [self.display_names[n] for n in matches]
+
+    def name_positions(self, names):
+        """Row positions of every row whose name is in `names`."""
+        return sorted(pos for name in names for pos in self.by_name.get(normalize_name(name), ()))
+
+
+def find_usns(text):
+    """All USNs mentioned in free text, upper-cased, in order of appearance."""
+    return list(dict.fromkeys(m.upper() for m in USN_RE.findall(text)))
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# /python/scores_loader.py
+#
+# Shared loader for scores.xlsx with a columnar on-disk cache.
+#
+# Parsing the workbook through openpyxl is the slowest step in every script, so
+# the first sheet is converted once into an uncompressed Arrow IPC (Feather v2)
+# file and later loads memory-map that instead. The cache is keyed on the
+# workbook's size and mtime, with the SHA-256 as a fallback, and is rebuilt
+# when the workbook changes. Without pyarrow load_scores() simply reads the
+# workbook; a sheet that still cannot be stored as Arrow is remembered as such
+# and read directly until it changes.
+#
+# Mixed-type columns are made storable first, on every path so the frame does
+# not depend on whether the cache was used: a column holding numbers and
+# blank / whitespace-only cells becomes numeric with NaN for the blanks (the
+# callers all count those as 0), and any other mixed column holds strings.
+#
+#   from scores_loader import load_scores
+#   df = load_scores()                  # pd.read_excel('scores.xlsx') + the above
+
+import os
+import sys
+import json
+import hashlib
+
+import pandas as pd
+
+from fingerprint import file_fingerprint
+from metrics import span
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # optional dependency
+    feather = None
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(base_dir, 'scores.xlsx')
+CACHE_DIR = os.environ.get("SCORES_CACHE_DIR", os.path.join(base_dir, '.scores_cache'))
+
+
+def cache_paths(path):
+    """(arrow file, metadata file) used to cache `path`."""
+    key = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+    stem = os.path.join(CACHE_DIR, f"{os.path.basename(path)}.{key}")
+    return stem + ".arrow", stem + ".json"
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path, write):
+    tmp = f"{path}.tmp{os.getpid()}"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _write_json(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, float) and value != value) \
+        or (isinstance(value, str) and not value.strip())
+
+
+def normalize_types(df):
+    """Give every object column of `df` a single Arrow type (see the header)."""
+    for column in df.columns[df.dtypes == object]:
+        values = df[column]
+        if values.map(lambda v: isinstance(v, str) or v is None or v != v).all():
+            continue  # Plain text column, possibly with missing values.
+        blank = values.map(_is_blank)
+        numbers = pd.to_numeric(values.mask(blank), errors="coerce")
+        if numbers[~blank].notna().all():
+            df[column] = numbers
+        else:
+            df[column] = values.map(lambda v: None if _is_blank(v) and not isinstance(v, str) else str(v))
+    return df
+
+
+def _read_cache(arrow_path):
+    return feather.read_feather(arrow_path, memory_map=True)
+
+
+def load_scores(path=None, use_cache=True):
+    """Return the first sheet of the scores workbook as a DataFrame."""
+    path = path or DEFAULT_PATH
+    with span("excel_load") as labels:
+        df, labels["cache"] = _load(path, use_cache)
+        labels["rows"] = len(df)
+        return df
+
+
+def _load(path, use_cache):
+    """
+    (frame, cache outcome) where the outcome is "hit", "miss", "off" (no
+    pyarrow or use_cache=False) or "skip" (the sheet cannot be cached).
+    """
+    if feather is None or not use_cache:
+        return normalize_types(pd.read_excel(path)), "off"
+
+    arrow_path, meta_path = cache_paths(path)
+    stat = os.stat(path)
+    meta = _read_meta(meta_path)
+    if meta and (meta.get("uncacheable") or os.path.exists(arrow_path)):
+        same_file = meta["size"] == stat.st_size and meta["mtime_ns"] == stat.st_mtime_ns
+        if not same_file:
+            digest = file_fingerprint(path)
+            same_file = meta["sha256"] == digest
+            if same_file:
+                meta.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                _write_atomic(meta_path, lambda p: _write_json(p, meta))
+        if same_file and meta.get("uncacheable"):
+            return normalize_types(pd.read_excel(path)), "skip"
+        if same_file:
+            return _read_cache(arrow_path), "hit"
+    else:
+        digest = file_fingerprint(path)
+
+    df = normalize_types(pd.read_excel(path))
+    meta = {"source": os.path.abspath(path), "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    try:
+        _write_atomic(arrow_path, lambda p: df.to_feather(p, compression="uncompressed"))
+    except Exception as e:
+        # Remember the failure so later loads don't hash and retry the same file.
+        print(f"Not caching {os.path.basename(path)}: {e}", file=sys.stderr)
+        meta["uncacheable"] = True
+    _write_atomic(meta_path, lambda p: _write_json(p, meta))
+    return df, "skip" if meta.get("uncacheable") else "miss"
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# /python/single_flight.py
+#
+# Coalescing of identical in-flight work for the asyncio worker in rag.py.
+#
+# When a class asks the same question at once, the first request for a key
+# starts the work and every request that arrives before it finishes awaits
+# the same future instead of running its own model/SQL call. Nothing is kept
+# after completion: later repeats go through the answer cache as usual.
+#
+# Streamed answers are shared the same way: every request for the key gets
+# the events produced so far, then the rest as they arrive.
+
+import asyncio
+
+_END = object()
+
+
+class _Channel:
+    """Events of one in-flight stream, fanned out to every subscriber."""
+
+    def __init__(self):
+        self.events = []
+        self.queues = []
+
+    def publish(self, event):
+        self.events.append(event)
+        for queue in self.queues:
+            queue.put_nowait(event)
+
+    def subscribe(self):
+        queue = asyncio.Queue()
+        for event in self.events:
+            queue.put_nowait(event)
+        self.queues.append(queue)
+        return queue
+
+    def close(self):
+        for queue in self.queues:
+            queue.put_nowait(_END)
+
+
+class SingleFlight:
+    """Map of key -> future for work that is currently running."""
+
+    def __init__(self):
+        self._inflight = {}
+        self._streams = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def run(self, key, start):
+        """
+        Await the result for `key`, calling `start()` (which must return an
+        awaitable) only if no identical call is already in flight. All callers
+        get the same result or the same exception.
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            self.leaders += 1
+            future = asyncio.ensure_future(start())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.coalesced += 1
+        # One caller going away must not cancel the work the others wait on.
+        return await asyncio.shield(future)
+
+    def _finished(self, key, future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # Mark the exception retrieved even if every waiter has gone away.
+        if not future.cancelled():
+            future.exception()
+
+    async def stream(self, key, start):
+        """
+        Async-iterate the events for `key`. start(publish) must return an
+        awaitable that calls publish(event), from any thread, for each event;
+        it is only called if no identical stream is already in flight. Every
+        caller sees all the events, then the same exception if the work fails.
+        """
+        entry = self._streams.get(key)
+        if entry is None:
+            self.leaders += 1
+            loop = asyncio.get_running_loop()
+            channel = _Channel()
+            future = asyncio.ensure_future(start(lambda event: loop.call_soon_threadsafe(channel.publish, event)))
+            entry = self._streams[key] = (channel, future)
+            future.add_done_callback(lambda done: self._stream_finished(key, entry))
+        else:
+            self.coalesced += 1
+        channel, future = entry
+        queue = channel.subscribe()
+        try:
+            while True:
+                event = await queue.get()
+                if event is _END:
+                    break
+                yield event
+        finally:
+            # A caller going away stops its own delivery, not the work.
+            channel.queues.remove(queue)
+        if not future.cancelled() and future.exception() is not None:
+            raise future.exception()
+
+    def _stream_finished(self, key, entry):
+        # Events published from other threads were scheduled before this
+        # callback, so every subscriber has them ahead of the end marker.
+        channel, future = entry
+        if self._streams.get(key) is entry:
+            del self._streams[key]
+        channel.close()
+        if not future.cancelled():
+            future.exception()
+
+    def stats(self):
+        return {
+            "in_flight": len(self._inflight) + len(self._streams),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
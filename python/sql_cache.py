@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# /python/sql_cache.py
+#
+# LRU + TTL cache for results of the `sql_query` tool. Entries are keyed on the
+# canonicalized SQL text and the data version of `mytable`, so a reload of the
+# workbook can never serve stale rows.
+
+import re
+import time
+import threading
+from collections import OrderedDict
+
+# Keywords are upper-cased during canonicalization; identifiers keep their case
+# because they become the keys of the returned records. Select lists are not
+# touched at all: SQLite names an unaliased result column after its literal
+# text, so "avg(T1a)" and "AVG(T1a)" give records with different keys.
+SQL_KEYWORDS = {
+    "select", "distinct", "from", "where", "and", "or", "not", "in", "is", "null",
+    "like", "between", "group", "by", "order", "asc", "desc", "limit", "offset",
+    "having", "as", "join", "inner", "left", "outer", "cross", "on", "union", "all",
+    "with", "case", "when", "then", "else", "end", "avg", "sum", "min", "max",
+    "count", "round", "cast", "abs", "coalesce", "ifnull", "integer", "real", "text",
+}
+
+# Quoted strings/identifiers are matched first so their contents are left alone.
+_TOKEN_RE = re.compile(
+    r"""('(?:[^']|'')*')"""       # string literal
+    r'''|("(?:[^"]|"")*")'''      # quoted identifier
+    r"|(--[^\n]*|/\*.*?\*/)"      # comment
+    r"|(\s+)"                     # whitespace
+    r"|([A-Za-z_][A-Za-z0-9_]*|\d+(?:\.\d*)?)"  # bare word or number
+    r"|(.)",                      # anything else
+    re.DOTALL,
+)
+
+# Words that end a select list at its own nesting depth.
+_SELECT_LIST_END = {"from", "where", "group", "having", "window", "order", "limit",
+                    "union", "intersect", "except"}
+
+
+def canonicalize_sql(query):
+    """
+    Normalize whitespace, comments, keyword case and trailing semicolons
+    outside select lists, which are kept verbatim.
+    """
+    tokens = []
+    depth = 0
+    select_list = None  # (start offset, depth) of the select list being copied
+    for m in _TOKEN_RE.finditer(query):
+        literal, ident, comment, space, word, other = m.groups()
+        if select_list is not None:
+            start, list_depth = select_list
+            ends = (depth == list_depth and (other in (";", ")") or (word or "").lower() in _SELECT_LIST_END))
+            if not ends:
+                depth += (other == "(") - (other == ")")
+                continue
+            tokens.append(query[start:m.start()].strip())
+            select_list = None
+        depth += (other == "(") - (other == ")")
+        if word and word.lower() == "select":
+            tokens.append("SELECT")
+            select_list = (m.end(), depth)
+            continue
+        if comment or space:
+            continue
+        if word:
+            tokens.append(word.upper() if word.lower() in SQL_KEYWORDS else word)
+        else:
+            tokens.append(literal or ident or other)
+    if select_list is not None:
+        tokens.append(query[select_list[0]:].strip())
+    while tokens and tokens[-1] == ";":
+        tokens.pop()
+
+    # Only word-like neighbours need a separating space: "a , b" -> "a,b".
+    text = ""
+    for token in tokens:
+        if text and _wordish(text[-1]) and _wordish(token[0]):
+            text += " "
+        text += token
+    return text
+
+
+def _wordish(char):
+    return char.isalnum() or char in "_'\""
+
+
+class SQLResultCache:
+    """Thread-safe LRU cache with a size bound, a TTL and hit/miss counters."""
+
+    def __init__(self, max_entries=256, ttl=300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def set_version(self, version):
+        """Record the current data version; drop everything cached for an older one."""
+        with self._lock:
+            if version != self.version:
+                if self.version is not None:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.version = version
+
+    def get_or_run(self, query, run):
+        """Return cached rows for `query`, calling run(query) on a miss."""
+        key = (canonicalize_sql(query), self.version)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, rows = entry
+                if now - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return [dict(r) for r in rows]
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+
+        # Run outside the lock; errors are not cached.
+        rows = run(query)
+        with self._lock:
+            if key[1] == self.version:
+                self._entries[key] = (time.monotonic(), rows)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return [dict(r) for r in rows]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "version": self.version,
+            }
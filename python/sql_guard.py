@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# /python/sql_guard.py
+#
+# Guarded execution of model-written SQL for the `sql_query` tool.
+#
+# Queries run on read-only connections (one per thread) with:
+#   - an allow-list: a single SELECT / WITH statement; an authorizer denies
+#     every other operation (writes, PRAGMA, ATTACH, ...) at compile time
+#   - a plan check: EXPLAIN QUERY PLAN is read before running, and a query
+#     whose full scans (SCAN, or an index SEARCH on a range, which can match
+#     every row) would visit more than `max_scan_rows` rows in total (nested
+#     loops multiply) is rejected
+#   - a budget: a progress handler aborts the query after `time_budget`
+#     seconds or `step_budget` virtual-machine instructions
+#   - a row cap: at most `max_rows` + 1 rows are fetched, so the caller can
+#     tell the result was cut short
+# Each query is timed as the metrics.py span "sql_guard", labelled with its
+# outcome (ok, truncated, not_select, not_allowed, invalid, plan_too_large,
+# over_budget).
+
+import os
+import re
+import time
+import sqlite3
+import threading
+from collections import defaultdict
+from urllib.parse import quote
+
+from metrics import span
+
+PROGRESS_INTERVAL = 1000  # VM instructions between budget checks
+
+_ALLOWED_ACTIONS = {
+    sqlite3.SQLITE_SELECT,
+    sqlite3.SQLITE_READ,
+    sqlite3.SQLITE_FUNCTION,
+    getattr(sqlite3, "SQLITE_RECURSIVE", 33),
+}
+
+_LEADING_COMMENTS_RE = re.compile(r"^(\s+|--[^\n]*\n?|/\*.*?\*/)*", re.S)
+_SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+# "SEARCH b USING COVERING INDEX ix (total>?)": a range lookup, sized like a scan.
+_RANGE_SEARCH_RE = re.compile(r"^SEARCH (?:TABLE )?(\w+) .*\([^()]*[<>][^()]*\)$")
+_TABLE_REF_RE = re.compile(
+    r"\b(?:FROM|JOIN)\s+[\"`\[]?(\w+)[\"`\]]?(?:\s+(?:AS\s+)?[\"`\[]?(\w+))?|,\s*[\"`\[]?(\w+)[\"`\]]?(?:\s+(?:AS\s+)?(\w+))?",
+    re.I)
+_NOT_ALIASES = {"select", "from", "where", "join", "on", "using", "group", "order", "limit", "left", "right", "inner", "outer",
+                "cross", "natural", "full", "union", "except", "intersect", "having", "window", "as"}
+
+
+class QueryRejected(ValueError):
+    """The query was refused before or during execution; the message says why."""
+
+
+def readonly_uri(path):
+    return f"file:{quote(os.path.abspath(path))}?mode=ro"
+
+
+def _deny_writes(action, *_):
+    return sqlite3.SQLITE_OK if action in _ALLOWED_ACTIONS else sqlite3.SQLITE_DENY
+
+
+class SQLGuard:
+    """Runs SELECT statements against `db_path` within fixed budgets."""
+
+    def __init__(self, db_path, time_budget=5.0, step_budget=50_000_000, max_rows=500,
+                 max_scan_rows=5_000_000):
+        self.uri = readonly_uri(db_path)
+        self.time_budget = time_budget
+        self.step_budget = step_budget
+        self.max_rows = max_rows
+        self.max_scan_rows = max_scan_rows
+        self.version = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._table_rows = {}  # table -> row count, for the current version
+
+    def set_version(self, version):
+        """Forget cached table sizes when the data changes."""
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self._table_rows = {}
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+            conn.execute("PRAGMA query_only = ON")
+            conn.set_authorizer(_deny_writes)
+            self._local.conn = conn
+        return conn
+
+    def _rows_in(self, conn, table):
+        with self._lock:
+            known = self._table_rows.get(table)
+        if known is None:
+            known = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+            with self._lock:
+                self._table_rows[table] = known
+        return known
+
+    def _aliases(self, conn, query):
+        """Map of name -> table for the tables (and their aliases) used by `query`."""
+        tables = {name.lower() for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        aliases = {}
+        for m in _TABLE_REF_RE.finditer(query):
+            table, alias = (m.group(1), m.group(2)) if m.group(1) else (m.group(3), m.group(4))
+            if table.lower() not in tables:
+                continue
+            aliases[table.lower()] = table
+            if alias and alias.lower() not in _NOT_ALIASES:
+                aliases[alias.lower()] = table
+        return aliases
+
+    def estimate_scan_rows(self, conn, query):
+        """
+        Upper bound on the rows visited by full scans in the plan; a scan of a
+        covering index still reads every row, and so can a SEARCH on a range
+        (`a.total < b.total`), so only equality SEARCH steps are cheap.
+        Scans under the same parent are nested loops, so their sizes multiply;
+        correlated subqueries run once per outer row. A scan of a CTE or
+        subquery is sized as the largest table the query uses.
+        """
+        plan = conn.execute("EXPLAIN QUERY PLAN " + query).fetchall()
+        children = defaultdict(list)
+        for node_id, parent, _, detail in plan:
+            children[parent].append((node_id, detail))
+        aliases = self._aliases(conn, query)
+        largest = max((self._rows_in(conn, t) for t in set(aliases.values())), default=0)
+
+        def cost(parent):
+            loops, scanned, extra = 1, False, 0
+            for node_id, detail in children[parent]:
+                m = _SCAN_RE.match(detail) or _RANGE_SEARCH_RE.match(detail)
+                if m and detail != "SCAN CONSTANT ROW":
+                    table = aliases.get(m.group(1).lower())
+                    loops *= self._rows_in(conn, table) if table else largest
+                    scanned = True
+                inner = cost(node_id) if node_id in children else 0
+                extra += loops * inner if detail.startswith("CORRELATED") else inner
+            return (loops if scanned else 0) + extra
+
+        return cost(0)
+
+    def run(self, query):
+        """
+        Rows of `query` as a list of dicts, at most max_rows + 1 of them.
+        Raises QueryRejected when the query is not allowed or over budget.
+        """
+        with span("sql_guard") as labels:
+            rows = self._run(query, labels)
+            labels["outcome"] = "truncated" if len(rows) > self.max_rows else "ok"
+            return rows
+
+    def _run(self, query, labels):
+        statement = _LEADING_COMMENTS_RE.sub("", query, count=1)
+        if not re.match(r"(SELECT|WITH)\b", statement, re.I):
+            labels["outcome"] = "not_select"
+            raise QueryRejected("Only SELECT statements are allowed.")
+
+        conn = self._connection()
+        try:
+            estimate = self.estimate_scan_rows(conn, query)
+        except (sqlite3.DatabaseError, sqlite3.Warning) as e:
+            if "not authorized" in str(e):
+                labels["outcome"] = "not_allowed"
+                raise QueryRejected(f"Query not allowed: {e}") from e
+            labels["outcome"] = "invalid"
+            raise QueryRejected(f"Query failed: {e}") from e
+        labels["estimated_rows"] = estimate
+        if estimate > self.max_scan_rows:
+            labels["outcome"] = "plan_too_large"
+            raise QueryRejected(
+                f"Query would scan about {estimate:,} rows (limit {self.max_scan_rows:,}); "
+                "add a filter on an indexed column or avoid the cross join.")
+
+        start = time.monotonic()
+        deadline = start + self.time_budget
+        max_checks = self.step_budget // PROGRESS_INTERVAL
+        checks = 0
+
+        def over_budget():
+            nonlocal checks
+            checks += 1
+            return checks > max_checks or time.monotonic() > deadline
+
+        conn.set_progress_handler(over_budget, PROGRESS_INTERVAL)
+        try:
+            cursor = conn.execute(query)
+            columns = [c[0] for c in cursor.description or ()]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchmany(self.max_rows + 1)]
+            cursor.close()
+        except sqlite3.OperationalError as e:
+            if "interrupted" not in str(e):
+                labels["outcome"] = "invalid"
+                raise QueryRejected(f"Query failed: {e}") from e
+            labels["outcome"] = "over_budget"
+            raise QueryRejected(
+                f"Query stopped after {time.monotonic() - start:.1f}s / "
+                f"{checks * PROGRESS_INTERVAL:,} steps (budget {self.time_budget}s / "
+                f"{self.step_budget:,} steps).") from e
+        except (sqlite3.DatabaseError, sqlite3.Warning) as e:
+            labels["outcome"] = "invalid"
+            raise QueryRejected(f"Query failed: {e}") from e
+        finally:
+            conn.set_progress_handler(None, 0)
+        labels["steps"] = checks * PROGRESS_INTERVAL
+        labels["rows"] = len(rows)
+        return rows
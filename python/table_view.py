@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# /python/table_view.py
+#
+# Server-side paging, sorting and summaries for the dashboard's student table.
+#
+# Sorting is done once per (data version, column, direction) as an argsort over
+# the cached frame; each rerun then only applies the current filter mask to
+# that order and slices out one page, so the browser (and pandas' Styler) only
+# ever sees `page_size` rows. The summary view is a small per-test aggregate
+# table that replaces the full listing for large rosters.
+
+import math
+
+import pandas as pd
+
+from bucketing import PERFORMANCE_LABELS, performance_codes
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def sort_order(df, column, ascending=True):
+    """Row positions of `df` sorted by `column` (stable, case-insensitive for text)."""
+    key = df[column]
+    if not pd.api.types.is_numeric_dtype(key):
+        key = key.astype(str).str.lower()
+    return key.reset_index(drop=True).sort_values(
+        ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+
+
+def page_of(df, order, mask, page, page_size):
+    """
+    One page of the rows selected by boolean `mask`, in `order`.
+    Returns (page frame, matching rows, number of pages); `page` is 1-based
+    and clamped to the available range.
+    """
+    positions = order[mask[order]]
+    pages = max(1, math.ceil(len(positions) / page_size))
+    page = min(max(1, page), pages)
+    start = (page - 1) * page_size
+    return df.iloc[positions[start:start + page_size]], len(positions), pages
+
+
+def summary_table(df, columns, max_marks):
+    """
+    Per-column Mean/Median/Min/Max/Std plus how many students fall in each
+    performance band (for columns with a known maximum).
+    """
+    scores = df[columns].astype(float)
+    summary = pd.DataFrame({
+        "Students": scores.count(),
+        "Mean": scores.mean(),
+        "Median": scores.median(),
+        "Min": scores.min(),
+        "Max": scores.max(),
+        "Std": scores.std(),
+    })
+    known = [c for c in columns if max_marks.get(c)]
+    if known:
+        codes = performance_codes(scores[known].to_numpy(), [max_marks[c] for c in known])
+        bands = pd.DataFrame({label: (codes == i).sum(axis=0) for i, label in enumerate(PERFORMANCE_LABELS)},
+                             index=known).astype("Int64")
+        summary = summary.join(bands)
+    summary.index.name = "Test Section"
+    return summary.round(2)
@@ -0,0 +1,28 @@
+# /python/tests/conftest.py
+#
+# Shared fixtures. Everything runs offline: rag.py uses its stub backend on a
+# throwaway copy of the database built from scores.xlsx, and mail goes to the
+# local SMTP sink from benchmark.py.
+
+import pytest
+
+import rag
+import scores_loader
+from answer_cache import AnswerCache
+from single_flight import SingleFlight
+from sql_cache import SQLResultCache
+
+
+@pytest.fixture
+def stub_rag(tmp_path, monkeypatch):
+    """rag.py initialized with the stub backend on a fresh database under tmp_path."""
+    monkeypatch.setattr(rag, "DB_PATH", str(tmp_path / "scores.db"))
+    monkeypatch.setattr(scores_loader, "CACHE_DIR", str(tmp_path / "scores_cache"))
+    monkeypatch.setattr(rag, "sql_cache", SQLResultCache())
+    monkeypatch.setattr(rag, "answer_cache", AnswerCache())
+    monkeypatch.setattr(rag, "inflight", SingleFlight())
+    monkeypatch.setattr(rag, "data_version", None)
+    monkeypatch.setattr(rag, "layout", None)
+    rag.init("stub")
+    yield rag
+    rag.connection.close()
@@ -0,0 +1,72 @@
+import sqlite3
+
+import pytest
+
+import analytics
+
+QUESTIONS = [
+    # column, paper question, marks, BT level, topic
+    ("T1a", 1, 10, "L1", "Automata"),
+    ("T1b", 1, 10, "L2", "Automata"),
+    ("T2", 2, 20, "L2", "Grammars"),
+]
+SCORES = [
+    ("S1", 10, 5, 20),
+    ("S2", 0, None, 5),  # a blank score counts as 0
+    ("S3", 4, 6, 10),
+]
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute('CREATE TABLE mytable ("USN" TEXT, "T1a" REAL, "T1b" REAL, "T2" REAL)')
+    conn.executemany("INSERT INTO mytable VALUES (?, ?, ?, ?)", SCORES)
+    analytics.ensure_schema(conn)
+    with conn:
+        conn.execute("DELETE FROM questions")
+        conn.executemany("INSERT INTO questions (column_name, question_no, marks, bt_level, topic) "
+                         "VALUES (?, ?, ?, ?, ?)", QUESTIONS)
+    analytics.refresh(conn, "v1")
+    yield conn
+    conn.close()
+
+
+def rows(conn, sql):
+    return [tuple(round(v, 2) if isinstance(v, float) else v for v in row) for row in conn.execute(sql)]
+
+
+def test_student_tables(conn):
+    assert rows(conn, "SELECT USN, topic, score, max_marks, percent FROM student_topic_performance "
+                      "ORDER BY topic, USN") == [
+        ("S1", "Automata", 15, 20, 75), ("S2", "Automata", 0, 20, 0), ("S3", "Automata", 10, 20, 50),
+        ("S1", "Grammars", 20, 20, 100), ("S2", "Grammars", 5, 20, 25), ("S3", "Grammars", 10, 20, 50),
+    ]
+    assert rows(conn, "SELECT USN, score, max_marks FROM student_bt_performance "
+                      "WHERE bt_level = 'L2' ORDER BY USN") == [("S1", 25, 30), ("S2", 5, 30), ("S3", 16, 30)]
+
+
+def test_class_tables(conn):
+    # Weak means below half of the available marks.
+    assert rows(conn, "SELECT topic, questions, max_marks, students, avg_score, avg_percent, weak_students "
+                      "FROM topic_performance ORDER BY topic") == [
+        ("Automata", 2, 20, 3, 8.33, 41.67, 1),
+        ("Grammars", 1, 20, 3, 11.67, 58.33, 1),
+    ]
+    assert rows(conn, "SELECT bt_level, questions, max_marks, avg_score, weak_students "
+                      "FROM bt_performance ORDER BY bt_level") == [
+        ("L1", 1, 10, 4.67, 2),
+        ("L2", 2, 30, 15.33, 1),
+    ]
+    bt_levels = conn.execute("SELECT bt_levels FROM topic_performance WHERE topic = 'Automata'").fetchone()[0]
+    assert sorted(bt_levels.split(",")) == ["L1", "L2"]
+
+
+def test_refresh_follows_question_changes(conn):
+    version = analytics.refresh(conn, "v1")
+    assert analytics.refresh(conn, "v1") == version
+    assert analytics.import_paper(conn, [{"number": 2, "marks": 40, "bt_level": "L3", "text": "Q2"}]) == 1
+    assert analytics.refresh(conn, "v1") != version
+    assert rows(conn, "SELECT bt_level, max_marks, avg_score FROM bt_performance ORDER BY bt_level") == [
+        ("L1", 10, 4.67), ("L2", 10, 3.67), ("L3", 40, 11.67),
+    ]
@@ -0,0 +1,68 @@
+import pytest
+
+from answer_cache import AnswerCache, normalize_question
+
+
+def make_cache(**kwargs):
+    cache = AnswerCache(**kwargs)
+    cache.set_version("v1")
+    return cache
+
+
+def test_normalization_ignores_case_and_punctuation():
+    assert normalize_question("  Who TOPPED the class?! ") == "who topped the class"
+
+
+def test_normalization_keeps_operators():
+    assert normalize_question("total>=30") == "total >= 30"
+    assert normalize_question("list students with total > 30") != \
+        normalize_question("list students with total < 30")
+
+
+def test_normalization_keeps_non_latin_text():
+    assert normalize_question("कितने छात्र पास हुए?") == "कितने छात्र पास हुए"
+    assert normalize_question("ಎಷ್ಟು ವಿದ್ಯಾರ್ಥಿಗಳು?") == "ಎಷ್ಟು ವಿದ್ಯಾರ್ಥಿಗಳು"
+
+
+def test_exact_hit():
+    cache = make_cache()
+    cache.store("Average total?", "12.3", "v1")
+    assert cache.lookup("average total") == "12.3"
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("list students with total > 30", "list students with total < 30"),
+    ("list students with total above 30", "list students with total below 30"),
+    ("how many scored above 30 in T1a", "how many scored above 30 in T1b"),
+])
+def test_different_questions_do_not_match(stored, asked):
+    cache = make_cache()
+    cache.store(stored, "answer", "v1")
+    assert cache.lookup(asked) is None
+
+
+def test_non_latin_questions_are_kept_apart():
+    cache = make_cache()
+    cache.store("कितने छात्र पास हुए?", "hindi answer", "v1")
+    assert cache.lookup("ಎಷ್ಟು ವಿದ್ಯಾರ್ಥಿಗಳು ಪಾಸ್?") is None
+    assert cache.lookup("कितने छात्र पास हुए") == "hindi answer"
+
+
+def test_empty_key_is_never_cached():
+    cache = make_cache()
+    cache.store("???", "answer", "v1")
+    assert cache.stats()["entries"] == 0
+    assert cache.lookup("!!!") is None
+
+
+def test_version_change_clears():
+    cache = make_cache()
+    cache.store("average total", "12.3", "v1")
+    cache.set_version("v2")
+    assert cache.lookup("average total") is None
+
+
+def test_stale_version_is_not_stored():
+    cache = make_cache()
+    cache.store("average total", "12.3", "v0")
+    assert cache.lookup("average total") is None
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark import legacy_materials, synthetic_scores
+from bucketing import PERFORMANCE_LABELS, assign_materials, performance_codes
+from course import MATERIALS, MAX_MARKS, TEST_COLUMNS
+
+
+def assert_same_as_legacy(df):
+    pd.testing.assert_frame_equal(assign_materials(df, TEST_COLUMNS, MAX_MARKS, MATERIALS),
+                                  legacy_materials(df), check_dtype=False)
+
+
+def test_random_roster():
+    assert_same_as_legacy(synthetic_scores(300, seed=3))
+
+
+def test_edge_scores():
+    df = synthetic_scores(6, seed=1)
+    maxima = pd.Series(MAX_MARKS)[TEST_COLUMNS]
+    df.loc[0, TEST_COLUMNS] = maxima.to_numpy()           # full marks
+    df.loc[1, TEST_COLUMNS] = 0.0                         # zero
+    df.loc[2, TEST_COLUMNS] = np.nan                      # blank cells
+    df.loc[3, TEST_COLUMNS] = (maxima * 0.5).to_numpy()   # exactly on a bucket edge
+    df.loc[4, TEST_COLUMNS] = (maxima * 0.25).to_numpy()
+    assert_same_as_legacy(df)
+
+
+def test_duplicate_students_keep_the_first_row():
+    df = synthetic_scores(5, seed=2)
+    repeat = df.iloc[[1]].assign(**{c: 0.0 for c in TEST_COLUMNS})
+    df = pd.concat([df, repeat], ignore_index=True)
+    # Same USN, different name: a separate student for both implementations.
+    df = pd.concat([df, df.iloc[[2]].assign(Name="SOMEONE ELSE")], ignore_index=True)
+    assert_same_as_legacy(df)
+    result = assign_materials(df, TEST_COLUMNS, MAX_MARKS, MATERIALS)
+    assert len(result) == 6
+
+
+@pytest.mark.parametrize("score, max_mark, label", [
+    (10, 10, "75-100%"),
+    (7.5, 10, "75-100%"),
+    (7.4, 10, "50-75%"),
+    (2.5, 10, "25-50%"),
+    (0, 10, "0-25%"),
+    (5, 0, "0-25%"),
+])
+def test_performance_codes(score, max_mark, label):
+    assert PERFORMANCE_LABELS[performance_codes([[score]], [max_mark])[0, 0]] == label
@@ -0,0 +1,71 @@
+from campaign import CampaignJournal, send_campaign
+from mailer import DeliveryResult
+
+
+class FakeMailer:
+    """send_all() that fails the recipients in `failing` and remembers what it sent."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.sent = []
+
+    def send_all(self, messages, on_result=None):
+        results = []
+        for recipient, message, tag in messages:
+            ok = recipient not in self.failing
+            if ok:
+                self.sent.append((recipient, message))
+            result = DeliveryResult(recipient, "sent" if ok else "failed", 1, "" if ok else "550", tag=tag)
+            results.append(result)
+            if on_result:
+                on_result(result)
+        return results
+
+
+EMAILS = [
+    ("1RV22CS001", "asha@example.edu", "body 1"),
+    ("1RV22CS002", "bilal@example.edu", "body 2"),
+    ("1RV22CS003", "chen@example.edu", "body 3"),
+]
+
+
+def run(journal, emails, mailer):
+    return send_campaign(journal, emails, mailer, lambda recipient, body: body)
+
+
+def test_rerun_skips_retries_and_resends(tmp_path):
+    journal = CampaignJournal(str(tmp_path / "journal.db"))
+
+    first = FakeMailer(failing={"bilal@example.edu"})
+    results, skipped = run(journal, EMAILS, first)
+    assert skipped == 0 and [r.status for r in results] == ["sent", "failed", "sent"]
+    assert journal.summary() == {"sent": 2, "failed": 1}
+
+    # Rerun: only the failed message goes out again.
+    second = FakeMailer()
+    results, skipped = run(journal, EMAILS, second)
+    assert skipped == 2 and second.sent == [("bilal@example.edu", "body 2")]
+    assert journal.summary() == {"sent": 3}
+
+    # Changed materials for one student: a new hash, so a new email.
+    changed = EMAILS[:2] + [("1RV22CS003", "chen@example.edu", "new body 3")]
+    third = FakeMailer()
+    results, skipped = run(journal, changed, third)
+    assert skipped == 2 and third.sent == [("chen@example.edu", "new body 3")]
+
+    attempts = journal.conn.execute(
+        "SELECT attempts FROM deliveries WHERE usn = '1RV22CS002'").fetchone()[0]
+    assert attempts == 2
+    journal.close()
+
+
+def test_journal_survives_reopening(tmp_path):
+    path = str(tmp_path / "journal.db")
+    journal = CampaignJournal(path)
+    run(journal, EMAILS, FakeMailer())
+    journal.close()
+
+    journal = CampaignJournal(path)
+    mailer = FakeMailer()
+    assert run(journal, EMAILS, mailer)[1] == 3 and mailer.sent == []
+    journal.close()
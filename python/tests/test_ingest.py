@@ -0,0 +1,88 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ingest
+import scores_loader
+
+
+@pytest.fixture
+def workbook(tmp_path, monkeypatch):
+    """write(df) saves the workbook with a new mtime and returns its path."""
+    monkeypatch.setattr(scores_loader, "CACHE_DIR", str(tmp_path / "cache"))
+    path = str(tmp_path / "scores.xlsx")
+    stamp = [1_700_000_000]
+
+    def write(df):
+        df.to_excel(path, index=False)
+        stamp[0] += 10
+        os.utime(path, (stamp[0], stamp[0]))
+        return path
+
+    return write
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    yield conn
+    conn.close()
+
+
+def roster(**extra):
+    df = pd.DataFrame({
+        "Name": ["Asha", np.nan, "Chen"],
+        "USN": ["1RV22CS001", "1RV22CS002", "1RV22CS003"],
+        "T1a": [3.0, 4.0, 5.0],
+        "Total-Test": [30.0, 40.0, 50.0],
+    })
+    return df.assign(**extra)
+
+
+def sync(path, conn, capsys):
+    ingest.sync_workbook(path, conn)
+    return capsys.readouterr().err
+
+
+def table(conn):
+    return conn.execute('SELECT "USN", "Name", "T1a", "total" FROM mytable ORDER BY "USN"').fetchall()
+
+
+def test_first_sync_writes_every_row(workbook, conn, capsys):
+    assert "3 rows written, 0 deleted" in sync(workbook(roster()), conn, capsys)
+    assert table(conn) == [("1RV22CS001", "Asha", 3.0, 30.0), ("1RV22CS002", "0", 4.0, 40.0),
+                           ("1RV22CS003", "Chen", 5.0, 50.0)]
+
+
+def test_only_changed_rows_are_written(workbook, conn, capsys):
+    # An all-blank Email column reads as floats but is stored as TEXT.
+    sync(workbook(roster(Email=np.nan)), conn, capsys)
+    df = roster(Email=np.nan)
+    df.loc[2, "T1a"] = 1.0
+    # Blanks stored as text are not rewritten each time.
+    assert "1 rows written, 0 deleted" in sync(workbook(df), conn, capsys)
+    assert table(conn)[2] == ("1RV22CS003", "Chen", 1.0, 50.0)
+
+
+def test_missing_rows_are_deleted(workbook, conn, capsys):
+    sync(workbook(roster()), conn, capsys)
+    assert "0 rows written, 1 deleted" in sync(workbook(roster().drop(index=0)), conn, capsys)
+    assert [row[0] for row in table(conn)] == ["1RV22CS002", "1RV22CS003"]
+
+
+def test_unchanged_workbook_is_not_read(workbook, conn, capsys, monkeypatch):
+    path = workbook(roster())
+    version = ingest.sync_workbook(path, conn)
+    monkeypatch.setattr(ingest, "read_scores", lambda path: pytest.fail("workbook was read"))
+    assert ingest.sync_workbook(path, conn) == version
+
+
+def test_new_column_rebuilds_the_table(workbook, conn, capsys):
+    sync(workbook(roster()), conn, capsys)
+    assert "3 rows written" in sync(workbook(roster(T1b=[1.0, 2.0, 3.0])), conn, capsys)
+    assert ingest._table_columns(conn) == ["Name", "USN", "T1a", "total", "T1b"]
+    assert ingest._has_key_index(conn)
+    assert conn.execute('SELECT "T1b" FROM mytable WHERE "USN" = ?', ("1RV22CS002",)).fetchone() == (2.0,)
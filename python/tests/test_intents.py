@@ -0,0 +1,70 @@
+import pytest
+
+from intents import match_intent
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("what is the average total", ("average", {"columns": ["total"]})),
+    ("average score in T3b", ("average", {"columns": ["T3b"]})),
+    ("top 5 students", ("top", {"column": "total", "n": 5})),
+    ("who scored lowest in T2", ("bottom", {"column": "T2", "n": 1})),
+    ("who is 1RV22CS001", ("student_name", {"usn": "1RV22CS001"})),
+])
+def test_recognized(question, expected):
+    assert match_intent(question) == expected
+
+
+def test_count_in_one_column():
+    intent, params = match_intent("how many students scored above 3 in T1a")
+    assert (intent, params["column"], params["op"], params["threshold"]) == ("count", "T1a", ">", 3.0)
+
+
+@pytest.mark.parametrize("question", [
+    # Average mixed with a comparison or a list.
+    "how many students scored above average",
+    "list students with average above 20",
+    "what is the average of the top 5 students",
+    "which students are below the class average",
+    # More than one column named.
+    "top 5 students in regular expressions",
+    "who topped T1",
+    "how many students got more than 3 in T1a and T1b",
+    # Percentages of the class, not a number of students.
+    "top 10% of students",
+    "show the bottom 5% in T2",
+    "best 10 percent in T1",
+    # Per question, exclusions and combined conditions.
+    "how many students scored above 5 in each question",
+    "who scored highest in each question",
+    "top 3 students excluding 1RV22CS001",
+    "top 5 students who failed T2",
+    "top 5 students with total above 30",
+    "how many of the top 10 scored above 5",
+    # "of" followed by something other than a USN.
+    "what is the student score of all students",
+    "student name of everyone",
+])
+def test_left_to_the_model(question):
+    assert match_intent(question) is None
+
+
+def test_mixed_question_reaches_the_backend(stub_rag):
+    question = "how many students scored above average"
+    assert stub_rag.run_query(question) == f"[stub] {question}"
+
+
+def test_layout_comes_from_the_database(stub_rag):
+    with stub_rag.connection:
+        stub_rag.connection.execute("UPDATE questions SET marks = 20, topic = 'Automata' WHERE column_name = 'T1a'")
+    stub_rag.refresh_data()
+    intent, params = match_intent("how many students scored above 50% in T1a", stub_rag.layout)
+    assert params["threshold"] == 10
+    assert match_intent("students weak in automata", stub_rag.layout) == ("weak_in_topic", {"columns": ["T1a"]})
+    assert "/20" in stub_rag.run_query("marks of 1RV22CS001 in T1a")
+
+
+def test_usn_lookup_ignores_case(stub_rag):
+    with stub_rag.connection:
+        stub_rag.connection.execute('UPDATE mytable SET "USN" = lower("USN") WHERE "USN" = ?', ("1RV22CS001",))
+    assert "not found" not in stub_rag.run_query("student score of 1RV22CS001")
+    assert "not found" not in stub_rag.run_query("who is 1rv22cs001")
@@ -0,0 +1,70 @@
+import threading
+from email.message import EmailMessage
+
+import pytest
+
+from benchmark import smtp_sink
+from mailer import BulkMailer
+
+
+def make_messages(n):
+    for i in range(n):
+        msg = EmailMessage()
+        msg["Subject"] = f"test {i}"
+        msg.set_content("body")
+        yield f"student{i}@example.edu", msg, i
+
+
+def make_mailer(server, **kwargs):
+    host, port = server.server_address
+    return BulkMailer(host, port, "teacher@example.edu", starttls=False, **kwargs)
+
+
+def test_sends_everything_over_pooled_connections():
+    with smtp_sink() as server:
+        results = make_mailer(server, workers=3, messages_per_connection=10).send_all(make_messages(40))
+    assert server.messages == 40
+    assert sorted(r.tag for r in results) == list(range(40))
+    assert all(r.status == "sent" and r.attempts == 1 for r in results)
+
+
+def test_unreachable_server_fails_each_message():
+    with smtp_sink() as server:
+        host, port = server.server_address
+    mailer = BulkMailer(host, port, "teacher@example.edu", starttls=False, workers=2,
+                        max_retries=1, backoff=0, timeout=1)
+    results = mailer.send_all(make_messages(3))
+    assert [r.status for r in results] == ["failed"] * 3
+    assert all(r.attempts == 2 for r in results)
+
+
+def test_raising_callback_does_not_hang():
+    def on_result(result):
+        raise OSError("journal write failed")
+
+    outcome = {}
+
+    def run():
+        with smtp_sink() as server:
+            mailer = make_mailer(server, workers=2)
+            try:
+                mailer.send_all(make_messages(200), on_result=on_result)
+            except OSError as e:
+                outcome["error"] = e
+            outcome["sent"] = server.messages
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=20)
+    assert not thread.is_alive(), "send_all hung after the callback raised"
+    assert str(outcome["error"]) == "journal write failed"
+    # Feeding stops at the first failure instead of sending the whole batch.
+    assert outcome["sent"] < 200
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_callback_sees_every_result(workers):
+    seen = []
+    with smtp_sink() as server:
+        make_mailer(server, workers=workers).send_all(make_messages(10), on_result=seen.append)
+    assert sorted(r.tag for r in seen) == list(range(10))
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    """Turn on both JSON lines and aggregation with empty aggregates."""
+    monkeypatch.setattr(metrics, "EMIT_JSON", True)
+    monkeypatch.setattr(metrics, "AGGREGATE", True)
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    monkeypatch.setattr(metrics, "_counters", {})
+    monkeypatch.setattr(metrics, "_histograms", {})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A perf_counter that advances 0.25s per call."""
+    ticks = iter(range(1000))
+    monkeypatch.setattr(metrics.time, "perf_counter", lambda: next(ticks) * 0.25)
+
+
+def span_lines(capsys):
+    return [json.loads(line) for line in capsys.readouterr().err.splitlines()
+            if json.loads(line)["metric"] == "span"]
+
+
+def test_disabled_span_is_the_shared_noop(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+    assert metrics.span("anything", backend="x") is metrics._NOOP
+    with metrics.span("anything") as labels:
+        labels["rows"] = 1
+
+
+def test_span_records_timing_and_ok(enabled, clock, capsys):
+    with metrics.span("sqlite_ingest", backend="gemini") as labels:
+        labels["rows"] = 12
+
+    [line] = span_lines(capsys)
+    assert line["name"] == "sqlite_ingest"
+    assert line["seconds"] == 0.25
+    assert line["ok"] is True
+    assert line["backend"] == "gemini" and line["rows"] == 12
+
+    # The numeric label stays out of the aggregate key.
+    hist = metrics._histograms[("sqlite_ingest", (("backend", "gemini"),))]
+    assert hist[-1] == 1 and hist[-2] == 0.25
+    assert hist[metrics.BUCKETS.index(0.25)] == 1
+    assert hist[metrics.BUCKETS.index(0.1)] == 0
+    assert not metrics._counters
+
+
+def test_span_records_failure_and_reraises(enabled, clock, capsys):
+    with pytest.raises(RuntimeError, match="boom"):
+        with metrics.span("smtp_send", backend="smtp"):
+            raise RuntimeError("boom")
+
+    [line] = span_lines(capsys)
+    assert line["ok"] is False
+    assert line["seconds"] == 0.25
+
+    key = ("smtp_send", (("backend", "smtp"),))
+    assert metrics._histograms[key][-1] == 1
+    assert metrics._counters[("smtp_send_errors", (("backend", "smtp"),))] == 1
+
+
+def test_render_prometheus(enabled, clock, capsys):
+    with metrics.span("rag_answer", cache="hit"):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.span("rag_answer", cache="hit"):
+            raise ValueError
+    metrics.count("questions", cache="hit")
+
+    text = metrics.render_prometheus()
+    assert "# TYPE pipeline_rag_answer_seconds histogram" in text
+    assert 'pipeline_rag_answer_seconds_count{cache="hit"} 2' in text
+    assert 'pipeline_rag_answer_seconds_sum{cache="hit"} 0.500000' in text
+    assert 'pipeline_rag_answer_seconds_bucket{cache="hit",le="+Inf"} 2' in text
+    assert 'pipeline_rag_answer_errors_total{cache="hit"} 1' in text
+    assert 'pipeline_questions_total{cache="hit"} 1' in text
@@ -0,0 +1,17 @@
+import ocr
+import paper_parser
+from benchmark import synthetic_paper
+
+
+def test_docx_is_read_once(tmp_path, monkeypatch):
+    path = str(tmp_path / "paper.docx")
+    synthetic_paper(path, 12)
+    expected = {"text": ocr.extract_text_from_docx(path),
+                "questions": list(paper_parser.iter_questions(path))}
+
+    passes = []
+    iter_blocks = paper_parser.iter_blocks
+    monkeypatch.setattr(paper_parser, "iter_blocks", lambda p: passes.append(p) or iter_blocks(p))
+    assert ocr.parse_document(path) == expected
+    assert len(passes) == 1
+    assert len(expected["questions"]) == 12
@@ -0,0 +1,64 @@
+import shutil
+
+import pytest
+
+import ocr
+from benchmark import synthetic_paper
+from parse_cache import ParseCache
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Paths actually parsed (not served from the cache)."""
+    calls = []
+    parse = ocr.parse_document
+    monkeypatch.setattr(ocr, "parse_document", lambda path: calls.append(path) or parse(path))
+    return calls
+
+
+@pytest.fixture
+def paper(tmp_path):
+    path = str(tmp_path / "paper.docx")
+    synthetic_paper(path, 5)
+    return path
+
+
+def test_identical_bytes_are_a_hit(tmp_path, paper, parses):
+    cache = ParseCache(str(tmp_path / "cache.db"), parser_version=1)
+    digest, parsed = ocr.load_document(paper, cache)
+    copy = str(tmp_path / "renamed.docx")
+    shutil.copy(paper, copy)
+    assert ocr.load_document(copy, cache) == (digest, parsed)
+    assert parses == [paper]
+    assert len(parsed["questions"]) == 5
+
+
+def test_changed_content_is_a_miss(tmp_path, paper, parses):
+    cache = ParseCache(str(tmp_path / "cache.db"), parser_version=1)
+    first, _ = ocr.load_document(paper, cache)
+    synthetic_paper(paper, 6)
+    second, parsed = ocr.load_document(paper, cache)
+    assert first != second and len(parsed["questions"]) == 6
+    assert parses == [paper, paper]
+
+
+def test_new_parser_version_ignores_old_entries(tmp_path, paper, parses):
+    path = str(tmp_path / "cache.db")
+    old = ParseCache(path, parser_version=1)
+    digest, _ = ocr.load_document(paper, old)
+    old.close()
+
+    new = ParseCache(path, parser_version=2)
+    assert new.get(digest) is None
+    ocr.load_document(paper, new)
+    assert new.get(digest) is not None
+    assert len(parses) == 2
+    new.close()
+
+
+def test_errors_are_not_cached(tmp_path, parses):
+    cache = ParseCache(str(tmp_path / "cache.db"), parser_version=1)
+    broken = tmp_path / "broken.docx"
+    broken.write_bytes(b"not a zip file")
+    digest, parsed = ocr.load_document(str(broken), cache)
+    assert "error" in parsed and cache.get(digest) is None
@@ -0,0 +1,149 @@
+import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_stub_answers_offline(stub_rag):
+    assert stub_rag.run_query("hello there") == "[stub] hello there"
+
+
+def test_sql_goes_through_the_tool(stub_rag):
+    rows = json.loads(stub_rag.run_query("SELECT COUNT(*) AS n FROM mytable"))
+    assert rows == [{"n": 133}]
+
+
+def test_stateless_answers_are_cached(stub_rag):
+    stub_rag.run_query("explain the results")
+    stub_rag.run_query("Explain the results?")
+    assert stub_rag.answer_cache.stats()["exact_hits"] == 1
+
+
+def test_sessions_keep_history(stub_rag):
+    stub_rag.run_query("first question", session_id="a")
+    stub_rag.run_query("second question", session_id="a")
+    stub_rag.run_query("other question", session_id="b")
+    assert stub_rag.backend.sessions.stats()["active"] == 2
+
+
+def test_stream_events(stub_rag):
+    events = list(stub_rag.stream_query("SELECT COUNT(*) AS n FROM mytable"))
+    assert events[0] == {"event": "tool_call", "name": "sql_query",
+                         "args": {"query": "SELECT COUNT(*) AS n FROM mytable"}}
+    text = "".join(e["text"] for e in events if e["event"] == "text")
+    assert events[-1] == {"event": "result", "result": text}
+
+
+def _ask_worker(rag, requests):
+    """Send JSON-line requests to an in-process worker; return the replies by id."""
+    async def main():
+        executor = ThreadPoolExecutor(max_workers=4)
+        reader = asyncio.StreamReader()
+        reader.feed_data("".join(json.dumps(r) + "\n" for r in requests).encode())
+        reader.feed_eof()
+        lines = []
+
+        class Writer:
+            def write(self, data):
+                lines.extend(data.decode().splitlines())
+
+            async def drain(self):
+                pass
+
+            def close(self):
+                pass
+
+        await rag.handle_client(reader, Writer(), executor)
+        executor.shutdown()
+        return [json.loads(line) for line in lines]
+
+    return asyncio.run(main())
+
+
+def test_worker_protocol(stub_rag):
+    replies = _ask_worker(stub_rag, [
+        {"id": 1, "query": "hello"},
+        {"id": 2, "op": "stats"},
+        {"id": 3, "query": "hello again", "stream": True},
+    ])
+    by_id = {}
+    for reply in replies:
+        by_id.setdefault(reply["id"], []).append(reply)
+    assert by_id[1] == [{"id": 1, "result": "[stub] hello"}]
+    assert "sql_cache" in by_id[2][0]["result"]
+    assert by_id[3][-1] == {"id": 3, "event": "result", "result": "[stub] hello again"}
+
+
+def test_worker_coalesces_only_identical_questions(stub_rag, monkeypatch):
+    send = stub_rag.StubChat.send_message
+
+    def slow_send(self, message):
+        time.sleep(0.2)
+        return send(self, message)
+
+    monkeypatch.setattr(stub_rag.StubChat, "send_message", slow_send)
+    replies = _ask_worker(stub_rag, [
+        {"id": 1, "query": "students with total > 30"},
+        {"id": 2, "query": "Students with total > 30?"},
+        {"id": 3, "query": "students with total < 30"},
+        {"id": 4, "query": "कितने छात्र पास हुए"},
+        {"id": 5, "query": "ಎಷ್ಟು ವಿದ್ಯಾರ್ಥಿಗಳು"},
+    ])
+    results = {r["id"]: r["result"] for r in replies}
+    assert results[2] == results[1] == "[stub] students with total > 30"
+    assert results[3] == "[stub] students with total < 30"
+    assert results[4] != results[5]
+    assert stub_rag.inflight.stats()["coalesced"] == 1
+
+
+def test_worker_rejects_non_string_queries(stub_rag):
+    replies = _ask_worker(stub_rag, [
+        {"id": 1, "query": 123},
+        {"id": 2, "query": "   "},
+        {"id": 3, "query": "hello"},
+    ])
+    by_id = {r["id"]: r for r in replies}
+    assert by_id[1] == {"id": 1, "error": "Query not provided"}
+    assert by_id[2] == {"id": 2, "error": "Query not provided"}
+    assert by_id[3] == {"id": 3, "result": "[stub] hello"}
+
+
+def test_worker_never_joins_a_run_on_older_data(stub_rag, monkeypatch):
+    send = stub_rag.StubChat.send_message
+    versions = iter(range(1000))
+
+    def slow_send(self, message):
+        time.sleep(0.2)
+        return send(self, message)
+
+    monkeypatch.setattr(stub_rag.StubChat, "send_message", slow_send)
+    # Every refresh sees new data.
+    monkeypatch.setattr(stub_rag, "refresh_data", lambda: next(versions))
+    _ask_worker(stub_rag, [{"id": 1, "query": "explain the results"},
+                           {"id": 2, "query": "explain the results"}])
+    assert stub_rag.inflight.stats()["coalesced"] == 0
+
+
+def test_worker_coalesces_streamed_questions(stub_rag, monkeypatch):
+    send = stub_rag.StubChat.send_message
+    calls = []
+
+    def slow_send(self, message):
+        calls.append(message)
+        time.sleep(0.2)
+        return send(self, message)
+
+    monkeypatch.setattr(stub_rag.StubChat, "send_message", slow_send)
+    replies = _ask_worker(stub_rag, [
+        {"id": 1, "query": "explain the results", "stream": True},
+        {"id": 2, "query": "Explain the results?", "stream": True},
+        {"id": 3, "query": "explain the results", "stream": True, "session": "a"},
+    ])
+    by_id = {}
+    for reply in replies:
+        by_id.setdefault(reply.pop("id"), []).append(reply)
+    assert by_id[1] == by_id[2]
+    assert by_id[1][-1] == {"event": "result", "result": "[stub] explain the results"}
+    assert by_id[3][-1] == by_id[1][-1]
+    assert len(calls) == 2  # the shared stateless run and the session's own
+    assert stub_rag.inflight.stats()["coalesced"] == 1
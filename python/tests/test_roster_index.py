@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from roster_index import StudentIndex, find_usns
+from table_view import page_of, sort_order
+
+FIRST = ["Asha", "Bilal", "chen", "Divya", "Esha", "Farhan"]
+LAST = ["Rao", "Khan", "Li", "Nair"]
+
+
+@pytest.fixture(scope="module")
+def df():
+    rng = np.random.default_rng(7)
+    n = 500
+    names = [f"{FIRST[i % len(FIRST)]} {LAST[(i // 7) % len(LAST)]}" for i in rng.integers(0, 60, n)]
+    return pd.DataFrame({
+        "Name": names,
+        "USN": [f" 1rv22cs{i:03d} " if i % 11 == 0 else f"1RV22CS{i:03d}" for i in range(n)],
+        "Total-Test": rng.integers(0, 100, n).astype(float),
+    }, index=pd.RangeIndex(100, 100 + n))
+
+
+@pytest.fixture(scope="module")
+def roster(df):
+    return StudentIndex(df)
+
+
+def test_usn_lookup_matches_a_column_scan(df, roster):
+    normalized = df["USN"].str.strip().str.lower()
+    for usn in ["1RV22CS000", "1rv22cs011", "1RV22CS499", "1RV22CS500"]:
+        hits = np.flatnonzero(normalized == usn.lower())
+        assert roster.lookup(usn) == (hits[0] if len(hits) else None)
+    assert roster.lookup_many(["1RV22CS001", "9XX99XX999"]) == {"1RV22CS001": 1, "9XX99XX999": None}
+
+
+def test_name_positions_match_a_filter(df, roster):
+    for name in ["Asha Rao", "CHEN li", "Nobody"]:
+        expected = np.flatnonzero(df["Name"].str.lower() == name.lower()).tolist()
+        assert roster.name_positions([name]) == expected
+
+
+def test_prefix_search_matches_a_filter(df, roster):
+    expected = sorted({n for n in df["Name"] if n.lower().startswith("ch")}, key=str.lower)
+    assert roster.prefix_names("Ch") == expected
+    assert roster.prefix_names("ch", limit=1) == expected[:1]
+    assert set(roster.search_names("khan", limit=100)) == {n for n in df["Name"] if n.endswith("Khan")}
+
+
+@pytest.mark.parametrize("column, ascending", [("Total-Test", False), ("Name", True), ("USN", True)])
+@pytest.mark.parametrize("page_size", [25, 100])
+def test_pages_match_a_filtered_sort(df, column, ascending, page_size):
+    mask = ((df["Total-Test"] >= 20) & (df["Total-Test"] <= 70)).to_numpy()
+    key = df[column] if column == "Total-Test" else df[column].str.lower()
+    expected = df.loc[key[mask].sort_values(ascending=ascending, kind="stable").index]
+
+    order = sort_order(df, column, ascending)
+    pages = []
+    _, matching, count = page_of(df, order, mask, 1, page_size)
+    for number in range(1, count + 1):
+        pages.append(page_of(df, order, mask, number, page_size)[0])
+    assert matching == mask.sum()
+    pd.testing.assert_frame_equal(pd.concat(pages), expected)
+    # Out-of-range pages are clamped.
+    pd.testing.assert_frame_equal(page_of(df, order, mask, count + 5, page_size)[0], pages[-1])
+
+
+def test_find_usns():
+    assert find_usns("scores of 1rv22cs001, 1RV22CS002 and 1rv22cs001") == ["1RV22CS001", "1RV22CS002"]
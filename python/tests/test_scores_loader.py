@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import scores_loader
+
+
+@pytest.fixture
+def noisy_workbook(tmp_path, monkeypatch):
+    """A sheet with whitespace and NaN score cells and a mixed-type USN column."""
+    monkeypatch.setattr(scores_loader, "CACHE_DIR", str(tmp_path / "cache"))
+    df = pd.DataFrame({
+        "Name": ["Asha", "Bilal", "Chen", "Divya"],
+        "USN": ["1RV22CS001", 1234, "1RV22CS003", "1RV22CS004"],
+        "T1a": [3, " ", np.nan, 5],
+        "T1b": [2.5, 4, 1, 0],
+    })
+    path = tmp_path / "scores.xlsx"
+    df.to_excel(path, index=False)
+    return str(path)
+
+
+def load(path):
+    return scores_loader._load(path, use_cache=True)
+
+
+def test_noisy_sheet_is_cached(noisy_workbook):
+    assert load(noisy_workbook)[1] == "miss"
+    df, outcome = load(noisy_workbook)
+    assert outcome == "hit"
+    assert df["T1a"].dtype == float and df["T1a"].isna().sum() == 2
+    assert list(df["USN"]) == ["1RV22CS001", "1234", "1RV22CS003", "1RV22CS004"]
+
+
+def test_same_frame_with_and_without_cache(noisy_workbook):
+    load(noisy_workbook)
+    cached = scores_loader.load_scores(noisy_workbook)
+    direct = scores_loader.load_scores(noisy_workbook, use_cache=False)
+    pd.testing.assert_frame_equal(cached, direct)
+
+
+def test_failed_cache_write_is_remembered(noisy_workbook, monkeypatch):
+    def fail(*args, **kwargs):
+        raise ValueError("cannot store")
+
+    monkeypatch.setattr(pd.DataFrame, "to_feather", fail)
+    assert load(noisy_workbook)[1] == "skip"
+
+    hashed = []
+    monkeypatch.setattr(scores_loader, "file_fingerprint", lambda path: hashed.append(path))
+    assert load(noisy_workbook)[1] == "skip"
+    assert not hashed
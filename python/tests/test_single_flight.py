@@ -0,0 +1,53 @@
+import asyncio
+import threading
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_late_joiner_gets_every_event():
+    async def main():
+        flight = SingleFlight()
+        release = threading.Event()
+        loop = asyncio.get_running_loop()
+
+        def produce(publish):
+            publish("a")
+            release.wait()
+            publish("b")
+
+        async def collect():
+            return [e async for e in flight.stream("k", lambda p: loop.run_in_executor(None, produce, p))]
+
+        first = asyncio.create_task(collect())
+        await asyncio.sleep(0.05)
+        second = asyncio.create_task(collect())
+        await asyncio.sleep(0.05)
+        release.set()
+        return await first, await second, flight.stats()
+
+    first, second, stats = asyncio.run(main())
+    assert first == second == ["a", "b"]
+    assert stats == {"in_flight": 0, "leaders": 1, "coalesced": 1}
+
+
+def test_every_waiter_sees_the_error():
+    async def main():
+        flight = SingleFlight()
+
+        async def start(publish):
+            publish("partial")
+            await asyncio.sleep(0.05)
+            raise RuntimeError("model failed")
+
+        async def collect():
+            seen = []
+            with pytest.raises(RuntimeError, match="model failed"):
+                async for event in flight.stream("k", start):
+                    seen.append(event)
+            return seen
+
+        return await asyncio.gather(collect(), collect())
+
+    assert asyncio.run(main()) == [["partial"], ["partial"]]
@@ -0,0 +1,95 @@
+import pytest
+
+import sql_cache
+from sql_cache import SQLResultCache, canonicalize_sql
+
+
+class Runner:
+    """run() for get_or_run that counts calls and returns one row per query."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, query):
+        self.calls += 1
+        return [{"query": query}]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(sql_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def make_cache(**kwargs):
+    cache = SQLResultCache(**kwargs)
+    cache.set_version("v1")
+    return cache
+
+
+def test_formatting_outside_the_select_list_is_ignored():
+    assert canonicalize_sql("select Name from mytable  where total > 3 ;") == \
+        canonicalize_sql("SELECT Name\nFROM mytable -- top\nWHERE total>3")
+
+
+@pytest.mark.parametrize("a, b", [
+    ("select avg(T1a) from mytable", "SELECT AVG(T1a) FROM mytable"),
+    ("SELECT total+1 FROM mytable", "SELECT total + 1 FROM mytable"),
+    ("SELECT * FROM (SELECT count(*) FROM mytable)", "SELECT * FROM (SELECT COUNT(*) FROM mytable)"),
+])
+def test_select_lists_name_the_columns(a, b):
+    # SQLite names these columns after their text, so the rows differ.
+    assert canonicalize_sql(a) != canonicalize_sql(b)
+
+
+def test_hit_returns_copies():
+    cache, run = make_cache(), Runner()
+    rows = cache.get_or_run("SELECT 1", run)
+    rows[0]["query"] = "changed"
+    assert cache.get_or_run("select 1;", run) == [{"query": "SELECT 1"}]
+    assert run.calls == 1 and cache.stats()["hits"] == 1
+
+
+def test_least_recently_used_is_evicted():
+    cache, run = make_cache(max_entries=2), Runner()
+    cache.get_or_run("SELECT 1", run)
+    cache.get_or_run("SELECT 2", run)
+    cache.get_or_run("SELECT 1", run)  # 2 is now the oldest
+    cache.get_or_run("SELECT 3", run)
+    assert cache.stats()["evictions"] == 1
+    cache.get_or_run("SELECT 1", run)
+    assert run.calls == 3
+    cache.get_or_run("SELECT 2", run)
+    assert run.calls == 4
+
+
+def test_entries_expire(clock):
+    cache, run = make_cache(ttl=10), Runner()
+    cache.get_or_run("SELECT 1", run)
+    clock[0] += 10
+    cache.get_or_run("SELECT 1", run)
+    assert run.calls == 1
+    clock[0] += 11
+    cache.get_or_run("SELECT 1", run)
+    assert run.calls == 2 and cache.stats()["expirations"] == 1
+
+
+def test_new_data_version_clears():
+    cache, run = make_cache(), Runner()
+    cache.get_or_run("SELECT 1", run)
+    cache.set_version("v2")
+    assert cache.stats()["entries"] == 0 and cache.stats()["invalidations"] == 1
+    cache.get_or_run("SELECT 1", run)
+    assert run.calls == 2
+
+
+def test_rows_from_an_older_version_are_not_stored():
+    cache = make_cache()
+
+    def run_while_data_changes(query):
+        cache.set_version("v2")
+        return [{"n": 1}]
+
+    cache.get_or_run("SELECT 1", run_while_data_changes)
+    assert cache.stats()["entries"] == 0
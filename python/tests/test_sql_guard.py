@@ -0,0 +1,71 @@
+import sqlite3
+
+import pytest
+
+from sql_guard import QueryRejected, SQLGuard
+
+
+@pytest.fixture
+def guard(tmp_path):
+    path = str(tmp_path / "guard.db")
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE mytable ("Name" TEXT, "USN" TEXT PRIMARY KEY, "total" REAL)')
+    conn.execute('CREATE INDEX idx_total ON mytable ("total")')
+    conn.executemany("INSERT INTO mytable VALUES (?, ?, ?)",
+                     [(f"Student {i}", f"1RV22CS{i:03d}", i % 50) for i in range(1000)])
+    conn.commit()
+    conn.close()
+    return SQLGuard(path, time_budget=1.0, step_budget=200_000, max_rows=5, max_scan_rows=100_000)
+
+
+def rejected(guard, query):
+    with pytest.raises(QueryRejected) as e:
+        guard.run(query)
+    return str(e.value)
+
+
+def test_rows_are_capped(guard):
+    assert len(guard.run('SELECT "Name" FROM mytable')) == guard.max_rows + 1
+    assert guard.run('SELECT COUNT(*) AS n FROM mytable') == [{"n": 1000}]
+
+
+@pytest.mark.parametrize("query", [
+    "DELETE FROM mytable",
+    "PRAGMA table_info(mytable)",
+    "/* hi */ DROP TABLE mytable",
+])
+def test_only_select(guard, query):
+    assert rejected(guard, query) == "Only SELECT statements are allowed."
+
+
+@pytest.mark.parametrize("query", [
+    "WITH x AS (SELECT 1) DELETE FROM mytable",
+    "SELECT * FROM pragma_table_info('mytable')",
+])
+def test_not_allowed(guard, query):
+    assert rejected(guard, query).startswith("Query not allowed")
+
+
+def test_one_statement_at_a_time(guard):
+    assert "one statement" in rejected(guard, "SELECT 1; DROP TABLE mytable")
+    assert guard.run("SELECT COUNT(*) AS n FROM mytable") == [{"n": 1000}]
+
+
+def test_equality_join_is_cheap(guard):
+    query = 'SELECT a."Name" FROM mytable a JOIN mytable b ON a."USN" = b."USN"'
+    assert guard.estimate_scan_rows(guard._connection(), query) == 1000
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT a.Name FROM mytable a JOIN mytable b ON a.total < b.total",
+    "SELECT a.Name FROM mytable a JOIN mytable b ON a.total BETWEEN b.total - 1 AND b.total + 1",
+    "SELECT a.Name FROM mytable a, mytable b",
+])
+def test_range_and_cross_joins_are_rejected_up_front(guard, query):
+    assert guard.estimate_scan_rows(guard._connection(), query) == 1000 * 1000
+    assert rejected(guard, query).startswith("Query would scan about 1,000,000 rows")
+
+
+def test_runaway_query_is_stopped(guard):
+    query = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT MAX(x) FROM c"
+    assert rejected(guard, query).startswith("Query stopped after")
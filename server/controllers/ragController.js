@@ -1,35 +1,279 @@
 const { spawn } = require('child_process');
+const fs = require('fs');
+const net = require('net');
 const path = require('path');
 
-exports.runRagQuery = (req, res) => {
-  const userQuery = req.body.query;
-  if (!userQuery) {
-    return res.status(400).json({ error: 'Query not provided' });
-  }
+// Optional persistent worker started with `python rag.py --serve`.
+// Set RAG_WORKER_SOCKET (Unix socket) or RAG_WORKER_PORT (TCP) to use it;
+// otherwise every request spawns rag.py as before.
+const workerSocket = process.env.RAG_WORKER_SOCKET;
+const workerPort = process.env.RAG_WORKER_PORT;
+const workerHost = process.env.RAG_WORKER_HOST || '127.0.0.1';
+
+let nextRequestId = 1;
+
+// With onEvent, the worker streams the answer: onEvent receives each
+// tool_call / text event and the promise resolves with the final result.
+function queryWorker(userQuery, sessionId, onEvent) {
+  return new Promise((resolve, reject) => {
+    const options = workerSocket ? { path: workerSocket } : { host: workerHost, port: Number(workerPort) };
+    const requestId = nextRequestId++;
+    const socket = net.createConnection(options, () => {
+      const request = { id: requestId, query: userQuery };
+      if (sessionId) {
+        // Keeps conversation history in the worker; omit for stateless queries.
+        request.session = String(sessionId);
+      }
+      if (onEvent) {
+        request.stream = true;
+      }
+      socket.write(JSON.stringify(request) + '\n');
+    });
+
+    let buffer = '';
+    socket.setEncoding('utf8');
+    socket.on('data', (chunk) => {
+      buffer += chunk;
+      let newline;
+      while ((newline = buffer.indexOf('\n')) !== -1) {
+        const { id, ...reply } = JSON.parse(buffer.slice(0, newline));
+        buffer = buffer.slice(newline + 1);
+        if (reply.error !== undefined) {
+          socket.end();
+          const err = new Error(reply.error);
+          err.fromWorker = true;
+          return reject(err);
+        }
+        if (reply.result !== undefined) {
+          socket.end();
+          return resolve(reply.result);
+        }
+        onEvent(reply);
+      }
+    });
+    socket.on('error', reject);
+    // No-op once the answer has arrived.
+    socket.on('close', () => reject(new Error('RAG worker closed the connection')));
+  });
+}
+
+// One-shot rag.py runs in progress, keyed on the data version and the
+// normalized question, so identical questions asked at the same time share a
+// single process. (The persistent worker coalesces its own requests the same way.)
+const inflightSpawns = new Map();
+// Streamed one-shot runs in progress, keyed the same way. Each request gets
+// the events seen so far, then the rest as they arrive.
+const inflightStreams = new Map();
 
-  // Build the path to the Python script
-  const scriptPath = path.join(__dirname, '../../python/rag.py');
+const scoresPath = process.env.RAG_SCORES_PATH || path.join(__dirname, '../../python/scores.xlsx');
+const dbPath = process.env.RAG_DB_PATH || 'mydatabase.db';
+const OPERATOR_RE = /<=|>=|!=|<>|==|[<>=%]/g;
+const OPERATOR_TOKEN_RE = /^(?:<=|>=|!=|<>|==|[<>=%])$/;
 
-  // Spawn the Python process without CLI arguments
-  const pythonProcess = spawn('python', [scriptPath]);
+function normalizeQuestion(question) {
+  // Same rules as answer_cache.normalize_question in Python: comparison
+  // operators are words of their own, other punctuation and symbols split
+  // words, letters in any script are kept.
+  return question
+    .toLowerCase()
+    .replace(OPERATOR_RE, (op) => ` ${op} `)
+    .split(/\s+/)
+    .flatMap((token) => (OPERATOR_TOKEN_RE.test(token) ? [token] : token.replace(/[\p{P}\p{S}]/gu, ' ').split(/\s+/)))
+    .filter(Boolean)
+    .join(' ');
+}
 
-  // Write the user query to the Python process's stdin
-  pythonProcess.stdin.write(userQuery);
-  pythonProcess.stdin.end();
+function dataVersion() {
+  // rag.py re-ingests when the workbook changes, and the database changes
+  // when it does or when a paper's question metadata is imported.
+  return [scoresPath, dbPath]
+    .map((file) => {
+      try {
+        const st = fs.statSync(file);
+        return `${st.size}:${st.mtimeMs}`;
+      } catch (err) {
+        return '-';
+      }
+    })
+    .join('/');
+}
 
-  let output = '';
-  pythonProcess.stdout.on('data', (data) => {
-    output += data.toString();
+function runRagProcess(userQuery) {
+  return new Promise((resolve, reject) => {
+    // Build the path to the Python script
+    const scriptPath = path.join(__dirname, '../../python/rag.py');
+
+    // Spawn the Python process without CLI arguments
+    const pythonProcess = spawn('python', [scriptPath]);
+
+    // Write the user query to the Python process's stdin
+    pythonProcess.stdin.write(userQuery);
+    pythonProcess.stdin.end();
+
+    let output = '';
+    pythonProcess.stdout.on('data', (data) => {
+      output += data.toString();
+    });
+
+    pythonProcess.stderr.on('data', (data) => {
+      console.error(`Python error: ${data}`);
+    });
+
+    pythonProcess.on('error', reject);
+    pythonProcess.on('close', (code) => {
+      if (code !== 0) {
+        return reject(new Error('Python process exited with code ' + code));
+      }
+      resolve(output);
+    });
   });
+}
 
-  pythonProcess.stderr.on('data', (data) => {
-    console.error(`Python error: ${data}`);
+// `rag.py --stream` prints one JSON event per line; onEvent receives the
+// tool_call / text events and the promise resolves with the final result.
+function streamRagProcess(userQuery, onEvent) {
+  return new Promise((resolve, reject) => {
+    const scriptPath = path.join(__dirname, '../../python/rag.py');
+    const pythonProcess = spawn('python', [scriptPath, '--stream']);
+    pythonProcess.stdin.write(userQuery);
+    pythonProcess.stdin.end();
+
+    let buffer = '';
+    let result;
+    let error;
+    pythonProcess.stdout.setEncoding('utf8');
+    pythonProcess.stdout.on('data', (chunk) => {
+      buffer += chunk;
+      let newline;
+      while ((newline = buffer.indexOf('\n')) !== -1) {
+        const line = buffer.slice(0, newline).trim();
+        buffer = buffer.slice(newline + 1);
+        if (!line) {
+          continue;
+        }
+        const event = JSON.parse(line);
+        if (event.event === 'result') {
+          result = event.result;
+        } else if (event.event === 'error') {
+          error = event.error;
+        } else {
+          onEvent(event);
+        }
+      }
+    });
+
+    pythonProcess.stderr.on('data', (data) => {
+      console.error(`Python error: ${data}`);
+    });
+
+    pythonProcess.on('error', reject);
+    pythonProcess.on('close', (code) => {
+      if (code !== 0 || result === undefined) {
+        return reject(new Error(error || 'Python process exited with code ' + code));
+      }
+      resolve(result);
+    });
   });
+}
 
-  pythonProcess.on('close', (code) => {
-    if (code !== 0) {
-      return res.status(500).json({ error: 'Python process exited with code ' + code });
-    }
-    res.json({ result: output });
+function sharedStreamRagProcess(userQuery, onEvent) {
+  const normalized = normalizeQuestion(userQuery);
+  if (!normalized) {
+    return streamRagProcess(userQuery, onEvent);
+  }
+  const key = `${dataVersion()}\n${normalized}`;
+  let flight = inflightStreams.get(key);
+  if (!flight) {
+    const events = [];
+    const listeners = new Set();
+    const run = streamRagProcess(userQuery, (event) => {
+      events.push(event);
+      listeners.forEach((listener) => listener(event));
+    }).finally(() => inflightStreams.delete(key));
+    flight = { events, listeners, run };
+    inflightStreams.set(key, flight);
+  }
+  flight.events.forEach(onEvent);
+  flight.listeners.add(onEvent);
+  return flight.run.finally(() => flight.listeners.delete(onEvent));
+}
+
+// Replies with application/x-ndjson: one {"event": ...} object per line as
+// the answer is produced, ending with a "result" or "error" event.
+function streamRagQuery(userQuery, sessionId, res) {
+  res.status(200).set({
+    'Content-Type': 'application/x-ndjson',
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',
   });
+  res.flushHeaders();
+
+  let started = false;
+  const send = (event) => {
+    started = true;
+    res.write(JSON.stringify(event) + '\n');
+  };
+  const finish = (result) => res.end(JSON.stringify({ event: 'result', result }) + '\n');
+  const fail = (err) => res.end(JSON.stringify({ event: 'error', error: err.message }) + '\n');
+  const viaProcess = () => sharedStreamRagProcess(userQuery, send).then(finish, fail);
+
+  if (!workerSocket && !workerPort) {
+    return viaProcess();
+  }
+  queryWorker(userQuery, sessionId, send)
+    .then(finish)
+    .catch((err) => {
+      if (err.fromWorker || started) {
+        console.error(`RAG worker error: ${err.message}`);
+        return fail(err);
+      }
+      console.error(`RAG worker unavailable (${err.message}), spawning rag.py`);
+      viaProcess();
+    });
+}
+
+function spawnRagQuery(userQuery, res) {
+  const normalized = normalizeQuestion(userQuery);
+  let run;
+  if (!normalized) {
+    // Nothing left to compare on: never shared.
+    run = runRagProcess(userQuery);
+  } else {
+    const key = `${dataVersion()}\n${normalized}`;
+    run = inflightSpawns.get(key);
+    if (!run) {
+      run = runRagProcess(userQuery).finally(() => inflightSpawns.delete(key));
+      inflightSpawns.set(key, run);
+    }
+  }
+  run
+    .then((output) => res.json({ result: output }))
+    .catch((err) => res.status(500).json({ error: err.message }));
+}
+
+exports.runRagQuery = (req, res) => {
+  const userQuery = req.body.query;
+  if (!userQuery) {
+    return res.status(400).json({ error: 'Query not provided' });
+  }
+
+  if (req.body.stream) {
+    return streamRagQuery(userQuery, req.body.session_id, res);
+  }
+
+  if (!workerSocket && !workerPort) {
+    return spawnRagQuery(userQuery, res);
+  }
+
+  queryWorker(userQuery, req.body.session_id)
+    .then((result) => res.json({ result }))
+    .catch((err) => {
+      if (err.fromWorker) {
+        console.error(`RAG worker error: ${err.message}`);
+        return res.status(500).json({ error: err.message });
+      }
+      // Worker not reachable: fall back to a one-shot process.
+      console.error(`RAG worker unavailable (${err.message}), spawning rag.py`);
+      spawnRagQuery(userQuery, res);
+    });
 };
@@ -42,8 +42,15 @@ router.post('/upload-document', upload.single('docfile'), (req, res) => {
   const pythonScriptPath = path.join(__dirname, '..', '..', 'python', 'ocr.py');
   console.log("Using Python script:", pythonScriptPath);
   
-  // Spawn the Python process and pass the uploaded file path as an argument
-  const pythonProcess = spawn('python', [pythonScriptPath, filePath]);
+  // Spawn the Python process and pass the uploaded file path as an argument.
+  // Only when the form sets import_marks=true does --db replace the course's
+  // marks and BT levels with this paper's (same database path rag.py uses);
+  // they drive the emails, the analytics and the chatbot for every student.
+  const args = [pythonScriptPath, filePath];
+  if (req.body.import_marks === 'true') {
+    args.push('--db', process.env.RAG_DB_PATH || 'mydatabase.db');
+  }
+  const pythonProcess = spawn('python', args);
   
   let resultData = "";
   